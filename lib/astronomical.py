@@ -17,9 +17,282 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 # Import required modules
 from datetime import datetime, timedelta, date, time
+import numpy as np
+import threading
 import ephem
 import pytz
 
+# Define global variables
+unixEpoch     = ephem.Date('1970/01/01')
+ephemerisData = {}
+ephemerisLock = threading.Lock()
+
+# Define body, ephem function, horizon and center flag used to calculate each
+# rising or setting event
+ephemerisEvents = {'Dawn':     ('Sun', 'next_rising', '-6',   True),
+                   'Sunrise':  ('Sun', 'next_rising', '-0:34',False),
+                   'Sunset':   ('Sun', 'next_setting','-0:34',False),
+                   'Dusk':     ('Sun', 'next_setting','-6',   True),
+                   'Moonrise': ('Moon','next_rising', '0',    False),
+                   'Moonset':  ('Moon','next_setting','0',    False)}
+
+# Define ephem function used to calculate each lunation event
+lunationEvents  = {'FullMoon': ephem.next_full_moon,
+                   'NewMoon':  ephem.next_new_moon}
+
+def stationObserver(Body,Latitude,Longitude):
+
+    """ Define the observer used to calculate the rising and setting of the
+    specified body at the station location
+
+    INPUTS:
+        Body                Required body (Sun/Moon)
+        Latitude            Station latitude
+        Longitude           Station longitude
+
+    OUTPUT:
+        Observer            ephem.Observer located at the station
+    """
+
+    # Define observer location. Sunrise/Sunset observer properties match the
+    # United States Naval Observatory Astronomical Almanac
+    Observer     = ephem.Observer()
+    Observer.lat = str(Latitude)
+    Observer.lon = str(Longitude)
+    if Body == 'Sun':
+        Observer.pressure = 0
+
+    # Return observer
+    return Observer
+
+def eventTimes(Observer,Body,Event,Horizon,Start,End,Center=False):
+
+    """ Calculate the time of every rising or setting of the specified body
+    between the start and end time
+
+    INPUTS:
+        Observer            ephem.Observer located at the station
+        Body                ephem body (Sun/Moon)
+        Event               Required event (next_rising/next_setting)
+        Horizon             Observer horizon
+        Start               Start time as ephem.Date
+        End                 End time as ephem.Date
+        Center              Flag to use center of body rather than upper limb
+
+    OUTPUT:
+        Times               Array of event times as UNIX timestamps
+    """
+
+    # Calculate time of each event between the start and end time. If the body
+    # does not rise or set on a given day, move forward by one day
+    Times = []
+    Observer.horizon = Horizon
+    Observer.date    = Start
+    while Observer.date < End:
+        try:
+            Time = getattr(Observer,Event)(Body,use_center=Center)
+        except ephem.CircumpolarError:
+            Observer.date = Observer.date + 1
+            continue
+        Times.append((Time-unixEpoch)*86400)
+        Observer.date = Time + ephem.minute
+
+    # Return event times as UNIX timestamps
+    return np.array(Times)
+
+def lunationTimes(Function,Start,End):
+
+    """ Calculate the time of every full moon or new moon between the start
+    and end time
+
+    INPUTS:
+        Function            ephem function (next_full_moon/next_new_moon)
+        Start               Start time as ephem.Date
+        End                 End time as ephem.Date
+
+    OUTPUT:
+        Times               Array of event times as UNIX timestamps
+    """
+
+    # Calculate time of each full moon or new moon between the start and end
+    # time
+    Times = []
+    Time  = Function(Start)
+    while Time < End:
+        Times.append((Time-unixEpoch)*86400)
+        Time = Function(Time + ephem.minute)
+
+    # Return event times as UNIX timestamps
+    return np.array(Times)
+
+def generateEphemeris(Key):
+
+    """ Precompute the sun and moon ephemeris for the station location for the
+    specified year. The table extends a few days before the start of the year
+    and several weeks after the end of the year so that the next event can
+    always be found around the new year
+
+    INPUTS:
+        Key                 Ephemeris table key (Year,Latitude,Longitude)
+
+    OUTPUT:
+        Ephemeris           Dictionary containing arrays of event times as UNIX
+                            timestamps for each of Dawn, Sunrise, Sunset, Dusk,
+                            Moonrise, Moonset, FullMoon and NewMoon, together
+                            with the hourly moon phase samples PhaseTime and
+                            Phase
+    """
+
+    # Define ephemeris start and end time
+    Year, Latitude, Longitude = Key
+    Start = ephem.Date(datetime(Year,1,1))   - 3
+    End   = ephem.Date(datetime(Year+1,1,1)) + 45
+
+    # Calculate Dawn/Dusk, Sunrise/Sunset and Moonrise/Moonset times
+    Ephemeris = {}
+    for Event,(Body,Function,Horizon,Center) in ephemerisEvents.items():
+        Observer = stationObserver(Body,Latitude,Longitude)
+        Ephemeris[Event] = eventTimes(Observer,getattr(ephem,Body)(),Function,Horizon,Start,End,Center)
+
+    # Calculate full moon and new moon times
+    for Event,Function in lunationEvents.items():
+        Ephemeris[Event] = lunationTimes(Function,Start,End)
+
+    # Calculate hourly moon phase samples
+    Moon  = ephem.Moon()
+    Hours = np.arange(float(Start),float(End),1/24)
+    Phase = np.empty(len(Hours))
+    for ii,Hour in enumerate(Hours):
+        Moon.compute(ephem.Date(Hour))
+        Phase[ii] = Moon.phase
+    Ephemeris['PhaseTime'] = (Hours-unixEpoch)*86400
+    Ephemeris['Phase']     = Phase
+
+    # Return ephemeris table
+    return Ephemeris
+
+def getEphemeris(Time,Config):
+
+    """ Return the precomputed ephemeris table covering the specified time.
+    Missing tables are generated on a background thread, so that the ephemeris
+    calculation never blocks the caller. During December the table for the
+    following year is generated in the background so that it is available at
+    the new year
+
+    INPUTS:
+        Time                Required time as UNIX timestamp
+        Config              Station configuration
+
+    OUTPUT:
+        Ephemeris           Dictionary holding the ephemeris table. Set to None
+                            while the table is being generated
+    """
+
+    # Define ephemeris table keys for the required year, the previous year and
+    # the following year at the station location
+    UTC      = datetime.fromtimestamp(Time,pytz.utc)
+    Location = (Config['Station']['Latitude'],Config['Station']['Longitude'])
+    Key      = (UTC.year,)   + Location
+    Previous = (UTC.year-1,) + Location
+    Next     = (UTC.year+1,) + Location
+
+    # Extract ephemeris table for the required year. If the table is still
+    # being generated in the background, use the table for the previous year
+    # while it extends far enough into the required year. Remove tables for
+    # older years or other locations once the required table is available
+    with ephemerisLock:
+        Ephemeris = ephemerisData.get(Key)
+        if Ephemeris is None and ephemerisData.get(Previous) is not None:
+            Ephemeris = ephemerisData[Previous]
+            if Time >= min(Ephemeris['FullMoon'][-1],Ephemeris['NewMoon'][-1]):
+                Ephemeris = None
+        elif Ephemeris is not None:
+            for Old in [Old for Old in ephemerisData if Old[0] < Previous[0] or Old[1:] != Location]:
+                del ephemerisData[Old]
+
+    # Generate ephemeris table for required year in the background if it is
+    # not available, and for the following year during December
+    if Ephemeris is None:
+        startEphemeris(Key)
+    if UTC.month == 12:
+        startEphemeris(Next)
+
+    # Return ephemeris table
+    return Ephemeris
+
+def startEphemeris(Key):
+
+    """ Start generating the ephemeris table for the specified key on a
+    background thread, unless the table is available or already being
+    generated
+
+    INPUTS:
+        Key                 Ephemeris table key (Year,Latitude,Longitude)
+    """
+
+    # Flag ephemeris table as being generated and start background thread
+    with ephemerisLock:
+        if Key in ephemerisData:
+            return
+        ephemerisData[Key] = None
+    threading.Thread(target=storeEphemeris, args=(Key,), name='Ephemeris', daemon=True).start()
+
+def storeEphemeris(Key):
+
+    """ Generate and store the ephemeris table for the specified key. The
+    table is only made available once it is complete
+
+    INPUTS:
+        Key                 Ephemeris table key (Year,Latitude,Longitude)
+    """
+
+    # Generate and store ephemeris table. If the table cannot be generated,
+    # remove the flag so that it is requested again
+    try:
+        Ephemeris = generateEphemeris(Key)
+    except:
+        with ephemerisLock:
+            ephemerisData.pop(Key,None)
+        raise
+    with ephemerisLock:
+        ephemerisData[Key] = Ephemeris
+
+def nextEvent(Ephemeris,Event,Time,Config):
+
+    """ Return the time of the first event after the specified time. The
+    event is found in the ephemeris table, or calculated directly while the
+    table is being generated
+
+    INPUTS:
+        Ephemeris           Dictionary holding the ephemeris table. Set to None
+                            if the table is not available
+        Event               Required event (Dawn/Sunrise/Sunset/Dusk/Moonrise/
+                            Moonset/FullMoon/NewMoon)
+        Time                Search start time as datetime
+        Config              Station configuration
+
+    OUTPUT:
+        Event               Time of next event in UTC
+    """
+
+    # Find next event in ephemeris table using a binary search
+    if Ephemeris is not None:
+        Times = Ephemeris[Event]
+        Index = np.searchsorted(Times,Time.timestamp(),side='right')
+        return datetime.fromtimestamp(Times[Index],pytz.utc)
+
+    # Calculate next full moon or new moon directly
+    Start = ephem.Date(Time.astimezone(pytz.utc).replace(tzinfo=None))
+    if Event in lunationEvents:
+        return pytz.utc.localize(lunationEvents[Event](Start).datetime())
+
+    # Calculate next rising or setting directly
+    Body, Function, Horizon, Center = ephemerisEvents[Event]
+    Observer = stationObserver(Body,Config['Station']['Latitude'],Config['Station']['Longitude'])
+    Observer.horizon = Horizon
+    Observer.date    = Start
+    return pytz.utc.localize(getattr(Observer,Function)(getattr(ephem,Body)(),use_center=Center).datetime())
+
 def SunriseSunset(astroData,Config):
 
     """ Calculate sunrise and sunset times for the current day or tomorrow
@@ -33,50 +306,27 @@ def SunriseSunset(astroData,Config):
         astroData           Dictionary holding sunrise and sunset data
     """
 
-    # Define Sunrise/Sunset observer properties to match the United States Naval
-    # Observatory Astronomical Almanac
+    # Define station timezone
     Tz = pytz.timezone(Config['Station']['Timezone'])
-    Observer          = ephem.Observer()
-    Observer.pressure = 0
-    Observer.lat      = str(Config['Station']['Latitude'])
-    Observer.lon      = str(Config['Station']['Longitude'])
 
     # The code is initialising. Calculate sunset/sunrise times for current day
     # starting at midnight today in UTC
     if astroData['Sunset'][0] == '-':
-
-        # Set Observer time to midnight today in UTC
         UTC = datetime.now(pytz.utc)
-        Midnight = datetime(UTC.year,UTC.month,UTC.day,0,0,0)
-        Observer.date = Midnight.strftime('%Y/%m/%d %H:%M:%S')
+        Start = datetime(UTC.year,UTC.month,UTC.day,0,0,0,tzinfo=pytz.utc)
 
     # Dusk has passed. Calculate sunset/sunrise times for tomorrow starting at
     # time of last Dusk in UTC
     else:
+        Start = astroData['Dusk'][0].astimezone(pytz.utc) + timedelta(minutes=1)
 
-        # Set Observer time to last Sunset time in UTC
-        Dusk = astroData['Dusk'][0].astimezone(pytz.utc) + timedelta(minutes=1)
-        Observer.date = Dusk.strftime('%Y/%m/%d %H:%M:%S')
-
-    # Calculate Dawn time in UTC
-    Observer.horizon = '-6'
-    Dawn             = Observer.next_rising(ephem.Sun(), use_center=True)
-    Dawn             = pytz.utc.localize(Dawn.datetime().replace(second=0,microsecond=0))
-
-    # Calculate Sunrise time in UTC
-    Observer.horizon = '-0:34'
-    Sunrise          = Observer.next_rising(ephem.Sun())
-    Sunrise          = pytz.utc.localize(Sunrise.datetime().replace(second=0,microsecond=0))
-
-    # Calculate Sunset time in UTC
-    Observer.horizon = '-0:34'
-    Sunset           = Observer.next_setting(ephem.Sun())
-    Sunset           = pytz.utc.localize(Sunset.datetime().replace(second=0,microsecond=0))
-
-    # Calculate Dusk time in UTC
-    Observer.horizon = '-6'
-    Dusk             = Observer.next_setting(ephem.Sun(), use_center=True)
-    Dusk             = pytz.utc.localize(Dusk.datetime().replace(second=0,microsecond=0))
+    # Look up Dawn, Sunrise, Sunset and Dusk times in UTC from the precomputed
+    # ephemeris table
+    Ephemeris = getEphemeris(Start.timestamp(),Config)
+    Dawn      = nextEvent(Ephemeris,'Dawn',   Start,Config).replace(second=0,microsecond=0)
+    Sunrise   = nextEvent(Ephemeris,'Sunrise',Start,Config).replace(second=0,microsecond=0)
+    Sunset    = nextEvent(Ephemeris,'Sunset', Start,Config).replace(second=0,microsecond=0)
+    Dusk      = nextEvent(Ephemeris,'Dusk',   Start,Config).replace(second=0,microsecond=0)
 
     # Define Dawn/Dusk and Sunrise/Sunset times in Station timezone
     astroData['Dawn'][0]    = Dawn.astimezone(Tz)
@@ -114,55 +364,38 @@ def MoonriseMoonset(astroData,Config):
         astroData           Dictionary holding moonrise and moonset data
     """
 
-    # Define Moonrise/Moonset location properties
+    # Define station timezone
     Tz = pytz.timezone(Config['Station']['Timezone'])
-    Observer     = ephem.Observer()
-    Observer.lat = str(Config['Station']['Latitude'])
-    Observer.lon = str(Config['Station']['Longitude'])
 
     # The code is initialising. Calculate moonrise time for current day
     # starting at midnight today in UTC
     if astroData['Moonrise'][0] == '-':
-
-        # Set Observer time to midnight today in UTC
         UTC = datetime.now(pytz.utc)
-        Midnight = datetime(UTC.year,UTC.month,UTC.day,0,0,0)
-        Observer.date = Midnight.strftime('%Y/%m/%d %H:%M:%S')
+        Start = datetime(UTC.year,UTC.month,UTC.day,0,0,0,tzinfo=pytz.utc)
 
     # Moonset has passed. Calculate time of next moonrise starting at
     # time of last Moonset in UTC
     else:
+        Start = astroData['Moonset'][0].astimezone(pytz.utc) + timedelta(minutes=1)
 
-        # Set Observer time to last Moonset time in UTC
-        Moonset = astroData['Moonset'][0].astimezone(pytz.utc) + timedelta(minutes=1)
-        Observer.date = Moonset.strftime('%Y/%m/%d %H:%M:%S')
-
-    # Calculate Moonrise time in UTC
-    Moonrise = Observer.next_rising(ephem.Moon())
-    Moonrise = pytz.utc.localize(Moonrise.datetime().replace(second=0,microsecond=0))
-
-    # Define Moonrise time in Station timezone
+    # Look up Moonrise time in UTC from the precomputed ephemeris table and
+    # define Moonrise time in Station timezone
+    Ephemeris = getEphemeris(Start.timestamp(),Config)
+    Moonrise  = nextEvent(Ephemeris,'Moonrise',Start,Config).replace(second=0,microsecond=0)
     astroData['Moonrise'][0] = Moonrise.astimezone(Tz)
 
-    # Convert Moonrise time in Station timezone to Moonrise time in UTC
-    Moonrise = astroData['Moonrise'][0].astimezone(pytz.utc)
-    Observer.date = Moonrise.strftime('%Y/%m/%d %H:%M:%S')
-
-    # Calculate time of next Moonset starting at time of last Moonrise in UTC
-    Moonset = Observer.next_setting(ephem.Moon())
-    Moonset = pytz.utc.localize(Moonset.datetime().replace(second=0,microsecond=0))
-
-    # Define Moonset time in Station timezone
+    # Look up time of next Moonset starting at time of last Moonrise in UTC
+    # and define Moonset time in Station timezone
+    Moonset = nextEvent(Ephemeris,'Moonset',Moonrise,Config).replace(second=0,microsecond=0)
     astroData['Moonset'][0] = Moonset.astimezone(Tz)
 
-    # Calculate date of next full moon in UTC
-    Observer.date = datetime.now(pytz.utc).strftime('%Y/%m/%d')
-    FullMoon = ephem.next_full_moon(Observer.date)
-    FullMoon = pytz.utc.localize(FullMoon.datetime())
-
-    # Calculate date of next new moon in UTC
-    NewMoon = ephem.next_new_moon(Observer.date)
-    NewMoon = pytz.utc.localize(NewMoon.datetime())
+    # Look up date of next full moon and next new moon in UTC starting at
+    # midnight today in UTC
+    UTC       = datetime.now(pytz.utc)
+    Midnight  = datetime(UTC.year,UTC.month,UTC.day,0,0,0,tzinfo=pytz.utc)
+    Ephemeris = getEphemeris(Midnight.timestamp(),Config)
+    FullMoon  = nextEvent(Ephemeris,'FullMoon',Midnight,Config)
+    NewMoon   = nextEvent(Ephemeris,'NewMoon', Midnight,Config)
 
     # Define next new/full moon in station time zone
     astroData['FullMoon'] = [FullMoon.astimezone(Tz).strftime('%b %d'),FullMoon]
@@ -243,22 +476,19 @@ def Format(astroData,Config,Type):
     # Return dictionary holding sunrise/sunset and moonrise/moonset data
     return astroData
 
-def sunTransit(astroData, Config, *largs):
+def sunTransit(astroData, Config, Now):
 
     """ Calculate the sun transit between sunrise and sunset
 
     INPUTS:
         astroData           Dictionary holding sunrise and sunset data
         Config              Station configuration
+        Now                 Current time in station timezone
 
     OUTPUT:
         astroData           Dictionary holding moonrise and moonset data
     """
 
-    # Get current time in station time zone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
-    Now = datetime.now(pytz.utc).astimezone(Tz)
-
     # Calculate sun icon position on daytime/nightime bar
     secondsMidnight = (Now.replace(microsecond=0) - Now.replace(hour=0, minute=0, second=0, microsecond=0)).total_seconds()
     sunPosition     = secondsMidnight/86400
@@ -315,13 +545,14 @@ def sunTransit(astroData, Config, *largs):
     # Return dictionary containing sun transit data
     return astroData
 
-def moonPhase(astroData, Config, *largs):
+def moonPhase(astroData, Config, Now):
 
     """ Calculate the moon phase for the current time in station timezone
 
     INPUTS:
         astroData           Dictionary holding moonrise and moonset data
         Config              Station configuration
+        Now                 Current time in station timezone
 
     OUTPUT:
         astroData           Dictionary holding moonrise and moonset data
@@ -329,7 +560,7 @@ def moonPhase(astroData, Config, *largs):
 
     # Get current time in UTC
     Tz = pytz.timezone(Config['Station']['Timezone'])
-    UTC = datetime.now(pytz.utc)
+    UTC = Now.astimezone(pytz.utc)
 
     # Get date of next full moon in station time zone
     FullMoon = astroData['FullMoon'][1].astimezone(Tz)
@@ -337,36 +568,42 @@ def moonPhase(astroData, Config, *largs):
     # Get date of next new moon in station time zone
     NewMoon = astroData['NewMoon'][1].astimezone(Tz)
 
-    # Calculate phase of moon
-    Moon = ephem.Moon()
-    Moon.compute(UTC.strftime('%Y/%m/%d %H:%M:%S'))
+    # Interpolate phase of moon from the precomputed ephemeris table, or
+    # calculate phase of moon directly while the table is being generated
+    Ephemeris = getEphemeris(UTC.timestamp(),Config)
+    if Ephemeris is not None:
+        Phase = np.interp(UTC.timestamp(),Ephemeris['PhaseTime'],Ephemeris['Phase'])
+    else:
+        Moon = ephem.Moon()
+        Moon.compute(UTC.strftime('%Y/%m/%d %H:%M:%S'))
+        Phase = Moon.phase
 
     # Define Moon phase icon
     if FullMoon < NewMoon:
-        PhaseIcon = 'Waxing_' + '{:.0f}'.format(Moon.phase)
+        PhaseIcon = 'Waxing_' + '{:.0f}'.format(Phase)
     elif NewMoon < FullMoon:
-        PhaseIcon = 'Waning_' + '{:.0f}'.format(Moon.phase)
+        PhaseIcon = 'Waning_' + '{:.0f}'.format(Phase)
 
     # Define Moon phase text
     if astroData['NewMoon'] == '[color=ff8837ff]Today[/color]':
         PhaseTxt = 'New Moon'
     elif astroData['FullMoon'] == '[color=ff8837ff]Today[/color]':
         PhaseTxt = 'Full Moon'
-    elif FullMoon < NewMoon and Moon.phase < 49:
+    elif FullMoon < NewMoon and Phase < 49:
         PhaseTxt = 'Waxing crescent'
-    elif FullMoon < NewMoon and 49 <= Moon.phase <= 51:
+    elif FullMoon < NewMoon and 49 <= Phase <= 51:
         PhaseTxt = 'First Quarter'
-    elif FullMoon < NewMoon and Moon.phase > 51:
+    elif FullMoon < NewMoon and Phase > 51:
         PhaseTxt = 'Waxing gibbous'
-    elif NewMoon < FullMoon and Moon.phase > 51:
+    elif NewMoon < FullMoon and Phase > 51:
         PhaseTxt = 'Waning gibbous'
-    elif NewMoon < FullMoon and 49 <= Moon.phase <= 51:
+    elif NewMoon < FullMoon and 49 <= Phase <= 51:
         PhaseTxt = 'Last Quarter'
-    elif NewMoon < FullMoon and Moon.phase < 49:
+    elif NewMoon < FullMoon and Phase < 49:
         PhaseTxt = 'Waning crescent'
 
     # Define Moon phase illumination
-    Illumination = '{:.0f}'.format(Moon.phase)
+    Illumination = '{:.0f}'.format(Phase)
 
     # Define Kivy Label binds
     astroData['Phase'] = [PhaseIcon,PhaseTxt,Illumination]
@@ -552,6 +552,8 @@ def defaultConfig():
                                                           ('BarometerMax',   {'Type': 'dependent', 'Desc': 'maximum barometer pressure'}),
                                                           ('BarometerMin',   {'Type': 'dependent', 'Desc': 'minimum barometer pressure'}),
                                                           ('Timeout',        {'Type': 'default',   'Value': '20',    'Desc': 'Timeout in seconds for API requests'}),
+                                                          ('Connection',     {'Type': 'default',   'Value': 'Websocket', 'Desc': 'Observation source (Websocket/UDP)'}),
+                                                          ('APIPort',        {'Type': 'default',   'Value': '',      'Desc': 'Port for the local HTTP API (blank to disable)'}),
                                                           ('Hardware',       {'Type': 'default',   'Value': Hardware,'Desc': 'Hardware type'}),
                                                           ('Version',        {'Type': 'default',   'Value': Version, 'Desc': 'Version number'})])
 
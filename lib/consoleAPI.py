@@ -0,0 +1,303 @@
+""" Defines the local HTTP API required by the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+The local HTTP API lets other displays on the network read the current core
+state from the console instead of each querying the WeatherFlow servers. It
+is enabled by setting the APIPort key in the [System] section of
+wfpiconsole.ini and serves the following endpoints:
+
+    /api/observations       Current observations
+    /api/aggregates         Daily, monthly and yearly aggregates
+    /api/forecast           WeatherFlow and Sager Weathercaster forecasts
+    /api/astro              Sun and moon events
+    /api/status             Device status, system time and latest version
+    /api/state              All of the above
+    /api/events             Server-sent event stream of changes
+"""
+
+# Import required Python modules
+from http.server  import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import collections
+import threading
+import hashlib
+import copy
+import json
+
+# Define current observations, and observations that hold daily, monthly and
+# yearly aggregates
+observationKeys = ['rapidSpd','rapidDir','WindSpd','WindGust','WindDir','RainRate',
+                   'Radiation','UVIndex','outTemp','inTemp','Humidity','DewPoint',
+                   'Pres','PresTrend','FeelsLike','StrikeDeltaT','StrikeDist','StrikeFreq']
+aggregateKeys   = ['outTempMin','outTempMax','inTempMin','inTempMax','MaxPres','MinPres',
+                   'AvgWind','MaxGust','TodayRain','YesterdayRain','MonthRain','YearRain',
+                   'peakSun','Strikes3hr','StrikesToday','StrikesMonth','StrikesYear']
+
+# Define sections and keys of the core state served by each endpoint. Set
+# keys to None to serve every key displayed by the section
+apiEndpoints = {'/api/observations': [('Obs',     observationKeys)],
+                '/api/aggregates':   [('Obs',     aggregateKeys)],
+                '/api/forecast':     [('MetData', None), ('Sager',  None)],
+                '/api/astro':        [('Astro',   None)],
+                '/api/status':       [('Device',  None), ('System', None), ('Version', None)]}
+apiEndpoints['/api/state'] = [Entry for Endpoint in list(apiEndpoints) for Entry in apiEndpoints[Endpoint]]
+
+# Define number of changes retained for reconnecting event stream clients,
+# and interval between event stream keep-alive comments in seconds
+eventHistory   = 256
+eventKeepAlive = 15
+
+def encode(Data):
+
+    """ Encodes part of the core state as a JSON response body
+
+    INPUTS:
+        Data                Dictionary containing part of the core state
+
+    OUTPUT:
+        Body                JSON encoded response body
+    """
+
+    # Return JSON encoded response body. Values that cannot be encoded
+    # directly are converted to strings
+    return json.dumps(Data,default=str,separators=(',',':')).encode('utf8')
+
+class StateCache():
+
+    """ Copy-on-write snapshot of the core state shared with the HTTP server
+    threads. Changes are copied into a new snapshot on the event loop thread,
+    while response bodies and ETags are encoded on the HTTP server threads
+    when first requested and cached until the snapshot changes
+    """
+
+    def __init__(self,Core):
+
+        # Define keys served by each endpoint, and keys of each section that
+        # are published on the event stream
+        Sections = {Section.Name: Section for Section in Core.Sections}
+        self.Endpoints = {Endpoint: [(Name,Sections[Name].Keys if Keys is None else Keys) for Name,Keys in Entries]
+                          for Endpoint,Entries in apiEndpoints.items()}
+        self.Keys = collections.defaultdict(set)
+        for Name,Keys in self.Endpoints['/api/state']:
+            self.Keys[Name].update(Keys)
+
+        # Define initial snapshot, snapshot version, cached responses, change
+        # history and change condition
+        self.State     = copy.deepcopy(Core.snapshot())
+        self.Version   = 0
+        self.Responses = {}
+        self.History   = collections.deque(maxlen=eventHistory)
+        self.Condition = threading.Condition()
+
+        # Subscribe to changes in the core state
+        Core.subscribe(self.update)
+
+    def update(self,Name,Changes):
+
+        """ Copies changes in the core state into a new snapshot. Called on
+        the event loop thread
+
+        INPUTS:
+            Name                Name of changed section
+            Changes             Dictionary of changed keys and values
+        """
+
+        # Copy changed keys that are served by the local API
+        Changes = copy.deepcopy({Key: Value for Key,Value in Changes.items() if Key in self.Keys[Name]})
+        if not Changes:
+            return
+
+        # Replace snapshot, add changes to history, and wake event stream
+        # clients
+        with self.Condition:
+            State = dict(self.State)
+            State[Name] = dict(State[Name],**Changes)
+            self.State    = State
+            self.Version += 1
+            self.History.append((self.Version,Name,Changes))
+            self.Condition.notify_all()
+
+    def response(self,Endpoint):
+
+        """ Returns the response body and ETag for an endpoint
+
+        INPUTS:
+            Endpoint            Requested endpoint
+
+        OUTPUT:
+            Body                JSON encoded response body
+            ETag                Entity tag of response body
+        """
+
+        # Return cached response if snapshot is unchanged
+        with self.Condition:
+            State, Version = self.State, self.Version
+            Cached = self.Responses.get(Endpoint)
+        if Cached is not None and Cached[0] == Version:
+            return Cached[1], Cached[2]
+
+        # Encode response body from snapshot. The ETag is derived from the
+        # response body, so that it only changes when the served state changes
+        Data = {}
+        for Name,Keys in self.Endpoints[Endpoint]:
+            Data.setdefault(Name,{}).update({Key: State[Name][Key] for Key in Keys if Key in State[Name]})
+        Body = encode(Data)
+        ETag = '"' + hashlib.sha1(Body).hexdigest()[:16] + '"'
+
+        # Cache and return response
+        with self.Condition:
+            self.Responses[Endpoint] = (Version,Body,ETag)
+        return Body, ETag
+
+    def changes(self,Since,Timeout):
+
+        """ Waits for changes made after the specified snapshot version
+
+        INPUTS:
+            Since               Last snapshot version received by client
+            Timeout             Maximum time to wait in seconds
+
+        OUTPUT:
+            Changes             List of version, section name and changes. Set
+                                to None if the changes are no longer held in
+                                the change history
+        """
+
+        # Wait for snapshot to change
+        with self.Condition:
+            self.Condition.wait_for(lambda: self.Version > Since,Timeout)
+            if self.Version > Since and (not self.History or self.History[0][0] > Since + 1):
+                return None
+            return [Change for Change in self.History if Change[0] > Since]
+
+class APIHandler(BaseHTTPRequestHandler):
+
+    """ Serves the core state from the local HTTP API
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+
+        # Serve event stream or requested endpoint
+        Endpoint = urlparse(self.path).path.rstrip('/')
+        if Endpoint == '/api/events':
+            self.sendEvents()
+        elif Endpoint in apiEndpoints:
+            self.sendState(Endpoint)
+        else:
+            self.sendBody(404,encode({'error': 'Unknown endpoint'}))
+
+    def sendState(self,Endpoint):
+
+        # Return 304 Not Modified if client already holds the current
+        # response, otherwise return the current response
+        Body, ETag = self.server.Cache.response(Endpoint)
+        Match = [Tag.strip().replace('W/','',1) for Tag in self.headers.get('If-None-Match','').split(',')]
+        if ETag in Match or '*' in Match:
+            self.send_response(304)
+            self.send_header('ETag',ETag)
+            self.send_header('Access-Control-Allow-Origin','*')
+            self.end_headers()
+        else:
+            self.sendBody(200,Body,ETag)
+
+    def sendBody(self,Status,Body,ETag=None):
+
+        # Send response headers and body
+        self.send_response(Status)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(Body)))
+        self.send_header('Cache-Control','no-cache')
+        self.send_header('Access-Control-Allow-Origin','*')
+        if ETag is not None:
+            self.send_header('ETag',ETag)
+        self.end_headers()
+        self.wfile.write(Body)
+
+    def sendEvents(self):
+
+        # Send event stream headers
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type','text/event-stream')
+        self.send_header('Cache-Control','no-cache')
+        self.send_header('Connection','close')
+        self.send_header('Access-Control-Allow-Origin','*')
+        self.end_headers()
+
+        # Resume from the last event received by a reconnecting client, or
+        # start with a snapshot of the full state
+        Cache = self.server.Cache
+        try:
+            Since   = int(self.headers.get('Last-Event-ID'))
+            Changes = Cache.changes(Since,0) if Since <= Cache.Version else None
+        except:
+            Changes = None
+
+        # Send changes to client as they are made. A snapshot of the full
+        # state is sent whenever the client has fallen too far behind
+        try:
+            while True:
+                if Changes is None:
+                    with Cache.Condition:
+                        Since = Cache.Version
+                    Body, ETag = Cache.response('/api/state')
+                    self.wfile.write(b'id: ' + str(Since).encode() + b'\nevent: snapshot\ndata: ' + Body + b'\n\n')
+                elif not Changes:
+                    self.wfile.write(b': keep-alive\n\n')
+                else:
+                    for Version,Name,Data in Changes:
+                        self.wfile.write(b'id: ' + str(Version).encode() + b'\nevent: ' + Name.encode() + b'\ndata: ' + encode(Data) + b'\n\n')
+                    Since = Changes[-1][0]
+                self.wfile.flush()
+                Changes = Cache.changes(Since,eventKeepAlive)
+        except (BrokenPipeError,ConnectionResetError):
+            pass
+
+    def log_message(self,*largs):
+        pass
+
+class APIServer():
+
+    """ Local HTTP API serving the core state from a background thread, so
+    that requests never block the event loop or the display
+    """
+
+    def __init__(self,Core,Port,Host=''):
+
+        # Define state cache and HTTP server
+        self.Cache  = StateCache(Core)
+        self.Server = ThreadingHTTPServer((Host,Port),APIHandler)
+        self.Server.Cache = self.Cache
+        self.Server.daemon_threads = True
+
+    def start(self):
+
+        """ Starts serving requests on a background thread
+        """
+
+        # Start HTTP server
+        threading.Thread(target=self.Server.serve_forever, name='ConsoleAPI', daemon=True).start()
+
+    def close(self):
+
+        """ Stops the HTTP server
+        """
+
+        # Stop HTTP server
+        self.Server.shutdown()
+        self.Server.server_close()
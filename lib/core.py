@@ -0,0 +1,399 @@
+""" Defines the UI-agnostic core service required by the Raspberry Pi Python
+console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+The core service runs the observation pipeline, forecasts and astronomical
+calculations without a display. The Kivy front end in main.py subscribes to
+the core state, and the core can also be run as a headless daemon with:
+
+    python -m lib.core [--config wfpiconsole.ini] [--verbose]
+"""
+
+# Import required library modules
+from lib.eventLoop import Clock
+from lib import astronomical       as astro
+from lib import sager              as sagerForecast
+from lib import observationQueue
+from lib import consoleAPI
+from lib import stationContext
+from lib import scheduler
+from lib import websocket
+from lib import forecast
+from lib import station
+from lib import system
+from lib import udp
+
+# Import required modules
+from twisted.internet import reactor, ssl
+from functools        import partial
+from datetime         import time
+from optparse         import OptionParser
+import configparser
+import threading
+import copy
+
+# Define state displayed before the first update of each section of the core
+# state
+obsDefaults     = [('rapidSpd','--'),       ('rapidDir','----'),
+                   ('WindSpd','-----'),     ('WindGust','--'),      ('WindDir','---'),
+                   ('AvgWind','--'),        ('MaxGust','--'),       ('RainRate','---'),
+                   ('TodayRain','--'),      ('YesterdayRain','--'), ('MonthRain','--'),
+                   ('YearRain','--'),       ('Radiation','----'),   ('UVIndex','----'),
+                   ('peakSun','-----'),     ('outTemp','--'),       ('outTempMin','---'),
+                   ('outTempMax','---'),    ('inTemp','--'),        ('inTempMin','---'),
+                   ('inTempMax','---'),     ('Humidity','--'),      ('DewPoint','--'),
+                   ('Pres','---'),          ('MaxPres','---'),      ('MinPres','---'),
+                   ('PresTrend','----'),    ('FeelsLike','----'),   ('StrikeDeltaT','-----'),
+                   ('StrikeDist','--'),     ('StrikeFreq','----'),  ('Strikes3hr','-'),
+                   ('StrikesToday','-'),    ('StrikesMonth','-'),   ('StrikesYear','-')
+                  ]
+astroDefaults   = [('Sunrise',['-','-',0]), ('Sunset',['-','-',0]), ('Dawn',['-','-',0]),
+                   ('Dusk',['-','-',0]),    ('sunEvent','----'),    ('sunIcon',['-',0,0]),
+                   ('Moonrise',['-','-']), ('Moonset',['-','-']),   ('NewMoon','--'),
+                   ('FullMoon','--'),      ('Phase','---'),         ('Reformat','-'),
+                  ]
+metDataDefaults = [('Weather','Building'),  ('Temp','--'),          ('Precip','--'),
+                   ('WindSpd','--'),        ('WindDir','--'),       ('Valid','--')
+                  ]
+sagerDefaults   = [('Forecast','--'),       ('Issued','--')]
+systemDefaults  = [('Time','-'),            ('Date','-')]
+versionDefaults = [('Latest','-')]
+deviceDefaults  = [('tempestSampleTime','-'), ('tempestVoltage','-'), ('tempestStatus','-'),
+                   ('tempestObCount','-'),    ('skySampleTime','-'),  ('skyVoltage','-'),
+                   ('skyStatus','-'),         ('skyObCount','-'),     ('outAirSampleTime','-'),
+                   ('outAirVoltage','-'),     ('outAirStatus','-'),   ('outAirObCount','-'),
+                   ('inAirSampleTime','-'),   ('inAirVoltage','-'),   ('inAirStatus','-'),
+                   ('inAirObCount','-'),      ('stationStatus','-'),  ('hubFirmware','-')
+                  ]
+
+# Define interval at which the Twisted reactor runs the event loop in the
+# headless daemon in seconds
+pumpInterval = 0.05
+
+class Section(dict):
+
+    """ Dictionary holding one section of the core state. Changes made from
+    any thread are collected and published to each subscriber in a single
+    call on the event loop thread
+    """
+
+    def __init__(self,Name,Defaults):
+
+        # Define section name, default state, displayed keys, subscribers and
+        # changed keys
+        super(Section,self).__init__(copy.deepcopy(Defaults))
+        self.Name        = Name
+        self.Keys        = [Key for Key,Value in Defaults]
+        self.Subscribers = []
+        self.Changed     = set()
+        self.Lock        = threading.Lock()
+        self.Trigger     = Clock.create_trigger(self.publish)
+
+    def __setitem__(self,Key,Value):
+        super(Section,self).__setitem__(Key,Value)
+        self.changed([Key])
+
+    def update(self,*largs,**kwargs):
+        Changes = dict(*largs,**kwargs)
+        super(Section,self).update(Changes)
+        self.changed(Changes)
+
+    def changed(self,Keys):
+
+        """ Flags keys as changed and schedules publication of the changes.
+        Used directly when values held in the section are modified in place
+
+        INPUTS:
+            Keys                Changed keys
+        """
+
+        # Add keys to changed keys and schedule publication
+        with self.Lock:
+            self.Changed.update(Keys)
+        self.Trigger()
+
+    def subscribe(self,Callback):
+
+        """ Subscribes a callback to changes in the section
+
+        INPUTS:
+            Callback            Function called with the section name and a
+                                dictionary of changed keys and values
+        """
+
+        # Add callback to list of subscribers
+        self.Subscribers.append(Callback)
+
+    def publish(self,dt):
+
+        """ Publishes changed keys and values to each subscriber
+
+        INPUTS:
+            dt                  Time since publication was scheduled
+        """
+
+        # Extract changed keys and values
+        with self.Lock:
+            Keys, self.Changed = self.Changed, set()
+        Changes = {Key: self[Key] for Key in Keys if Key in self}
+
+        # Pass changes to each subscriber
+        if Changes:
+            for Callback in self.Subscribers:
+                Callback(self.Name,Changes)
+
+class DeviceStatus():
+
+    """ Holds the status of each device attached to the station, together with
+    the staleness timer for each device
+    """
+
+    def __init__(self,wfpiconsole,Device):
+        self.wfpiconsole = wfpiconsole
+        self.Device      = Device
+        self.staleTimers = {}
+
+    # Set device status from latest device message
+    def setDeviceStatus(self,Device,Msg):
+        station.setDeviceStatus(self.Device,self.staleTimers,Device,Msg,self.wfpiconsole)
+
+    # Get hub status from device status
+    def getStationStatus(self):
+        station.getHubStatus(self.Device,self.wfpiconsole)
+
+    # Get device observation count from rolling 24 hour observation counts
+    def getObservationCount(self):
+        station.getObservationCount(self.Device,self.wfpiconsole)
+
+class CoreService():
+
+    """ UI-agnostic console service that holds the core state, receives
+    websocket or UDP messages, and schedules the forecasts, astronomical
+    calculations and version checks. Every change to the core state is
+    published to subscribers on the event loop thread
+    """
+
+    def __init__(self,Config,Recorder=None):
+
+        # Define station configuration and context, message recorder, and
+        # API flags
+        self.config   = Config
+        self.Context  = stationContext.StationContext(Config)
+        self.Recorder = Recorder
+        self.flagAPI  = [1,1,1,1]
+
+        # Define core state
+        self.Obs      = Section('Obs',    obsDefaults)
+        self.Astro    = Section('Astro',  astroDefaults)
+        self.MetData  = Section('MetData',metDataDefaults)
+        self.Sager    = Section('Sager',  sagerDefaults)
+        self.System   = Section('System', systemDefaults)
+        self.Version  = Section('Version',versionDefaults)
+        self.Device   = Section('Device', deviceDefaults)
+        self.Sections = [self.Obs,self.Astro,self.MetData,self.Sager,self.System,self.Version,self.Device]
+
+        # Define websocket observation queue, rapid wind channel, device
+        # status, and one second scheduler
+        self.obsQueue  = observationQueue.ObservationQueue(self)
+        self.rapidWind = observationQueue.RapidWindChannel(self,websocket.rapidWind)
+        self.Station   = DeviceStatus(self,self.Device)
+        self.Scheduler = scheduler.TickScheduler(Config)
+        self.API       = None
+
+    def subscribe(self,Callback,Names=None):
+
+        """ Subscribes a callback to changes in the core state
+
+        INPUTS:
+            Callback            Function called with the section name and a
+                                dictionary of changed keys and values
+            Names               Names of sections to subscribe to. Set to None
+                                to subscribe to every section
+        """
+
+        # Subscribe callback to each required section
+        for Section in self.Sections:
+            if Names is None or Section.Name in Names:
+                Section.subscribe(Callback)
+
+    def snapshot(self):
+
+        """ Returns a copy of the current core state
+
+        OUTPUT:
+            Snapshot            Dictionary containing a copy of each section
+        """
+
+        # Return copy of each section
+        return {Section.Name: dict(Section) for Section in self.Sections}
+
+    def start(self):
+
+        """ Starts the core service
+        """
+
+        # Initialise real time clock
+        self.Scheduler.subscribe(partial(system.realtimeClock,self.System,self.config),'second')
+
+        # Initialise Sunrise and Sunset time, Moonrise and Moonset time, and
+        # WeatherFlow weather forecast. The last good forecast is loaded from
+        # disk while the latest forecast is downloaded in the background
+        self.UpdateSunriseSunset(None)
+        self.UpdateMoonriseMoonset(None)
+        forecast.Load(self.MetData,self.config)
+        forecast.Refresh(self.MetData,self.config)
+
+        # Generate Sager Weathercaster forecast
+        sagerForecast.Generate(self.Sager,self.config)
+
+        # Connect to the selected observation source
+        if self.config['System'].get('Connection','Websocket') == 'UDP':
+            self.UDPConnect()
+        else:
+            self.WebsocketConnect()
+
+        # Check for latest version
+        system.checkVersion(self.Version,self.config)
+
+        # Start local HTTP API if required
+        if self.config['System'].get('APIPort',''):
+            self.API = consoleAPI.APIServer(self,int(self.config['System']['APIPort']))
+            self.API.start()
+
+        # Schedule function calls. Sunrise/sunset and moonrise/moonset times
+        # are updated once dusk and moonset have passed, while the remaining
+        # methods are updated once per minute
+        self.Scheduler.subscribe(self.UpdateSunriseSunset,    lambda: self.Astro['Dusk'][0])
+        self.Scheduler.subscribe(self.UpdateMoonriseMoonset,  lambda: self.Astro['Moonset'][0])
+        self.Scheduler.subscribe(self.UpdateMethods,          'minute')
+        self.Scheduler.subscribe(partial(self.UpdateAstro,astro.sunTransit),'minute')
+        self.Scheduler.subscribe(partial(self.UpdateAstro,astro.moonPhase), 'minute')
+        self.Scheduler.start()
+
+    def updateContext(self):
+
+        """ Rebuilds the station context after the station configuration has
+        been changed
+        """
+
+        # Rebuild station context from updated user configuration
+        self.Context = stationContext.StationContext(self.config)
+
+    # CONNECT TO THE SECURE WEATHERFLOW WEBSOCKET SERVER
+    # --------------------------------------------------------------------------
+    def WebsocketConnect(self):
+        Server = 'wss://ws.weatherflow.com/swd/data?api_key=' + self.config['Keys']['WeatherFlow']
+        self._factory = websocket.WeatherFlowClientFactory(Server,self)
+        reactor.connectSSL('ws.weatherflow.com',443,self._factory,ssl.ClientContextFactory(),20)
+
+    # LISTEN FOR MESSAGES BROADCAST BY THE WEATHERFLOW HUB ON THE LOCAL NETWORK
+    # --------------------------------------------------------------------------
+    def UDPConnect(self):
+        self._factory  = None
+        self._listener = udp.HubListener(self)
+        reactor.listenUDP(udp.udpPort,self._listener)
+
+    # SEND MESSAGE TO THE WEATHERFLOW WEBSOCKET SERVER
+    # --------------------------------------------------------------------------
+    def WebsocketSendMessage(self,Message):
+        Message = Message.encode('utf8')
+        proto = self._factory._proto if self._factory else None
+        if Message and proto:
+            proto.sendMessage(Message)
+
+    # DECODE THE WEATHERFLOW WEBSOCKET MESSAGE
+    # --------------------------------------------------------------------------
+    def WebsocketDecodeMessage(self,Msg):
+
+        # Pass message to Websocket functions for processing
+        websocket.decodeMessage(Msg,self)
+
+    # UPDATE CORE SERVICE METHODS AT REQUIRED INTERVALS
+    # --------------------------------------------------------------------------
+    def UpdateMethods(self,Now):
+
+        # At 5 minutes past each hour, download a new forecast for the Station
+        # location
+        if Now.minute == 5:
+            forecast.Refresh(self.MetData,self.config)
+
+        # At the top of each hour update the on-screen forecast for the Station
+        # location
+        if 'Time' in self.MetData and (Now.hour > self.MetData['Time'].hour or Now.date() > self.MetData['Time'].date()):
+            forecast.Extract(self.MetData,self.config)
+            self.MetData['Time'] = Now
+
+        # At midnight, update Sunset, Sunrise, Moonrise and Moonset Kivy Labels
+        if self.Astro['Reformat'] and Now.replace(second=0).time() == time(0,0,0):
+            astro.Format(self.Astro,self.config,"Sun")
+            astro.Format(self.Astro,self.config,"Moon")
+            self.Astro.changed(self.Astro)
+
+    # UPDATE SUNRISE/SUNSET TIMES ONCE DUSK HAS PASSED
+    # --------------------------------------------------------------------------
+    def UpdateSunriseSunset(self,Now):
+        astro.SunriseSunset(self.Astro,self.config)
+        self.Astro.changed(self.Astro)
+
+    # UPDATE MOONRISE/MOONSET TIMES ONCE MOONSET HAS PASSED
+    # --------------------------------------------------------------------------
+    def UpdateMoonriseMoonset(self,Now):
+        astro.MoonriseMoonset(self.Astro,self.config)
+        self.Astro.changed(self.Astro)
+
+    # UPDATE SUN TRANSIT AND MOON PHASE
+    # --------------------------------------------------------------------------
+    def UpdateAstro(self,Function,Now):
+        Function(self.Astro,self.config,Now)
+        self.Astro.changed(self.Astro)
+
+def runDaemon(Config,Verbose=False):
+
+    """ Runs the core service as a headless daemon without a display
+
+    INPUTS:
+        Config              Station configuration
+        Verbose             Print every change to the core state
+    """
+
+    # Start core service
+    Core = CoreService(Config)
+    if Verbose:
+        Core.subscribe(lambda Name,Changes: print(Name,Changes))
+    Core.start()
+
+    # Run event loop from the Twisted reactor
+    def pump():
+        Delay = Clock.tick()
+        reactor.callLater(pumpInterval if Delay is None else min(Delay,pumpInterval),pump)
+    reactor.callWhenRunning(pump)
+    reactor.run()
+
+if __name__ == '__main__':
+
+    # Parse command line options
+    Parser = OptionParser(usage='python -m lib.core [options]')
+    Parser.add_option('--config', default='wfpiconsole.ini', metavar='FILE',
+                      help='station configuration file')
+    Parser.add_option('--verbose', action='store_true', default=False,
+                      help='print every change to the core state')
+    Options, Args = Parser.parse_args()
+
+    # Load station configuration and run headless daemon
+    Config = configparser.ConfigParser(allow_no_value=True)
+    Config.optionxform = str
+    if not Config.read(Options.config):
+        Parser.error('station configuration file not found: ' + Options.config)
+    runDaemon(Config,Options.verbose)
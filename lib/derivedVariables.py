@@ -17,6 +17,7 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 # Import required library modules
 from lib import derivedVariables as derive
+from lib import observationStore
 from lib import requestAPI
 
 # Import required Python modules
@@ -37,6 +38,146 @@ def CircularMean(angles):
     r = np.nanmean(np.exp(1j*angles))
     return np.angle(r, deg=True) % 360
 
+# ==============================================================================
+# DEFINE BOOTSTRAP FUNCTIONS
+# ==============================================================================
+def bootstrapData(Device,Windows,Config):
+
+    """ Downloads the data required to initialise the daily, monthly and yearly
+    aggregates for the specified device. Each time window is downloaded and
+    aggregated once, and then shared by all of the derived variable functions
+
+    INPUTS:
+        Device              Device ID
+        Windows             List of required time windows. Any of Today,
+                            Yesterday, Month, and Year
+        Config              Station configuration
+
+    OUTPUT:
+        apiData             Dictionary containing the aggregated statistics for
+                            each required daily time window, and the monthly
+                            and yearly totals from the local observation store.
+                            Set to None if the API call has failed
+    """
+
+    # Define API request for each daily time window
+    Request = {'Today':     requestAPI.weatherflow.Today,
+               'Yesterday': requestAPI.weatherflow.Yesterday}
+
+    # Update local observation store if monthly or yearly data is required.
+    # Only observations that are missing from the store are downloaded
+    if 'Month' in Windows or 'Year' in Windows:
+        Stored = observationStore.Sync(Device,Config)
+
+    # Download and aggregate data for each required daily time window, and
+    # extract monthly and yearly totals from the local observation store
+    apiData = {}
+    for Window in Windows:
+        if Window in ['Month','Year']:
+            if Stored:
+                apiData[Window] = observationStore.Totals(Device,Window,Config)
+            else:
+                apiData[Window] = None
+        else:
+            Data = Request[Window](Device,Config)
+            if requestAPI.weatherflow.verifyResponse(Data,'obs'):
+                apiData[Window] = aggregateData(Data.Columns(),Device,Config)
+            else:
+                apiData[Window] = None
+
+    # Return parsed data for each required time window
+    return apiData
+
+def aggregateData(Obs,Device,Config):
+
+    """ Calculates all of the statistics required to initialise the daily
+    aggregates in a single pass over the observations in an API response
+
+    INPUTS:
+        Obs                 Observations as typed NumPy array
+        Device              Device ID
+        Config              Station configuration
+
+    OUTPUT:
+        Stats               Dictionary containing fields:
+            MaxTemp             Maximum temperature and time        [C, s]
+            MinTemp             Minimum temperature and time        [C, s]
+            MaxPres             Maximum station pressure and time   [mb, s]
+            MinPres             Minimum station pressure and time   [mb, s]
+            Rain                Total rainfall                      [mm]
+            Strikes             Total number of lightning strikes   [Count]
+            AvgWind             Mean wind speed                     [m/s]
+            WindCount           Number of wind speed observations   [Count]
+            MaxGust             Maximum wind gust                   [m/s]
+            Radiation           Integrated solar radiation          [Wh/m^2]
+            Time                Observation times                   [s]
+    """
+
+    # Define observation indices based on device type
+    if Device == Config['Station']['TempestID']:
+        Ind = {'Temp': 7, 'Pres': 6, 'Rain': 12, 'Strikes': 15, 'Wind': 2, 'Gust': 3, 'Radiation': 11}
+    elif Device == Config['Station']['SkyID']:
+        Ind = {'Rain': 3, 'Wind': 5, 'Gust': 6, 'Radiation': 10}
+    else:
+        Ind = {'Temp': 2, 'Pres': 1, 'Strikes': 4}
+
+    # Extract observation times
+    Time = Obs[:,0]
+
+    # Define function to extract observation column. Return NaN column if
+    # field is not reported by device
+    def Column(Field):
+        if Field in Ind and Obs.shape[1] > Ind[Field]:
+            return Obs[:,Ind[Field]]
+        return np.full(len(Obs),NaN)
+
+    # Define function to return maximum or minimum value and time
+    def Extreme(Values,Function):
+        if np.all(np.isnan(Values)):
+            return [NaN,NaN]
+        Index = Function(Values)
+        return [float(Values[Index]),float(Time[Index])]
+
+    # Calculate all required statistics
+    Temp = Column('Temp')
+    Pres = Column('Pres')
+    Wind = Column('Wind')
+    Gust = Column('Gust')
+    windCount = int(np.count_nonzero(~np.isnan(Wind)))
+    Stats = {'MaxTemp':   Extreme(Temp,np.nanargmax),
+             'MinTemp':   Extreme(Temp,np.nanargmin),
+             'MaxPres':   Extreme(Pres,np.nanargmax),
+             'MinPres':   Extreme(Pres,np.nanargmin),
+             'Rain':      float(np.nansum(Column('Rain'))),
+             'Strikes':   int(np.nansum(Column('Strikes'))),
+             'AvgWind':   float(np.nansum(Wind))/windCount if windCount > 0 else NaN,
+             'WindCount': windCount,
+             'MaxGust':   Extreme(Gust,np.nanargmax)[0],
+             'Radiation': float(np.nansum(Column('Radiation')))/60,
+             'Time':      Time}
+
+    # Return aggregated statistics
+    return Stats
+
+def windowData(apiData,Window):
+
+    """ Returns the aggregated statistics for the specified time window
+
+    INPUTS:
+        apiData             Dictionary containing the aggregated statistics for
+                            each time window
+        Window              Required time window
+
+    OUTPUT:
+        Data                Aggregated statistics for the specified time window.
+                            Set to None if unavailable
+    """
+
+    # Return aggregated statistics if available
+    if apiData is not None and Window in apiData:
+        return apiData[Window]
+    return None
+
 # ==============================================================================
 # DEFINE DERIVED VARIABLE FUNCTIONS
 # ==============================================================================
@@ -65,7 +206,7 @@ def DewPoint(Temp,Humidity):
     # Return Dew Point
     return [DewPoint,'c']
 
-def FeelsLike(Temp,Humidity,windSpd,Config):
+def FeelsLike(Temp,Humidity,windSpd,Context):
 
     """ Calculate the Feels Like temperature from the temperature, relative
     humidity, and wind speed
@@ -74,7 +215,7 @@ def FeelsLike(Temp,Humidity,windSpd,Config):
         Temp                Temperature from AIR module         [C]
         Humidity            Relative humidity from AIR module   [%]
         windSpd             Wind speed from SKY module          [m/s]
-        Config              Station configuration
+        Context             Station context
 
     OUTPUT:
         FeelsLike           Feels Like temperature              [C]
@@ -107,7 +248,7 @@ def FeelsLike(Temp,Humidity,windSpd,Config):
         FeelsLike = Temp
 
     # Define 'FeelsLike' temperature cutoffs
-    Cutoffs = [float(item) for item in list(Config['FeelsLike'].values())]
+    Cutoffs = Context.FeelsLike
 
     # Define 'FeelsLike temperature text and icon
     Description = ['Feeling extremely cold', 'Feeling freezing cold', 'Feeling very cold',
@@ -116,7 +257,7 @@ def FeelsLike(Temp,Humidity,windSpd,Config):
     Icon =        ['ExtremelyCold', 'FreezingCold', 'VeryCold', 'Cold', 'Mild', 'Warm',
                    'Hot', 'VeryHot', 'ExtremelyHot', '-']
     if not math.isnan(FeelsLike[0]):
-        if Config['Units']['Temp'] == 'f':
+        if Context.Units['Temp'] == 'f':
             Ind = bisect.bisect(Cutoffs,FeelsLike[0]* 9/5 + 32)
         else:
             Ind = bisect.bisect(Cutoffs,FeelsLike[0])
@@ -126,65 +267,50 @@ def FeelsLike(Temp,Humidity,windSpd,Config):
     # Return 'Feels Like' temperature
     return [FeelsLike[0],FeelsLike[1],Description[Ind],Icon[Ind]]
 
-def SLP(Pres,Config):
+def SLP(Pres,Context):
 
     """ Calculate the sea level pressure from the station pressure
 
     INPUTS:
         Pres                Station pressure from AIR module    [mb]
-        Config              Station configuration
+        Context             Station context
 
     OUTPUT:
         SLP                 Sea level pressure                  [mb]
     """
 
-    # Extract required configuration variables
-    Elevation = Config['Station']['Elevation']
-    if Config['Station']['OutAirHeight']:
-        Height = Config['Station']['OutAirHeight']
-    elif Config['Station']['TempestHeight']:
-        Height = Config['Station']['TempestHeight']
-
     # Define required constants
     P0 = 1013.25
-    Rd = 287.05
-    GammaS = 0.0065
-    g = 9.80665
-    T0 = 288.15
-    Elev = float(Elevation) + float(Height)
 
     # Calculate and return sea level pressure
-    SLP = Pres[0] * (1 + ((P0/Pres[0])**((Rd*GammaS)/g)) * ((GammaS*Elev)/T0))**(g/(Rd*GammaS))
+    SLP = Pres[0] * (1 + ((P0/Pres[0])**Context.slpExponent) * Context.slpFactor)**Context.slpPower
     return [SLP,'mb','-' if math.isnan(SLP) else '{:.1f}'.format(SLP)]
 
-def SLPTrend(Pres,Time,Data3h,Config):
+def SLPTrend(Pres,Time,Data3h,Context):
 
     """ Calculate the pressure trend from the sea level pressure over the last
         three hours
 
     INPUTS:
         Pres                Current station pressure from AIR module    [mb]
-        Data3h              Data from previous 3 hours from AIR module
-        Config              Station configuration
+        Data3h              Rolling windows from previous 3 hours
+        Context             Station context
 
     OUTPUT:
         SLP                 Sea level pressure                          [mb]
     """
 
-    # Extract pressure observation from three hours ago based on device type.
-    # Return NaN for pressure trend if API call has failed
-    if requestAPI.weatherflow.verifyResponse(Data3h,'obs'):
-        Data3h = Data3h.json()['obs']
-        if Config['Station']['OutAirID']:
-            Pres3h = [Data3h[0][1] if Data3h[0][1] != None else NaN,'mb']
-        elif Config['Station']['TempestID']:
-            Pres3h = [Data3h[0][6] if Data3h[0][6] != None else NaN,'mb']
+    # Extract pressure observation from three hours ago. Return NaN for
+    # pressure trend if the rolling window does not yet span three hours
+    First = Data3h.Pres.first()
+    if First is not None and Time[0] - First[0] >= 3600*3 - 600:
+        Pres3h = [float(First[1]),'mb']
     else:
         Pres3h = [NaN,'mb']
 
     # Convert station pressure into sea level pressure
-    Pres   = SLP(Pres,  Config)
-    Pres3h = SLP(Pres3h,Config)
+    Pres   = SLP(Pres,  Context)
+    Pres3h = SLP(Pres3h,Context)
 
     # Calculate pressure trend
     Trend = (Pres[0] - Pres3h[0])/3
@@ -231,7 +357,7 @@ def SLPTrend(Pres,Time,Data3h,Config):
     # Return pressure trend
     return [Trend,'mb/hr',TrendTxt,Tendency]
 
-def SLPMaxMin(Time,Pres,maxPres,minPres,Device,Config,flagAPI):
+def SLPMaxMin(Time,Pres,maxPres,minPres,Device,Context,apiData):
 
     """ Calculate maximum and minimum pressure since midnight station time
 
@@ -241,8 +367,9 @@ def SLPMaxMin(Time,Pres,maxPres,minPres,Device,Config,flagAPI):
         maxPres             Current maximum pressure        [mb]
         minPres             Current minimum pressure        [mb]
         Device              Device ID
-        Config              Station configuration
-        flagAPI             Flag for required API calls
+        Context             Station context
+        apiData             Parsed API data required to initialise aggregates.
+                            Set to None if initialisation is not required
 
     OUTPUT:
         MaxTemp             Maximum pressure                [mb]
@@ -250,45 +377,34 @@ def SLPMaxMin(Time,Pres,maxPres,minPres,Device,Config,flagAPI):
     """
 
     # Calculate sea level pressure
-    SLP = derive.SLP(Pres,Config)
+    SLP = derive.SLP(Pres,Context)
 
     # Define current time in station timezone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
+    Tz = Context.Tz
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
     # Set time format based on user configuration
-    if Config['Display']['TimeFormat'] == '12 hr':
-        if Config['System']['Hardware'] != 'Other':
-            Format = '%-I:%M %P'
-        else:
-            Format = '%I:%M %p'
-    else:
-        Format = '%H:%M'
+    Format = Context.TimeFormat
 
-    # Code initialising. Download all data for current day using Weatherflow
-    # API and calculate daily maximum and minimum pressure
-    if maxPres[0] == '-' or flagAPI:
+    # Code initialising or websocket reconnected. Use data downloaded for
+    # current day from the Weatherflow API and calculate daily maximum and
+    # minimum pressure
+    if maxPres[0] == '-' or apiData is not None:
 
-        # Download pressure data from the current day
-        Data = requestAPI.weatherflow.Today(Device,Config)
+        # Extract pressure statistics from the current day
+        Data = derive.windowData(apiData,'Today')
 
         # Calculate maximum and minimum pressure. Return NaN if API call fails
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
+        if Data is not None and not math.isnan(Data['MaxPres'][0]):
 
-            # Extract data from API call based on device type
-            Data = Data.json()['obs']
-            Time = [item[0] for item in Data if item[0] != None]
-            if Config['Station']['OutAirID']:
-                Pres = [[item[1],'mb'] for item in Data if item[1] != None]
-            elif Config['Station']['TempestID']:
-                Pres = [[item[6],'mb'] for item in Data if item[6] != None]
-
-            # Calculate sea level pressure
-            SLP = [derive.SLP(P,Config) for P in Pres]
+            # Calculate maximum and minimum sea level pressure. Sea level
+            # pressure increases monotonically with station pressure
+            MaxSLP = derive.SLP([Data['MaxPres'][0],'mb'],Context)
+            MinSLP = derive.SLP([Data['MinPres'][0],'mb'],Context)
 
             # Define maximum and minimum pressure.
-            MaxPres = [max(SLP)[0],'mb',datetime.fromtimestamp(Time[SLP.index(max(SLP))],Tz).strftime(Format),max(SLP)[0],Now]
-            MinPres = [min(SLP)[0],'mb',datetime.fromtimestamp(Time[SLP.index(min(SLP))],Tz).strftime(Format),min(SLP)[0],Now]
+            MaxPres = [MaxSLP[0],'mb',datetime.fromtimestamp(Data['MaxPres'][1],Tz).strftime(Format),MaxSLP[0],Now]
+            MinPres = [MinSLP[0],'mb',datetime.fromtimestamp(Data['MinPres'][1],Tz).strftime(Format),MinSLP[0],Now]
         else:
             MaxPres = [NaN,'mb','-',NaN,Now]
             MinPres = [NaN,'mb','-',NaN,Now]
@@ -326,7 +442,7 @@ def SLPMaxMin(Time,Pres,maxPres,minPres,Device,Config,flagAPI):
     # Return required variables
     return MaxPres,MinPres
 
-def TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Config,flagAPI):
+def TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Context,apiData):
 
     """ Calculate maximum and minimum temperature for specified device since
         midnight station time
@@ -337,8 +453,9 @@ def TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Config,flagAPI):
         maxTemp             Current maximum outdoor temperature         [deg C]
         minTemp             Current minimum outdoor temperature         [deg C]
         Device              Device ID
-        Config              Station configuration
-        flagAPI             Flag for required API calls
+        Context             Station context
+        apiData             Parsed API data required to initialise aggregates.
+                            Set to None if initialisation is not required
 
     OUTPUT:
         MaxTemp             Maximum outdoor temperature                 [deg C]
@@ -346,40 +463,25 @@ def TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Config,flagAPI):
     """
 
     # Define current time in station timezone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
+    Tz = Context.Tz
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
     # Set time format based on user configuration
-    if Config['Display']['TimeFormat'] == '12 hr':
-        if Config['System']['Hardware'] != 'Other':
-            Format = '%-I:%M %P'
-        else:
-            Format = '%I:%M %p'
-    else:
-        Format = '%H:%M'
-
-    # Code initialising. Download all data for current day using Weatherflow
-    # API and calculate daily maximum and minimum temperature
-    if maxTemp[0] == '-' or flagAPI:
-
-        # Download temperature data from the current day
-        Data = requestAPI.weatherflow.Today(Device,Config)
-
-        # Calculate maximum and minimum temperature. Return NaN if API call
-        # fails
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-
-            # Extract data from API call based on specified device ID
-            Data = Data.json()['obs']
-            Time = [[item[0],'s'] for item in Data if item[0] != None]
-            if Device == Config['Station']['TempestID']:
-                Temp = [[item[7],'c'] for item in Data if item[7] != None]
-            elif Device in {Config['Station']['OutAirID'], Config['Station']['InAirID']}:
-                Temp = [[item[2],'c'] for item in Data if item[2] != None]
-
-            # Define maximum and minimum temperature and time
-            MaxTemp = [max(Temp)[0],'c',datetime.fromtimestamp(Time[Temp.index(max(Temp))][0],Tz).strftime(Format),max(Temp)[0],Now]
-            MinTemp = [min(Temp)[0],'c',datetime.fromtimestamp(Time[Temp.index(min(Temp))][0],Tz).strftime(Format),min(Temp)[0],Now]
+    Format = Context.TimeFormat
+
+    # Code initialising or websocket reconnected. Use data downloaded for
+    # current day from the Weatherflow API and calculate daily maximum and
+    # minimum temperature
+    if maxTemp[0] == '-' or apiData is not None:
+
+        # Extract temperature statistics from the current day
+        Data = derive.windowData(apiData,'Today')
+
+        # Define maximum and minimum temperature and time. Return NaN if API
+        # call fails
+        if Data is not None and not math.isnan(Data['MaxTemp'][0]):
+            MaxTemp = [Data['MaxTemp'][0],'c',datetime.fromtimestamp(Data['MaxTemp'][1],Tz).strftime(Format),Data['MaxTemp'][0],Now]
+            MinTemp = [Data['MinTemp'][0],'c',datetime.fromtimestamp(Data['MinTemp'][1],Tz).strftime(Format),Data['MinTemp'][0],Now]
         else:
             MaxTemp = [NaN,'c','-',NaN,Now]
             MinTemp = [NaN,'c','-',NaN,Now]
@@ -436,56 +538,43 @@ def StrikeDeltaT(StrikeTime):
     # Return time since and distance to last lightning strike
     return deltaT
 
-def StrikeFrequency(obTime,Data3h,Config):
+def StrikeFrequency(obTime,Data3h):
 
     """ Calculate lightning strike frequency over the previous 10 minutes and
         three hours
 
     INPUTS:
         obTime              Time of latest observation
-        Data3h              Data from previous 3 hours from AIR module
-        Config              Station configuration
+        Data3h              Rolling windows from previous 3 hours
 
     OUTPUT:
         strikeFrequency     Strike frequency over the previous 10       [Count]
                             minutes and three hours
     """
 
-    # Extract lightning strike count over the last three hours. Return NaN for
-    # strikeFrequency if API call has failed
-    if requestAPI.weatherflow.verifyResponse(Data3h,'obs'):
-        Data3h  = Data3h.json()['obs']
-        Time    = [item[0] for item in Data3h if item[0] != None]
-        if Config['Station']['OutAirID']:
-            Count3h = [item[4] for item in Data3h if item[4] != None]
-        elif Config['Station']['TempestID']:
-            Count3h = [item[15] for item in Data3h if item[15] != None]
-    else:
+    # Extract lightning strike count over the last 10 minutes and three hours.
+    # Return NaN for strikeFrequency if no observations are available
+    Count10m = Data3h.Strikes['10m']
+    Count3h  = Data3h.Strikes['3h']
+    if Count3h.Count == 0:
         return [NaN,'/min',NaN,'/min']
 
-    # Convert lists to Numpy arrays
-    Count3h = np.array(Count3h,dtype=np.float32)
-    Time    = np.array(Time,   dtype=np.float64)
-
     # Calculate average strike frequency over the last three hours
-    activeStrikes = Count3h[Count3h>0]
-    if len(activeStrikes) > 0:
-        strikeFrequency3h = [np.nanmean(activeStrikes),'/min']
+    if Count3h.Active > 0:
+        strikeFrequency3h = [Count3h.Sum/Count3h.Active,'/min']
     else:
-        strikeFrequency3h = [np.nanmean([0]),'/min']
+        strikeFrequency3h = [0.0,'/min']
 
     # Calculate average strike frequency over the last 10 minutes
-    Count10m = Count3h[np.where(Time >= obTime[0]-600)]
-    activeStrikes = Count10m[Count10m>0]
-    if len(activeStrikes) > 0:
-        strikeFrequency10m = [np.nanmean(activeStrikes),'/min']
+    if Count10m.Active > 0:
+        strikeFrequency10m = [Count10m.Sum/Count10m.Active,'/min']
     else:
-        strikeFrequency10m = [np.nanmean([0]),'/min']
+        strikeFrequency10m = [0.0,'/min']
 
     # Return strikeFrequency for last 10 minutes and last three hours
     return strikeFrequency10m + strikeFrequency3h
 
-def StrikeCount(Count,strikeCount,Device,Config,flagAPI):
+def StrikeCount(Count,strikeCount,Device,Context,apiData):
 
     """ Calculate the number of lightning strikes for the last day/month/year
 
@@ -496,8 +585,9 @@ def StrikeCount(Count,strikeCount,Device,Config,flagAPI):
             Yesterday           Number of lightning strikes in last month   [Count]
             Year                Number of lightning strikes in last year    [Count]
         Device              Device ID
-        Config              Station configuration
-        flagAPI             Flag for required API calls
+        Context             Station context
+        apiData             Parsed API data required to initialise aggregates.
+                            Set to None if initialisation is not required
 
     OUTPUT:
         strikeCount         Dictionary containing fields:
@@ -507,44 +597,35 @@ def StrikeCount(Count,strikeCount,Device,Config,flagAPI):
     """
 
     # Define current time in station timezone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
+    Tz = Context.Tz
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
-    # Code initialising. Download all data for current day using Weatherflow
-    # API and calculate total daily lightning strikes
-    if strikeCount['Today'][0] == '-' or flagAPI:
+    # Code initialising or websocket reconnected. Use data downloaded for
+    # current day from the Weatherflow API and calculate total daily lightning
+    # strikes
+    if strikeCount['Today'][0] == '-' or apiData is not None:
 
-        # Download lightning strike data from the current day
-        Data = requestAPI.weatherflow.Today(Device,Config)
+        # Extract lightning strike total for the current day
+        Data = derive.windowData(apiData,'Today')
 
-        # Calculate daily lightning strike total. Return NaN if API call has
+        # Define daily lightning strike total. Return NaN if API call has
         # failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            Data = Data.json()['obs']
-            if Config['Station']['OutAirID']:
-                Strikes = [item[4] for item in Data if item[4] != None]
-            elif Config['Station']['TempestID']:
-                Strikes = [item[15] for item in Data if item[15] != None]
-            todayStrikes = [sum(x for x in Strikes),'count',sum(x for x in Strikes),Now]
+        if Data is not None:
+            todayStrikes = [Data['Strikes'],'count',Data['Strikes'],Now]
         else:
             todayStrikes = [NaN,'count',NaN,Now]
 
-    # Code initialising. Download all data for current month using
-    # Weatherflow API and calculate total monthly lightning strikes
-    if strikeCount['Month'][0] == '-' or flagAPI:
-
-        # Download lightning strike data from the current month
-        Data = requestAPI.weatherflow.Month(Device,Config)
-
-        # Calculate monthly lightning strike total. Return NaN if API call
-        # has failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            Data = Data.json()['obs']
-            if Config['Station']['OutAirID']:
-                Strikes = [item[4] for item in Data if item[4] != None]
-            elif Config['Station']['TempestID']:
-                Strikes = [item[15] for item in Data if item[15] != None]
-            monthStrikes = [sum(x for x in Strikes),'count',sum(x for x in Strikes),Now]
+    # Code initialising or websocket reconnected. Use data from the local
+    # observation store to define total monthly lightning strikes
+    if strikeCount['Month'][0] == '-' or apiData is not None:
+
+        # Extract lightning strike total for the current month
+        Data = derive.windowData(apiData,'Month')
+
+        # Define monthly lightning strike total. Return NaN if API call has
+        # failed
+        if Data is not None:
+            monthStrikes = [Data['Strikes'],'count',Data['Strikes'],Now]
         else:
             monthStrikes = [NaN,'count',NaN,Now]
 
@@ -554,26 +635,17 @@ def StrikeCount(Count,strikeCount,Device,Config,flagAPI):
             monthStrikes[0] += todayStrikes[0]
             monthStrikes[2] += todayStrikes[2]
 
-    # Code initialising. Download all data for current year using
-    # Weatherflow API and calculate total yearly lightning strikes
-    if strikeCount['Year'][0] == '-' or flagAPI:
-
-        # Download lightning strike data from the current year
-        Data = requestAPI.weatherflow.Year(Device,Config)
-
-        # Calculate yearly lightning strikes total. Return NaN if API call
-        # has failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            bucketStep = Data.json()['bucket_step_minutes']
-            Data = Data.json()['obs']
-            if Config['Station']['OutAirID']:
-                Strikes = [item[4] for item in Data if item[4] != None]
-            elif Config['Station']['TempestID']:
-                if bucketStep == 1440:
-                    Strikes = [item[24] for item in Data if item[24] != None]
-                else:
-                    Strikes = [item[15] for item in Data if item[15] != None]
-            yearStrikes = [sum(x for x in Strikes),'count',sum(x for x in Strikes),Now]
+    # Code initialising or websocket reconnected. Use data from the local
+    # observation store to define total yearly lightning strikes
+    if strikeCount['Year'][0] == '-' or apiData is not None:
+
+        # Extract lightning strike total for the current year
+        Data = derive.windowData(apiData,'Year')
+
+        # Define yearly lightning strikes total. Return NaN if API call has
+        # failed
+        if Data is not None:
+            yearStrikes = [Data['Strikes'],'count',Data['Strikes'],Now]
         else:
             yearStrikes = [NaN,'count',NaN,Now]
 
@@ -652,7 +724,7 @@ def RainRate(rainAccum):
     # Return instantaneous rain rate and text
     return [Rate,'mm/hr',RateText,Rate]
 
-def RainAccumulation(Rain,rainAccum,Device,Config,flagAPI):
+def RainAccumulation(Rain,rainAccum,Device,Context,apiData):
 
     """ Calculate the rain accumulation for today/yesterday/month/year
 
@@ -664,8 +736,9 @@ def RainAccumulation(Rain,rainAccum,Device,Config,flagAPI):
             Month               Rain accumulation for the current month     [mm]
             Year                Rain accumulation for the current year      [mm]
         Device              Device ID
-        Config              Station configuration
-        flagAPI             Flag for required API calls
+        Context             Station context
+        apiData             Parsed API data required to initialise aggregates.
+                            Set to None if initialisation is not required
 
     OUTPUT:
         rainAccum           Dictionary containing fields:
@@ -676,62 +749,45 @@ def RainAccumulation(Rain,rainAccum,Device,Config,flagAPI):
     """
 
     # Define current time in station timezone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
+    Tz = Context.Tz
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
-    # Code initialising. Download all data for current day using Weatherflow
-    # API and calculate total daily rainfall
-    if rainAccum['Today'][0] == '-' or flagAPI:
-
-        # Download rainfall data for current day
-        Data = requestAPI.weatherflow.Today(Device,Config)
-
-        # Calculate daily rainfall total. Return NaN if API call has failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            Data = Data.json()['obs']
-            if Config['Station']['SkyID']:
-                Rain = [item[3] for item in Data if item[3] != None]
-            elif Config['Station']['TempestID']:
-                Rain = [item[12] for item in Data if item[12] != None]
-            TodayRain = [sum(x for x in Rain),'mm',sum(x for x in Rain),Now]
+    # Code initialising or websocket reconnected. Use data downloaded for
+    # current day from the Weatherflow API and calculate total daily rainfall
+    if rainAccum['Today'][0] == '-' or apiData is not None:
+
+        # Extract rainfall total for current day
+        Data = derive.windowData(apiData,'Today')
+
+        # Define daily rainfall total. Return NaN if API call has failed
+        if Data is not None:
+            TodayRain = [Data['Rain'],'mm',Data['Rain'],Now]
         else:
             TodayRain = [NaN,'mm',NaN,Now]
 
-    # Code initialising. Download all data for yesterday using Weatherflow
-    # API and calculate total daily rainfall
-    if rainAccum['Yesterday'][0] == '-' or flagAPI:
+    # Code initialising or websocket reconnected. Use data downloaded for
+    # yesterday from the Weatherflow API and calculate total daily rainfall
+    if rainAccum['Yesterday'][0] == '-' or apiData is not None:
 
-        # Download rainfall data for yesterday
-        Data = requestAPI.weatherflow.Yesterday(Device,Config)
+        # Extract rainfall total for yesterday
+        Data = derive.windowData(apiData,'Yesterday')
 
-        # Calculate yesterday rainfall total. Return NaN if API call has
-        # failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            Data = Data.json()['obs']
-            if Config['Station']['SkyID']:
-                Rain = [item[3] for item in Data if item[3] != None]
-            elif Config['Station']['TempestID']:
-                Rain = [item[12] for item in Data if item[12] != None]
-            YesterdayRain = [sum(x for x in Rain),'mm',sum(x for x in Rain),Now]
+        # Define yesterday rainfall total. Return NaN if API call has failed
+        if Data is not None:
+            YesterdayRain = [Data['Rain'],'mm',Data['Rain'],Now]
         else:
             YesterdayRain = [NaN,'mm',NaN,Now]
 
-    # Code initialising. Download all data for current month using
-    # Weatherflow API and calculate total monthly rainfall
-    if rainAccum['Month'][0] == '-' or flagAPI:
+    # Code initialising or websocket reconnected. Use data from the local
+    # observation store to define total monthly rainfall
+    if rainAccum['Month'][0] == '-' or apiData is not None:
 
-        # Download rainfall data for last Month
-        Data = requestAPI.weatherflow.Month(Device,Config)
+        # Extract rainfall total for the current month
+        Data = derive.windowData(apiData,'Month')
 
-        # Calculate monthly rainfall total. Return NaN if API call has
-        # failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            Data = Data.json()['obs']
-            if Config['Station']['SkyID']:
-                Rain = [item[3] for item in Data if item[3] != None]
-            elif Config['Station']['TempestID']:
-                Rain = [item[12] for item in Data if item[12] != None]
-            MonthRain = [sum(x for x in Rain),'mm',sum(x for x in Rain),Now]
+        # Define monthly rainfall total. Return NaN if API call has failed
+        if Data is not None:
+            MonthRain = [Data['Rain'],'mm',Data['Rain'],Now]
         else:
             MonthRain = [NaN,'mm',NaN,Now]
 
@@ -740,25 +796,16 @@ def RainAccumulation(Rain,rainAccum,Device,Config,flagAPI):
             MonthRain[0] += TodayRain[0]
             MonthRain[2] += TodayRain[2]
 
-    # Code initialising. Download all data for current year using
-    # Weatherflow API and calculate total yearly rainfall
-    if rainAccum['Year'][0] == '-' or flagAPI:
-
-        # Download rainfall data for last Month
-        Data = requestAPI.weatherflow.Year(Device,Config)
-
-        # Calculate yearly rainfall total. Return NaN if API call has failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            bucketStep = Data.json()['bucket_step_minutes']
-            Data = Data.json()['obs']
-            if Config['Station']['SkyID']:
-                Rain = [item[3] for item in Data if item[3] != None]
-            elif Config['Station']['TempestID']:
-                if bucketStep == 1440:
-                    Rain = [item[28] for item in Data if item[28] != None]
-                else:
-                    Rain = [item[12] for item in Data if item[12] != None]
-            YearRain = [sum(x for x in Rain),'mm',sum(x for x in Rain),Now]
+    # Code initialising or websocket reconnected. Use data from the local
+    # observation store to define total yearly rainfall
+    if rainAccum['Year'][0] == '-' or apiData is not None:
+
+        # Extract rainfall total for the current year
+        Data = derive.windowData(apiData,'Year')
+
+        # Define yearly rainfall total. Return NaN if API call has failed
+        if Data is not None:
+            YearRain = [Data['Rain'],'mm',Data['Rain'],Now]
         else:
             YearRain = [NaN,'mm',NaN,Now]
 
@@ -804,7 +851,7 @@ def RainAccumulation(Rain,rainAccum,Device,Config,flagAPI):
     # Return Daily, Monthly, and Yearly rainfall accumulation totals
     return {'Today':TodayRain, 'Yesterday':YesterdayRain, 'Month':MonthRain, 'Year':YearRain}
 
-def MeanWindSpeed(windSpd,avgWind,Device,Config,flagAPI):
+def MeanWindSpeed(windSpd,avgWind,Device,Context,apiData):
 
     """ Calculate the average windspeed since midnight station time
 
@@ -812,34 +859,28 @@ def MeanWindSpeed(windSpd,avgWind,Device,Config,flagAPI):
         windSpd             Current wind speed                             [m/s]
         avgWind             Current average wind speed since midnight      [m/s]
         Device              Device ID
-        Config              Station configuration
-        flagAPI             Flag for required API calls
+        Context             Station context
+        apiData             Parsed API data required to initialise aggregates.
+                            Set to None if initialisation is not required
 
     OUTPUT:
         AvgWind             Average wind speed since midnight              [m/s]
     """
 
     # Define current time in station timezone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
+    Tz = Context.Tz
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
-    # Code initialising. Download all data for current day using Weatherflow API
-    # and calculate daily mean windspeed
-    if avgWind[0] == '-' or flagAPI:
-
-        # Download windspeed data for current day
-        Data = requestAPI.weatherflow.Today(Device,Config)
-
-        # Calculate daily averaged wind speed. Return NaN if API call has failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            Data = Data.json()['obs']
-            if Config['Station']['SkyID']:
-                windSpd = [item[5] for item in Data if item[5] != None]
-            elif Config['Station']['TempestID']:
-                windSpd = [item[2] for item in Data if item[2] != None]
-            Sum = sum(x for x in windSpd)
-            Length = len(windSpd)
-            AvgWind = [Sum/Length,'mps',Sum/Length,Length,Now]
+    # Code initialising or websocket reconnected. Use data downloaded for
+    # current day from the Weatherflow API and calculate daily mean windspeed
+    if avgWind[0] == '-' or apiData is not None:
+
+        # Extract windspeed statistics for current day
+        Data = derive.windowData(apiData,'Today')
+
+        # Define daily averaged wind speed. Return NaN if API call has failed
+        if Data is not None:
+            AvgWind = [Data['AvgWind'],'mps',Data['AvgWind'],Data['WindCount'],Now]
         else:
             AvgWind = [NaN,'mps',NaN,NaN,Now]
 
@@ -864,7 +905,7 @@ def MeanWindSpeed(windSpd,avgWind,Device,Config,flagAPI):
     # Return daily averaged wind speed
     return [updatedAvg,'mps',updatedAvg,Length,Now]
 
-def MaxWindGust(windGust,maxGust,Device,Config,flagAPI):
+def MaxWindGust(windGust,maxGust,Device,Context,apiData):
 
     """ Calculate the maximum wind gust since midnight station time
 
@@ -872,32 +913,28 @@ def MaxWindGust(windGust,maxGust,Device,Config,flagAPI):
         windGust            Current wind gust                              [m/s]
         maxGust             Current maximum wind gust since midnight       [m/s]
         Device              Device ID
-        Config              Station configuration
-        flagAPI             Flag for required API calls
+        Context             Station context
+        apiData             Parsed API data required to initialise aggregates.
+                            Set to None if initialisation is not required
 
     OUTPUT:
         maxGust             Maximum wind gust since midnight               [m/s]
     """
 
     # Define current time in station timezone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
+    Tz = Context.Tz
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
-    # Code initialising. Download all data for current day using Weatherflow
-    # API and calculate daily maximum wind gust
-    if maxGust == '--' or flagAPI:
-
-        # Download windspeed data for current day
-        Data = requestAPI.weatherflow.Today(Device,Config)
-
-        # Calculate daily maximum wind gust. Return NaN if API call has failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            Data = Data.json()['obs']
-            if Config['Station']['SkyID']:
-                windGust = [item[6] for item in Data if item[6] != None]
-            elif Config['Station']['TempestID']:
-                windGust = [item[3] for item in Data if item[3] != None]
-            maxGust  = [max(x for x in windGust),'mps',max(x for x in windGust),Now]
+    # Code initialising or websocket reconnected. Use data downloaded for
+    # current day from the Weatherflow API and calculate daily maximum wind gust
+    if maxGust == '--' or apiData is not None:
+
+        # Extract windspeed statistics for current day
+        Data = derive.windowData(apiData,'Today')
+
+        # Define daily maximum wind gust. Return NaN if API call has failed
+        if Data is not None:
+            maxGust = [Data['MaxGust'],'mps',Data['MaxGust'],Now]
         else:
             maxGust = [NaN,'mps',NaN,Now]
 
@@ -1026,7 +1063,7 @@ def UVIndex(uvLevel):
     # Return UV Index icon
     return uvIndex
 
-def peakSunHours(Radiation,peakSun,Astro,Device,Config,flagAPI):
+def peakSunHours(Radiation,peakSun,Astro,Device,Context,apiData):
 
     """ Calculate peak sun hours since midnight and daily solar potential
 
@@ -1035,32 +1072,28 @@ def peakSunHours(Radiation,peakSun,Astro,Device,Config,flagAPI):
         maxGust             Current peak sun hours since midnight          [hours]
         Astro               Dictionary containing sunrise/sunset info
         Device              Device ID
-        Config              Station configuration
-        flagAPI             Flag for required API calls
+        Context             Station context
+        apiData             Parsed API data required to initialise aggregates.
+                            Set to None if initialisation is not required
 
     OUTPUT:
         peakSun             Peak sun hours since midnight and solar potential
     """
 
     # Define current time in station timezone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
+    Tz = Context.Tz
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
-    # Code initialising. Download all data for current day using Weatherflow
-    # API and calculate Peak Sun Hours
-    if peakSun[0] == '-' or flagAPI:
+    # Code initialising or websocket reconnected. Use data downloaded for
+    # current day from the Weatherflow API and calculate Peak Sun Hours
+    if peakSun[0] == '-' or apiData is not None:
 
-        # Download solar radiation data for current day
-        Data = requestAPI.weatherflow.Today(Device,Config)
+        # Extract integrated solar radiation for current day
+        Data = derive.windowData(apiData,'Today')
 
         # Calculate Peak Sun Hours. Return NaN if API call has failed
-        if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-            Data = Data.json()['obs']
-            if Config['Station']['SkyID']:
-                Radiation = [item[10] for item in Data if item[10] != None]
-            elif Config['Station']['TempestID']:
-                Radiation = [item[11] for item in Data if item[11] != None]
-            watthrs = sum([item*1/60 for item in Radiation])
+        if Data is not None:
+            watthrs = Data['Radiation']
             peakSun = [watthrs/1000,'hrs',watthrs,Now]
         else:
             peakSun = [NaN,'hrs',NaN,Now]
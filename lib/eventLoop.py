@@ -0,0 +1,232 @@
+""" Defines the event loop required by the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required Python modules
+import functools
+import threading
+import traceback
+import itertools
+import heapq
+import time
+
+class Event():
+
+    """ Scheduled callback returned by the event loop. The callback is passed
+    the time in seconds since it was scheduled or last called
+    """
+
+    __slots__ = ('Callback','Time','Last','Interval','Cancelled')
+
+    def __init__(self,Callback,Time,Interval=None):
+        self.Callback  = Callback
+        self.Time      = Time
+        self.Last      = time.monotonic()
+        self.Interval  = Interval
+        self.Cancelled = False
+
+    def cancel(self):
+
+        """ Cancels the scheduled callback
+        """
+
+        # Flag event as cancelled
+        self.Cancelled = True
+
+class Trigger():
+
+    """ Callable that schedules its callback once. Repeated calls made before
+    the callback has run are coalesced into a single call
+    """
+
+    def __init__(self,Loop,Callback,Timeout=0):
+        self.Loop     = Loop
+        self.Callback = Callback
+        self.Timeout  = Timeout
+        self.Event    = None
+        self.Lock     = threading.Lock()
+
+    def __call__(self,*largs):
+
+        # Schedule callback unless it is already scheduled
+        with self.Lock:
+            if self.Event is None:
+                self.Event = self.Loop.schedule_once(self.fire,self.Timeout)
+
+    def fire(self,dt):
+
+        # Clear scheduled event and run callback
+        with self.Lock:
+            self.Event = None
+        self.Callback(dt)
+
+    def cancel(self):
+
+        # Cancel scheduled callback
+        with self.Lock:
+            if self.Event is not None:
+                self.Event.cancel()
+                self.Event = None
+
+class EventLoop():
+
+    """ UI-agnostic event loop that runs scheduled callbacks on a single
+    thread. Callbacks can be scheduled from any thread. The loop is driven
+    either by the Kivy clock on every frame, by the Twisted reactor in the
+    headless daemon, or by calling run() directly
+    """
+
+    def __init__(self):
+
+        # Define queue of scheduled events, sequence counter, and wake
+        # condition
+        self.Queue    = []
+        self.Sequence = itertools.count()
+        self.Lock     = threading.Lock()
+        self.Wake     = threading.Condition(self.Lock)
+        self.Running  = False
+
+    def schedule_once(self,Callback,Timeout=0):
+
+        """ Schedules a callback to run once after the specified timeout
+
+        INPUTS:
+            Callback            Function called with the elapsed time
+            Timeout             Delay before callback is run in seconds
+
+        OUTPUT:
+            Event               Scheduled event
+        """
+
+        # Add event to queue and return event
+        return self.add(Event(Callback,time.monotonic() + max(Timeout or 0,0)))
+
+    def schedule_interval(self,Callback,Interval):
+
+        """ Schedules a callback to run repeatedly at the specified interval.
+        The callback is cancelled if it returns False
+
+        INPUTS:
+            Callback            Function called with the elapsed time
+            Interval            Interval between calls in seconds
+
+        OUTPUT:
+            Event               Scheduled event
+        """
+
+        # Add event to queue and return event
+        return self.add(Event(Callback,time.monotonic() + Interval,Interval))
+
+    def create_trigger(self,Callback,Timeout=0):
+
+        """ Returns a trigger that schedules a callback once when called
+
+        INPUTS:
+            Callback            Function called with the elapsed time
+            Timeout             Delay before callback is run in seconds
+
+        OUTPUT:
+            Trigger             Callback trigger
+        """
+
+        # Return callback trigger
+        return Trigger(self,Callback,Timeout)
+
+    def add(self,Event):
+
+        # Add event to queue and wake event loop
+        with self.Wake:
+            heapq.heappush(self.Queue,(Event.Time,next(self.Sequence),Event))
+            self.Wake.notify()
+        return Event
+
+    def tick(self):
+
+        """ Runs every callback that is due
+
+        OUTPUT:
+            Delay               Time until next scheduled callback in seconds.
+                                Set to None if no callbacks are scheduled
+        """
+
+        # Extract events that are due
+        Now = time.monotonic()
+        Due = []
+        with self.Lock:
+            while self.Queue and self.Queue[0][0] <= Now:
+                Due.append(heapq.heappop(self.Queue)[2])
+
+        # Run callback for each event that has not been cancelled, and
+        # reschedule interval events
+        for Event in Due:
+            if Event.Cancelled:
+                continue
+            dt, Event.Last = Now - Event.Last, Now
+            try:
+                Result = Event.Callback(dt)
+            except Exception:
+                traceback.print_exc()
+                Result = None
+            if Event.Interval is not None and Result is not False and not Event.Cancelled:
+                Event.Time = max(Event.Time + Event.Interval,Now)
+                self.add(Event)
+
+        # Return time until next scheduled callback
+        with self.Lock:
+            return max(self.Queue[0][0] - time.monotonic(),0) if self.Queue else None
+
+    def run(self):
+
+        """ Runs the event loop on the calling thread until stop() is called
+        """
+
+        # Run callbacks as they become due
+        self.Running = True
+        while self.Running:
+            Delay = self.tick()
+            with self.Wake:
+                if self.Running and (not self.Queue or self.Queue[0][0] > time.monotonic()):
+                    self.Wake.wait(Delay)
+
+    def stop(self):
+
+        """ Stops the event loop
+        """
+
+        # Clear running flag and wake event loop
+        with self.Wake:
+            self.Running = False
+            self.Wake.notify()
+
+# Define event loop shared by the console core service
+Clock = EventLoop()
+
+def mainthread(Function):
+
+    """ Decorator that runs the decorated function on the event loop thread
+
+    INPUTS:
+        Function            Decorated function
+
+    OUTPUT:
+        Function            Function that schedules the decorated function
+    """
+
+    # Define function that schedules decorated function
+    @functools.wraps(Function)
+    def delayed(*largs,**kwargs):
+        Clock.schedule_once(lambda dt: Function(*largs,**kwargs))
+    return delayed
@@ -20,16 +20,98 @@ from datetime   import datetime, date, timedelta, time
 from lib        import observationFormat  as observation
 from lib        import derivedVariables   as derive
 from lib        import requestAPI
-from kivy.clock import Clock
+from lib        import taskRunner
+from functools  import partial
 import requests
 import bisect
+import json
 import pytz
 import time
+import os
+
+# Define global variables
+cacheFile = 'wfpiconsole.forecast'
+
+# Define weather icons for each WeatherFlow forecast icon
+weatherIcons = {'clear-day':                   '1',
+                'clear-night':                 '0',
+                'rainy':                       '15',
+                'possibly-rainy-day':          '10',
+                'possibly-rainy-night':        '9',
+                'snow':                        '27',
+                'possibly-snow-day':           '23',
+                'possibly-snow-night':         '22',
+                'sleet':                       '18',
+                'possibly-sleet-day':          '17',
+                'possibly-sleet-night':        '16',
+                'thunderstorm':                '30',
+                'possibly-thunderstorm-day':   '29',
+                'possibly-thunderstorm-night': '28',
+                'windy':                       'wind',
+                'foggy':                       '6',
+                'cloudy':                      '7',
+                'partly-cloudy-day':           '3',
+                'partly-cloudy-night':         '2'}
+
+def indexForecast(Forecast,Config):
+
+    """ Indexes the hourly WeatherFlow BetterForecast data by the 'valid from'
+    time of each hourly forecast, keeping only the variables required by the
+    console
 
-def Download(metData,Config):
+    INPUTS:
+        Forecast            WeatherFlow BetterForecast JSON
+        Config              Station configuration
 
-    """ Download the weather forecast data using the WeatherFlow BetterForecast
-    API
+    OUTPUT:
+        Index               Dictionary containing fields:
+            Station             Station ID
+            Issued              Time forecast was downloaded as a UNIX
+                                timestamp
+            Time                'Valid from' time of each hourly forecast
+            Temp                Forecast temperature                    [C]
+            WindSpd             Forecast wind speed                     [m/s]
+            WindDir             Forecast wind direction                 [degrees]
+            Precip              Forecast precipitation probability      [%]
+            Weather             Forecast weather icon
+    """
+
+    # Index hourly forecasts by 'valid from' time
+    Hourly = Forecast['hourly']
+    Index  = {'Station': Config['Station']['StationID'],
+              'Issued':  int(time.time()),
+              'Time':    [Hour['time']                for Hour in Hourly],
+              'Temp':    [Hour['air_temperature']     for Hour in Hourly],
+              'WindSpd': [Hour['wind_avg']            for Hour in Hourly],
+              'WindDir': [Hour['wind_direction']      for Hour in Hourly],
+              'Precip':  [Hour['precip_probability']  for Hour in Hourly],
+              'Weather': [weatherIcons.get(Hour['icon'].replace('cc-',''),'ForecastUnavailable') for Hour in Hourly]}
+
+    # Return indexed forecast
+    return Index
+
+def Save(Index):
+
+    """ Saves the indexed forecast to disk so that it is available immediately
+    when the console is next started
+
+    INPUTS:
+        Index               Indexed forecast
+    """
+
+    # Write indexed forecast to temporary file and replace existing forecast
+    # cache
+    try:
+        with open(cacheFile + '.tmp','w') as File:
+            json.dump(Index,File)
+        os.replace(cacheFile + '.tmp',cacheFile)
+    except:
+        pass
+
+def Load(metData,Config):
+
+    """ Loads the last good forecast saved to disk and extracts the forecast
+    for the current hourly period
 
     INPUTS:
         metData             Dictionary holding weather forecast data
@@ -39,20 +121,80 @@ def Download(metData,Config):
         metData             Dictionary holding weather forecast data
     """
 
+    # Load indexed forecast from disk if it is for the current station
+    try:
+        with open(cacheFile) as File:
+            Index = json.load(File)
+        if Index['Station'] == Config['Station']['StationID']:
+            metData['Index'] = Index
+            Extract(metData,Config)
+    except:
+        pass
+
+    # Return metData dictionary
+    return metData
+
+def Refresh(metData,Config,Delay=0):
+
+    """ Downloads the latest weather forecast in the background task runner
+
+    INPUTS:
+        metData             Dictionary holding weather forecast data
+        Config              Station configuration
+        Delay               Delay before download is queued in seconds
+    """
+
+    # Queue forecast download after specified delay
+    taskRunner.Tasks.schedule('Forecast',partial(Download,Config),partial(Update,metData,Config),Delay)
+
+def Download(Config):
+
+    """ Download the weather forecast data using the WeatherFlow BetterForecast
+    API, and save the indexed forecast to disk
+
+    INPUTS:
+        Config              Station configuration
+
+    OUTPUT:
+        Index               Indexed forecast. Set to None if download has
+                            failed
+    """
+
     # Download latest forecast data
     Data = requestAPI.weatherflow.Forecast(Config)
 
-    # Verify API response and extract forecast
+    # Verify API response, and index and save forecast
     if requestAPI.weatherflow.verifyResponse(Data,'forecast'):
-        metData['Dict'] = Data.json()['forecast']
+        Index = indexForecast(Data.json()['forecast'],Config)
+        Save(Index)
+        return Index
     else:
-        Clock.schedule_once(lambda dt: Download(metData,Config),600)
-        if not 'Dict' in metData:
-            metData['Dict'] = {}
-    Extract(metData,Config)
+        return None
 
-    # Return metData dictionary
-    return metData
+def Update(metData,Config,Index):
+
+    """ Updates the weather forecast on the main thread with the latest
+    indexed forecast
+
+    INPUTS:
+        metData             Dictionary holding weather forecast data
+        Config              Station configuration
+        Index               Latest indexed forecast. Set to None if download
+                            has failed
+    """
+
+    # Store latest indexed forecast. If the download has failed, keep the last
+    # good forecast and attempt to download forecast again once the WeatherFlow
+    # API backoff has elapsed, up to a maximum of 10 minutes
+    if Index is not None:
+        metData['Index'] = Index
+    else:
+        Refresh(metData,Config,requestAPI.weatherflow.retryDelay('better_forecast',600))
+        if 'Index' in metData:
+            return
+
+    # Extract forecast for current hourly period
+    Extract(metData,Config)
 
 def Extract(metData,Config):
 
@@ -60,12 +202,14 @@ def Extract(metData,Config):
     Tz = pytz.timezone(Config['Station']['Timezone'])
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
-    # Extract all forecast data from WeatherFlow JSON file. If  forecast is
-    # unavailable, set forecast variables to blank and indicate to user that
-    # forecast is unavailable
+    # Retrieve forecast for the current hourly period from indexed forecast.
+    # If forecast is unavailable, set forecast variables to blank and indicate
+    # to user that forecast is unavailable
     try:
-        metDict = (metData['Dict']['hourly'])
-    except KeyError:
+        Index = metData['Index']
+        Hour  = bisect.bisect(Index['Time'],int(time.time()))
+        Valid = Index['Time'][Hour]
+    except (KeyError,IndexError):
         metData['Time']    = Now
         metData['Temp']    = '--'
         metData['WindDir'] = '--'
@@ -74,26 +218,17 @@ def Extract(metData,Config):
         metData['Precip']  = '--'
         metData['Valid']   = '--'
 
-        # Attempt to download forecast again in 10 minutes and return
-        # metData dictionary
-        Clock.schedule_once(lambda dt: Download(metData,Config),600)
+        # Return metData dictionary
         return metData
 
-    # Extract 'valid from' time of all available hourly forecasts, and
-    # retrieve forecast for the current hourly period
-    Times = list(hourlyForecast['time'] for hourlyForecast in metDict)
-    metDict = metDict[bisect.bisect(Times,int(time.time()))]
-
     # Extract 'Valid' until time of forecast
-    Valid = Times[bisect.bisect(Times,int(time.time()))]
     Valid = datetime.fromtimestamp(Valid,pytz.utc).astimezone(Tz)
 
-    # Extract weather variables from DarkSky forecast
-    Temp    = [metDict['air_temperature'],'c']
-    WindSpd = [metDict['wind_avg'],'mps']
-    WindDir = [metDict['wind_direction'],'degrees']
-    Precip  = [metDict['precip_probability'],'%']
-    Weather =  metDict['icon'].replace('cc-','')
+    # Extract weather variables from indexed forecast
+    Temp    = [Index['Temp'][Hour],'c']
+    WindSpd = [Index['WindSpd'][Hour],'mps']
+    WindDir = [Index['WindDir'][Hour],'degrees']
+    Precip  = [Index['Precip'][Hour],'%']
 
     # Convert forecast units as required
     Temp = observation.Units(Temp,Config['Units']['Temp'])
@@ -106,48 +241,7 @@ def Extract(metData,Config):
     metData['WindDir'] = derive.CardinalWindDirection(WindDir)[2]
     metData['WindSpd'] = ['{:.0f}'.format(WindSpd[0]),WindSpd[1]]
     metData['Precip']  = '{:.0f}'.format(Precip[0])
-
-    # Define weather icon
-    if Weather == 'clear-day':
-        metData['Weather'] = '1'
-    elif Weather == 'clear-night':
-        metData['Weather'] = '0'
-    elif Weather == 'rainy':
-        metData['Weather'] = '15'
-    elif Weather == 'possibly-rainy-day':
-        metData['Weather'] = '10'
-    elif Weather == 'possibly-rainy-night':
-        metData['Weather'] = '9'
-    elif Weather == 'snow':
-        metData['Weather'] = '27'
-    elif Weather == 'possibly-snow-day':
-        metData['Weather'] = '23'
-    elif Weather == 'possibly-snow-night':
-        metData['Weather'] = '22'
-    elif Weather == 'sleet':
-        metData['Weather'] = '18'
-    elif Weather == 'possibly-sleet-day':
-        metData['Weather'] = '17'
-    elif Weather == 'possibly-sleet-night':
-        metData['Weather'] = '16'
-    elif Weather == 'thunderstorm':
-        metData['Weather'] = '30'
-    elif Weather == 'possibly-thunderstorm-day':
-        metData['Weather'] = '29'
-    elif Weather == 'possibly-thunderstorm-night':
-        metData['Weather'] = '28'
-    elif Weather == 'windy':
-        metData['Weather'] = 'wind'
-    elif Weather == 'foggy':
-        metData['Weather'] = '6'
-    elif Weather == 'cloudy':
-        metData['Weather'] = '7'
-    elif Weather == 'partly-cloudy-day':
-        metData['Weather'] = '3'
-    elif Weather == 'partly-cloudy-night':
-        metData['Weather'] = '2'
-    else:
-        metData['Weather'] = 'ForecastUnavailable'
+    metData['Weather'] = Index['Weather'][Hour]
 
     # Return metData dictionary
     return metData
\ No newline at end of file
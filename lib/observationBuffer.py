@@ -0,0 +1,294 @@
+""" Maintains the rolling observation windows required by the
+Raspberry Pi Python console for WeatherFlow Tempest and Smart Home Weather
+stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required library modules
+from lib import requestAPI
+
+# Import required Python modules
+from collections import deque
+import threading
+import math
+
+# Define global variables
+NaN     = float('NaN')
+Buffers = {}
+bufferLock = threading.Lock()
+
+# Define length of rolling windows                                      [s]
+presWindow   = 3600*3 + 59
+strikeWindow = {'10m': 600, '3h': 3600*3 + 59}
+countWindow  = 3600*24
+
+# Define rolling 24 hour observation counters
+Counters = {}
+countLock = threading.Lock()
+
+class RollingWindow():
+
+    """ Sliding time window over a single observation. The sum, count, number
+    of non-zero values, and first and last values in the window are updated
+    incrementally, so adding and expiring an observation costs constant time
+    whatever the window length
+    """
+
+    def __init__(self,Length):
+
+        # Define window length, windowed observations and running totals
+        self.Length = Length
+        self.Values = deque()
+        self.Sum    = 0
+        self.Count  = 0
+        self.Active = 0
+
+    def add(self,Time,Value):
+
+        """ Adds a new observation to the window and expires observations that
+        are older than the window length
+
+        INPUTS:
+            Time                Observation time                        [s]
+            Value               Observation value. Missing values are ignored
+        """
+
+        # Add observation to window and update running totals
+        if Value is not None and not math.isnan(Value):
+            self.Values.append((Time,Value))
+            self.Sum    += Value
+            self.Count  += 1
+            self.Active += Value != 0
+
+        # Expire observations that are older than the window length
+        self.expire(Time)
+
+    def expire(self,Time):
+
+        """ Removes observations that are older than the window length
+
+        INPUTS:
+            Time                Time of latest observation              [s]
+        """
+
+        # Remove expired observations and update running totals
+        Start = Time - self.Length
+        while self.Values and self.Values[0][0] < Start:
+            Value = self.Values.popleft()[1]
+            self.Sum    -= Value
+            self.Count  -= 1
+            self.Active -= Value != 0
+
+    def first(self):
+
+        """ Returns the oldest observation in the window as a (Time, Value)
+        tuple, or None if the window is empty
+        """
+        return self.Values[0] if self.Values else None
+
+    def last(self):
+
+        """ Returns the newest observation in the window as a (Time, Value)
+        tuple, or None if the window is empty
+        """
+        return self.Values[-1] if self.Values else None
+
+class DeviceWindows():
+
+    """ Rolling windows of station pressure and lightning strike count from
+    the most recent device observations
+    """
+
+    def __init__(self):
+
+        # Define rolling windows and time of latest observation
+        self.Pres    = RollingWindow(presWindow)
+        self.Strikes = {Key: RollingWindow(Length) for Key,Length in strikeWindow.items()}
+        self.Latest  = NaN
+        self.Lock    = threading.Lock()
+
+    def append(self,Time,Pres,Strikes):
+
+        """ Adds a new observation to the rolling windows. Observations that
+        are not newer than the latest observation are ignored
+
+        INPUTS:
+            Time                Observation time                        [s]
+            Pres                Station pressure                        [mb]
+            Strikes             Lightning strike count                  [count]
+        """
+
+        # Add observation to each rolling window
+        with self.Lock:
+            if not math.isnan(self.Latest) and Time <= self.Latest:
+                return
+            self.Latest = Time
+            self.Pres.add(Time,Pres)
+            for Window in self.Strikes.values():
+                Window.add(Time,Strikes)
+
+def getBuffer(Device):
+
+    """ Returns the rolling windows for the specified device, creating the
+    windows if required
+
+    INPUTS:
+        Device              Device ID
+
+    OUTPUT:
+        Buffer              Rolling windows for specified device
+    """
+
+    # Return rolling windows for specified device
+    with bufferLock:
+        if Device not in Buffers:
+            Buffers[Device] = DeviceWindows()
+        return Buffers[Device]
+
+def Indices(Device,Config):
+
+    """ Returns the pressure and lightning strike count indices in the
+    observations from the specified device
+
+    INPUTS:
+        Device              Device ID
+        Config              Station configuration
+
+    OUTPUT:
+        presInd             Pressure index
+        strikeInd           Lightning strike count index
+    """
+
+    # Return observation indices based on device type
+    if Device == Config['Station']['TempestID']:
+        return 6, 15
+    else:
+        return 1, 4
+
+def Seed(Device,endTime,Config):
+
+    """ Seeds the rolling windows for the specified device with observations
+    from the previous three hours downloaded from the WeatherFlow API. Any gap
+    in the existing windows, for example following a websocket reconnect, is
+    filled
+
+    INPUTS:
+        Device              Device ID
+        endTime             End time of three hour window as a UNIX timestamp
+        Config              Station configuration
+    """
+
+    # Download device data from the previous three hours
+    Data3h = requestAPI.weatherflow.Last3h(Device,endTime,Config)
+
+    # Replace rolling windows with observations from the previous three hours.
+    # If the API call has failed, the existing windows are retained
+    if requestAPI.weatherflow.verifyResponse(Data3h,'obs'):
+        presInd, strikeInd = Indices(Device,Config)
+        Buffer = DeviceWindows()
+        for item in Data3h.json()['obs']:
+            if item[0] != None:
+                Buffer.append(item[0],item[presInd],item[strikeInd])
+        with bufferLock:
+            Buffers[Device] = Buffer
+
+def Update(Device,Ob,Seed3h,Config):
+
+    """ Adds the latest device observation to the rolling windows, seeding the
+    windows from the WeatherFlow API first if required, and returns the
+    rolling windows for the device
+
+    INPUTS:
+        Device              Device ID
+        Ob                  Latest device observation
+        Seed3h              Flag indicating windows should be seeded from the
+                            WeatherFlow API
+        Config              Station configuration
+
+    OUTPUT:
+        Data3h              Rolling windows containing the station pressure
+                            and lightning strike count from the previous three
+                            hours
+    """
+
+    # Seed rolling windows from the WeatherFlow API if required
+    if Seed3h:
+        Seed(Device,Ob[0],Config)
+
+    # Add latest observation to rolling windows
+    presInd, strikeInd = Indices(Device,Config)
+    Buffer = getBuffer(Device)
+    Buffer.append(Ob[0],Ob[presInd],Ob[strikeInd])
+
+    # Return rolling windows for device
+    return Buffer
+
+def Count(Device,Time,apiData):
+
+    """ Adds the latest device observation to the rolling 24 hour observation
+    count, seeding the count first if required from the daily API data that
+    has already been downloaded to initialise the aggregates. No additional
+    API requests are made, so the count only covers the previous 24 hours
+    once enough observations have been received or downloaded
+
+    INPUTS:
+        Device              Device ID
+        Time                Observation time                        [s]
+        apiData             Parsed API data required to initialise aggregates.
+                            Set to None if initialisation is not required
+    """
+
+    # Seed observation count from the observation times already held in the
+    # count, together with any observation times downloaded for yesterday and
+    # today
+    with countLock:
+        if apiData is not None:
+            Times = set()
+            if Device in Counters:
+                Times.update(obTime for obTime,Value in Counters[Device].Values)
+            for Window in ['Yesterday','Today']:
+                if Window in apiData and apiData[Window] is not None:
+                    Times.update(obTime for obTime in apiData[Window]['Time'] if not math.isnan(obTime))
+            Counter = RollingWindow(countWindow)
+            for obTime in sorted(Times):
+                Counter.add(obTime,1)
+            Counters[Device] = Counter
+
+        # Add latest observation to observation count
+        Counter = Counters.setdefault(Device,RollingWindow(countWindow))
+        Last = Counter.last()
+        if not math.isnan(Time) and (Last is None or Time > Last[0]):
+            Counter.add(Time,1)
+
+def observationCount(Device,Now):
+
+    """ Returns the number of observations from the specified device in the
+    previous 24 hours
+
+    INPUTS:
+        Device              Device ID
+        Now                 Current time as a UNIX timestamp
+
+    OUTPUT:
+        Count               Number of observations in the previous 24 hours.
+                            Set to None if no observations have been received
+    """
+
+    # Expire observations older than 24 hours and return observation count
+    with countLock:
+        if Device not in Counters:
+            return None
+        Counters[Device].expire(Now)
+        return Counters[Device].Count
@@ -19,6 +19,208 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 from lib  import derivedVariables as derive
 import math
 
+# ------------------------------------------------------------------------------
+# DEFINE UNIT CONVERTERS
+# ------------------------------------------------------------------------------
+def scaleUnit(Factor,Label):
+
+    """ Returns a converter that scales an observation by the specified factor
+
+    INPUTS:
+        Factor          Conversion factor. Set to None if the observation value
+                        is unchanged
+        Label           Display unit of converted observation
+
+    OUTPUT:
+        Converter       Function returning the converted value and display unit
+    """
+
+    # Return converter
+    if Factor is None:
+        return lambda Value: (Value,Label)
+    else:
+        return lambda Value: (Value*Factor,Label)
+
+def directionUnit(Unit):
+
+    """ Returns a converter for wind direction observations
+
+    INPUTS:
+        Unit            Required output unit (degrees/cardinal)
+
+    OUTPUT:
+        Converter       Function returning the converted value and display unit
+    """
+
+    # Define wind direction converter
+    def Converter(Value):
+        if Value is None:
+            return 'Calm',''
+        elif Unit == 'cardinal':
+            return derive.CardinalWindDirection([Value,'degrees'])[2],''
+        else:
+            return Value,'[sup]o[/sup]'
+
+    # Return converter
+    return Converter
+
+# Define unit converters keyed by source unit and required output unit
+unitConverters = {('c','f'):               (lambda Value: (Value * 9/5 + 32,' [sup]o[/sup]F')),
+                  ('c','c'):               scaleUnit(None,' [sup]o[/sup]C'),
+                  ('mps','bft'):           (lambda Value: (derive.BeaufortScale([Value,'mps'])[4],'bft')),
+                  ('degrees','degrees'):   directionUnit('degrees'),
+                  ('degrees','cardinal'):  directionUnit('cardinal'),
+                  ('km','mi'):             scaleUnit(0.62137,'miles')}
+for Unit,Factor,Labels in [['inhg',0.0295301,[' inHg',' inHg/hr']],
+                           ['mmhg',0.750063, [' mmHg',' mmHg/hr']],
+                           ['hpa', None,     [' hpa', ' hpa/hr']],
+                           ['mb',  None,     [' mb',  ' mb/hr']]]:
+    unitConverters[('mb',   Unit)] = scaleUnit(Factor,Labels[0])
+    unitConverters[('mb/hr',Unit)] = scaleUnit(Factor,Labels[1])
+for Unit,Factor,Label in [['mph',2.2369362920544,'mph'],
+                          ['lfm',2.2369362920544,'mph'],
+                          ['kts',1.9438,         'kts'],
+                          ['kph',3.6,            'km/h'],
+                          ['mps',None,           'm/s']]:
+    unitConverters[('mps',Unit)] = scaleUnit(Factor,Label)
+for Unit,Factor,Labels in [['in',0.0393701,['"',   ' in/hr']],
+                           ['cm',0.1,      [' cm', ' cm/hr']],
+                           ['mm',None,     [' mm', ' mm/hr']]]:
+    unitConverters[('mm',   Unit)] = scaleUnit(Factor,Labels[0])
+    unitConverters[('mm/hr',Unit)] = scaleUnit(Factor,Labels[1])
+
+# ------------------------------------------------------------------------------
+# DEFINE OBSERVATION FORMATTERS
+# ------------------------------------------------------------------------------
+def fixedFormat(Format,Label=None):
+
+    """ Returns a formatter that formats an observation with a fixed format
+
+    INPUTS:
+        Format          Format string
+        Label           Display unit of formatted observation. Set to None if
+                        the display unit is unchanged
+
+    OUTPUT:
+        Formatter       Function returning the formatted value and display unit
+    """
+
+    # Define formatter
+    def Formatter(Value,Unit):
+        if math.isnan(Value):
+            return '-',Unit if Label is None else Label
+        else:
+            return Format.format(Value),Unit if Label is None else Label
+
+    # Return formatter
+    return Formatter
+
+def rangeFormat(Limits,Trace,Label=''):
+
+    """ Returns a formatter that formats an observation with a precision based
+    on its value. Values of zero are formatted without decimal places
+
+    INPUTS:
+        Limits          List of [upper limit, format] pairs in ascending order.
+                        Values above the last limit use the last format
+        Trace           Value and text below which trace amounts are displayed
+        Label           Display unit of trace amounts
+
+    OUTPUT:
+        Formatter       Function returning the formatted value and display unit
+    """
+
+    # Define formatter
+    def Formatter(Value,Unit):
+        if math.isnan(Value):
+            return '-',Unit
+        elif Value == 0:
+            return '{:.0f}'.format(Value),Unit
+        elif Trace is not None and Value < Trace[0]:
+            return Trace[1],Unit if Label is None else Label
+        for Limit,Format in Limits:
+            if Limit is None or Value < Limit:
+                return Format.format(Value),Unit
+
+    # Return formatter
+    return Formatter
+
+def formatTemp(Value,Unit):
+    if math.isnan(Value):
+        return '-',Unit
+    elif Value == 0:
+        return '{:.1f}'.format(abs(Value)),Unit
+    else:
+        return '{:.1f}'.format(Value),Unit
+
+def formatWind(Value,Unit):
+    if math.isnan(Value):
+        return '-',Unit
+    elif Value < 10:
+        return '{:.1f}'.format(Value),Unit
+    else:
+        return '{:.0f}'.format(Value),Unit
+
+def formatStrikeCount(Value,Unit):
+    if math.isnan(Value):
+        return '-',Unit
+    elif Value < 1000:
+        return '{:.0f}'.format(Value),Unit
+    else:
+        return '{:.1f}'.format(Value/1000) + ' k',Unit
+
+def formatStrikeDistance(Margin):
+    def Formatter(Value,Unit):
+        if math.isnan(Value):
+            return '-',Unit
+        else:
+            return '{:.0f}'.format(max(Value-Margin,0)) + '-' +  '{:.0f}'.format(Value+Margin),Unit
+    return Formatter
+
+def formatStrikeFrequency(Value,Unit):
+    if math.isnan(Value):
+        return '-',' /min'
+    elif float(Value).is_integer():
+        return '{:.0f}'.format(Value),' /min'
+    else:
+        return '{:.1f}'.format(Value),' /min'
+
+# Define observation formatters keyed by display unit and observation type
+unitFormatters = {('[sup]o[/sup]F','Temp'):                formatTemp,
+                  ('[sup]o[/sup]C','Temp'):                formatTemp,
+                  ('[sup]o[/sup]','Direction'):            fixedFormat('{:.0f}'),
+                  ('mm','Precip'):                         rangeFormat([[10,'{:.1f}'],[None,'{:.0f}']],[0.1,'Trace']),
+                  ('mm/hr','Precip'):                      rangeFormat([[10,'{:.1f}'],[None,'{:.0f}']],[0.1,'<0.1'],None),
+                  ('"','Precip'):                          rangeFormat([[10,'{:.2f}'],[100,'{:.1f}'],[None,'{:.0f}']],[0.01,'Trace']),
+                  ('cm','Precip'):                         rangeFormat([[10,'{:.2f}'],[100,'{:.1f}'],[None,'{:.0f}']],[0.01,'Trace']),
+                  ('in/hr','Precip'):                      rangeFormat([[10,'{:.2f}'],[100,'{:.1f}'],[None,'{:.0f}']],[0.01,'<0.01'],None),
+                  ('cm/hr','Precip'):                      rangeFormat([[10,'{:.2f}'],[100,'{:.1f}'],[None,'{:.0f}']],[0.01,'<0.01'],None),
+                  ('%','Humidity'):                        fixedFormat('{:.0f}'),
+                  ('W m[sup]-2[/sup]','Radiation'):        fixedFormat('{:.0f}'),
+                  ('index','UV'):                          fixedFormat('{:.1f}'),
+                  ('hrs','peakSun'):                       fixedFormat('{:.2f}'),
+                  ('v','Battery'):                         fixedFormat('{:.2f}'),
+                  ('count','StrikeCount'):                 formatStrikeCount,
+                  ('km','StrikeDistance'):                 formatStrikeDistance(3),
+                  ('miles','StrikeDistance'):              formatStrikeDistance(3*0.62137),
+                  ('/min','StrikeFrequency'):              formatStrikeFrequency}
+for Label,Format in [['inHg','{:2.3f}'],['mmHg','{:3.2f}'],['hpa','{:4.1f}'],['mb','{:4.1f}']]:
+    unitFormatters[(Label,'Pressure')]         = fixedFormat(Format)
+    unitFormatters[(Label + '/hr','Pressure')] = fixedFormat(Format)
+for Label in ['mph','kts','km/h','bft','m/s']:
+    unitFormatters[(Label,'Wind')] = formatWind
+
+# Define observation types that are converted into the user specified units
+typeUnits = {'Temp':           'Temp',
+             'Pressure':       'Pressure',
+             'Wind':           'Wind',
+             'Direction':      'Direction',
+             'Precip':         'Precip',
+             'StrikeDistance': 'Distance'}
+
+# ------------------------------------------------------------------------------
+# DEFINE CONVERSION AND FORMATTING FUNCTIONS
+# ------------------------------------------------------------------------------
 def Units(Obs,Unit):
 
     """ Sets the required observation units
@@ -31,111 +233,12 @@ def Units(Obs,Unit):
         cObs            Observation converted into required unit
     """
 
-    # Convert temperature observations
+    # Convert each observation with a registered converter for the required
+    # output unit
     cObs = Obs[:]
-    if Unit in ['f','c']:
-        for ii,T in enumerate(Obs):
-            if T == 'c':
-                if Unit == 'f':
-                    cObs[ii-1] = Obs[ii-1] * 9/5 + 32
-                    cObs[ii] = ' [sup]o[/sup]F'
-                else:
-                    cObs[ii-1] = Obs[ii-1]
-                    cObs[ii] = ' [sup]o[/sup]C'
-
-    # Convert pressure and pressure trend observations
-    elif Unit in ['inhg','mmhg','hpa','mb']:
-        for ii,P in enumerate(Obs):
-            if P in ['mb','mb/hr']:
-                if Unit == 'inhg':
-                    cObs[ii-1] = Obs[ii-1] * 0.0295301
-                    if P == 'mb':
-                        cObs[ii] = ' inHg'
-                    else:
-                        cObs[ii] = ' inHg/hr'
-                elif Unit == 'mmhg':
-                    cObs[ii-1] = Obs[ii-1] * 0.750063
-                    if P == 'mb':
-                        cObs[ii] = ' mmHg'
-                    else:
-                        cObs[ii] = ' mmHg/hr'
-                elif Unit == 'hpa':
-                    cObs[ii-1] = Obs[ii-1]
-                    if P == 'mb':
-                        cObs[ii] = ' hpa'
-                    else:
-                        cObs[ii] = ' hpa/hr'
-                else:
-                    cObs[ii-1] = Obs[ii-1]
-                    if P == 'mb':
-                        cObs[ii] = ' mb'
-                    else:
-                        cObs[ii] = ' mb/hr'
-
-    # Convert windspeed observations
-    elif Unit in ['mph','lfm','kts','kph','bft','mps']:
-        for ii,W in enumerate(Obs):
-            if W == 'mps':
-                if Unit == 'mph' or Unit == 'lfm':
-                    cObs[ii-1] = Obs[ii-1] * 2.2369362920544
-                    cObs[ii] = 'mph'
-                elif Unit == 'kts':
-                    cObs[ii-1] = Obs[ii-1] * 1.9438
-                    cObs[ii] = 'kts'
-                elif Unit == 'kph':
-                    cObs[ii-1] = Obs[ii-1] * 3.6
-                    cObs[ii] = 'km/h'
-                elif Unit == 'bft':
-                    cObs[ii-1] = derive.BeaufortScale(Obs[ii-1:ii+1])[4]
-                    cObs[ii] = 'bft'
-                else:
-                    cObs[ii-1] = Obs[ii-1]
-                    cObs[ii] = 'm/s'
-
-    # Convert wind direction observations
-    elif Unit in ['degrees','cardinal']:
-        for ii,W in enumerate(Obs):
-            if W == 'degrees':
-                if cObs[ii-1] is None:
-                    cObs[ii-1] = 'Calm'
-                    cObs[ii] = ''
-                elif Unit == 'cardinal':
-                    cObs[ii-1] = derive.CardinalWindDirection(Obs[ii-1:ii+1])[2]
-                    cObs[ii] = ''
-                else:
-                    cObs[ii-1] = Obs[ii-1]
-                    cObs[ii] = '[sup]o[/sup]'
-
-    # Convert rain accumulation and rain rate observations
-    elif Unit in ['in','cm','mm']:
-        for ii,Prcp in enumerate(Obs):
-            if Prcp in ['mm','mm/hr']:
-                if Unit == 'in':
-                    cObs[ii-1] = Obs[ii-1] * 0.0393701
-                    if Prcp == 'mm':
-                        cObs[ii] = '"'
-                    else:
-                        cObs[ii] = ' in/hr'
-                elif Unit == 'cm':
-                    cObs[ii-1] = Obs[ii-1] * 0.1
-                    if Prcp == 'mm':
-                        cObs[ii] = ' cm'
-                    else:
-                        cObs[ii] = ' cm/hr'
-                else:
-                    cObs[ii-1] = Obs[ii-1]
-                    if Prcp == 'mm':
-                        cObs[ii] = ' mm'
-                    else:
-                        cObs[ii] = ' mm/hr'
-
-    # Convert distance observations
-    elif Unit in ['km','mi']:
-        for ii,Dist in enumerate(Obs):
-            if Dist == 'km':
-                if Unit == 'mi':
-                    cObs[ii-1] = Obs[ii-1] * 0.62137
-                    cObs[ii] = 'miles'
+    for ii,Item in enumerate(Obs):
+        if isinstance(Item,str) and (Item,Unit) in unitConverters:
+            cObs[ii-1],cObs[ii] = unitConverters[(Item,Unit)](Obs[ii-1])
 
     # Return converted observations
     return cObs
@@ -152,239 +255,158 @@ def Format(Obs,Type):
         cObs            Formatted observation based on specified type
     """
 
-    # Format temperature observations
+    # Format time difference observations
+    if Type == 'TimeDelta':
+        return formatTimeDelta(Obs)
     cObs = Obs[:]
-    if Type == 'Temp':
-        for ii,T in enumerate(Obs):
-            if isinstance(T,str) and T.strip() in ['[sup]o[/sup]F','[sup]o[/sup]C']:
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                elif cObs[ii-1] == 0:
-                    cObs[ii-1] = '{:.1f}'.format(abs(cObs[ii-1]))
-                else:
-                    cObs[ii-1] = '{:.1f}'.format(cObs[ii-1])
-
-    # Format pressure observations
-    elif Type == 'Pressure':
-        for ii,P in enumerate(Obs):
-            if isinstance(P,str) and P.strip() in ['inHg/hr','inHg','mmHg/hr','mmHg','hpa/hr','mb/hr','hpa','mb']:
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                else:
-                    if P.strip() in ['inHg/hr','inHg']:
-                        cObs[ii-1] = '{:2.3f}'.format(cObs[ii-1])
-                    elif P.strip() in ['mmHg/hr','mmHg']:
-                        cObs[ii-1] = '{:3.2f}'.format(cObs[ii-1])
-                    elif P.strip() in ['hpa/hr','mb/hr','hpa','mb']:
-                        cObs[ii-1] = '{:4.1f}'.format(cObs[ii-1])
-
-    # Format windspeed observations
-    elif Type == 'Wind':
-        for ii,W in enumerate(Obs):
-            if isinstance(W,str) and W.strip() in ['mph','kts','km/h','bft','m/s']:
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                else:
-                    if cObs[ii-1] < 10:
-                        cObs[ii-1] = '{:.1f}'.format(cObs[ii-1])
-                    else:
-                        cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-
-    # Format wind direction observations
-    elif Type == 'Direction':
-        for ii,D in enumerate(Obs):
-            if isinstance(D,str) and D.strip() in ['[sup]o[/sup]']:
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                else:
-                    cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-
-    # Format rain accumulation and rain rate observations
-    elif Type == 'Precip':
-        for ii,Prcp in enumerate(Obs):
-            if isinstance(Prcp,str):
-                if Prcp.strip() == 'mm':
-                    if math.isnan(cObs[ii-1]):
-                        cObs[ii-1] = '-'
-                    else:
-                        if cObs[ii-1] == 0:
-                            cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                        elif cObs[ii-1] < 0.1:
-                            cObs[ii-1] = 'Trace'
-                            cObs[ii] = ''
-                        elif cObs[ii-1] < 10:
-                            cObs[ii-1] = '{:.1f}'.format(cObs[ii-1])
+
+    # Format each observation with a registered formatter for the observation
+    # type
+    for ii,Item in enumerate(Obs):
+        if isinstance(Item,str) and (Item.strip(),Type) in unitFormatters:
+            cObs[ii-1],cObs[ii] = unitFormatters[(Item.strip(),Type)](cObs[ii-1],cObs[ii])
+
+    # Return formatted observations
+    return cObs
+
+def Compile(Units):
+
+    """ Compiles the combined unit conversion and formatting pipeline for each
+    observation type from the user specified observation units. The pipeline
+    only needs to be recompiled when the observation units are changed
+
+    INPUTS:
+        Units           Dictionary of user specified observation units
+
+    OUTPUT:
+        Pipeline        Dictionary keyed by observation type, holding a
+                        dictionary of functions keyed by source unit that
+                        return the converted and formatted value and display
+                        unit
+    """
+
+    # Define combined converter and formatter for each observation type and
+    # source unit
+    Pipeline = {}
+    for (Unit,Type),Formatter in unitFormatters.items():
+        Pipeline.setdefault(Type,{})[Unit]       = Formatter
+        Pipeline.setdefault(Type,{})[' ' + Unit] = Formatter
+    for Type,Category in typeUnits.items():
+        for (Source,Target),Converter in unitConverters.items():
+            if Target == Units[Category]:
+                Pipeline.setdefault(Type,{})[Source] = compileUnit(Converter,Type)
+
+    # Return compiled pipeline
+    return Pipeline
+
+def compileUnit(Converter,Type):
+
+    """ Combines a unit converter with the formatter for its display unit
+
+    INPUTS:
+        Converter       Unit converter
+        Type            Observation type
+
+    OUTPUT:
+        Function        Function returning the converted and formatted value and
+                        display unit
+    """
+
+    # Define formatters for each display unit of the observation type
+    Formatters = {Unit: Formatter for (Unit,fType),Formatter in unitFormatters.items() if fType == Type}
+
+    # Define combined converter and formatter
+    def Function(Value,Unit):
+        Value,Unit = Converter(Value)
+        Formatter  = Formatters.get(Unit.strip())
+        if Formatter is not None:
+            return Formatter(Value,Unit)
+        else:
+            return Value,Unit
+
+    # Return combined converter and formatter
+    return Function
+
+def Record(Obs,Type,Pipeline):
+
+    """ Converts an observation into the user specified units and formats it
+    for display on the console in a single pass
+
+    INPUTS:
+        Obs             Observations with units
+        Type            Observation type
+        Pipeline        Compiled conversion and formatting pipeline
+
+    OUTPUT:
+        cObs            Converted and formatted observation
+    """
+
+    # Format time difference observations
+    if Type == 'TimeDelta':
+        return formatTimeDelta(Obs)
+    cObs = Obs[:]
+
+    # Convert and format each observation with a registered pipeline function
+    Functions = Pipeline.get(Type,{})
+    for ii,Item in enumerate(Obs):
+        if isinstance(Item,str) and Item in Functions:
+            cObs[ii-1],cObs[ii] = Functions[Item](cObs[ii-1],cObs[ii])
+
+    # Return converted and formatted observations
+    return cObs
+
+def formatTimeDelta(Obs):
+
+    """ Formats time difference observations for display on the console
+
+    INPUTS:
+        Obs             Time difference observation
+
+    OUTPUT:
+        cObs            Formatted time difference observation
+    """
+
+    # Format time difference observations
+    cObs = Obs[:]
+    for ii,Delta in enumerate(Obs):
+        if isinstance(Delta,str) and Delta.strip() in ['s']:
+            if math.isnan(cObs[ii-1]):
+                cObs = ['-','-','-','-',cObs[2]]
+            else:
+                days,remainder = divmod(cObs[ii-1],86400)
+                hours,remainder = divmod(remainder,3600)
+                minutes,seconds = divmod(remainder,60)
+                if days >= 1:
+                    if days == 1:
+                        if hours == 1:
+                            cObs = ['{:.0f}'.format(days),'day','{:.0f}'.format(hours),'hour',cObs[2]]
                         else:
-                            cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                elif Prcp.strip() == 'mm/hr':
-                    if math.isnan(cObs[ii-1]):
-                        cObs[ii-1] = '-'
-                    else:
-                        if cObs[ii-1] == 0:
-                            cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                        elif cObs[ii-1] < 0.1:
-                            cObs[ii-1] = '<0.1'
-                        elif cObs[ii-1] < 10:
-                            cObs[ii-1] = '{:.1f}'.format(cObs[ii-1])
+                            cObs = ['{:.0f}'.format(days),'day','{:.0f}'.format(hours),'hours',cObs[2]]
+                    elif days <= 99:
+                        if hours == 1:
+                            cObs = ['{:.0f}'.format(days),'days','{:.0f}'.format(hours),'hour',cObs[2]]
                         else:
-                            cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                elif Prcp.strip() in ['"','cm']:
-                    if math.isnan(cObs[ii-1]):
-                        cObs[ii-1] = '-'
-                    else:
-                        if cObs[ii-1] == 0:
-                            cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                        elif cObs[ii-1] < 0.01:
-                            cObs[ii-1] = 'Trace'
-                            cObs[ii] = ''
-                        elif cObs[ii-1] < 10:
-                            cObs[ii-1] = '{:.2f}'.format(cObs[ii-1])
-                        elif cObs[ii-1] < 100:
-                            cObs[ii-1] = '{:.1f}'.format(cObs[ii-1])
+                            cObs = ['{:.0f}'.format(days),'days','{:.0f}'.format(hours),'hours',cObs[2]]
+                    elif days >= 100:
+                            cObs = ['{:.0f}'.format(days),'days','-','-',cObs[2]]
+                elif hours >= 1:
+                    if hours == 1:
+                        if minutes == 1:
+                            cObs = ['{:.0f}'.format(hours),'hour','{:.0f}'.format(minutes),'min',cObs[2]]
                         else:
-                            cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                elif Prcp.strip() in ['in/hr','cm/hr']:
-                    if math.isnan(cObs[ii-1]):
-                        cObs[ii-1] = '-'
-                    else:
-                        if cObs[ii-1] == 0:
-                            cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                        elif cObs[ii-1] < 0.01:
-                            cObs[ii-1] = '<0.01'
-                        elif cObs[ii-1] < 10:
-                            cObs[ii-1] = '{:.2f}'.format(cObs[ii-1])
-                        elif cObs[ii-1] < 100:
-                            cObs[ii-1] = '{:.1f}'.format(cObs[ii-1])
+                            cObs = ['{:.0f}'.format(hours),'hour','{:.0f}'.format(minutes),'mins',cObs[2]]
+                    elif hours > 1:
+                        if minutes == 1:
+                            cObs = ['{:.0f}'.format(hours),'hours','{:.0f}'.format(minutes),'min',cObs[2]]
                         else:
-                            cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-
-    # Format humidity observations
-    elif Type == 'Humidity':
-        for ii,H in enumerate(Obs):
-            if isinstance(H,str) and H.strip() == '%':
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                else:
-                    cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-
-    # Format solar radiation observations
-    elif Type == 'Radiation':
-        for ii,Rad in enumerate(Obs):
-            if isinstance(Rad,str) and Rad.strip() == 'W m[sup]-2[/sup]':
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                else:
-                    cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-
-    # Format UV observations
-    elif Type == 'UV':
-        for ii,UV in enumerate(Obs):
-            if isinstance(UV,str) and UV.strip() == 'index':
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                else:
-                    cObs[ii-1] = '{:.1f}'.format(cObs[ii-1])
-
-    # Format Peak Sun Hours observations
-    elif Type == 'peakSun':
-        for ii,psh in enumerate(Obs):
-            if isinstance(psh,str) and psh.strip() == 'hrs':
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                else:
-                    cObs[ii-1] = '{:.2f}'.format(cObs[ii-1])
-
-    # Format battery voltage observations
-    elif Type == 'Battery':
-        for ii,V in enumerate(Obs):
-            if isinstance(V,str) and V.strip() == 'v':
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                else:
-                    cObs[ii-1] = '{:.2f}'.format(cObs[ii-1])
-
-    # Format lightning strike count observations
-    elif Type == 'StrikeCount':
-        for ii,L in enumerate(Obs):
-            if isinstance(L,str) and L.strip() == 'count':
-                if math.isnan(cObs[ii-1]):
-                    cObs[ii-1] = '-'
-                elif cObs[ii-1] < 1000:
-                    cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                else:
-                    cObs[ii-1] = '{:.1f}'.format(cObs[ii-1]/1000) + ' k'
-
-    # Format lightning strike distance observations
-    elif Type == 'StrikeDistance':
-        for ii,StrikeDist in enumerate(Obs):
-            if isinstance(StrikeDist,str):
-                if StrikeDist.strip() in ['km']:
-                    if math.isnan(cObs[ii-1]):
-                        cObs[ii-1] = '-'
-                    else:
-                        cObs[ii-1] = '{:.0f}'.format(max(cObs[ii-1]-3,0)) + '-' +  '{:.0f}'.format(cObs[ii-1]+3)
-                elif StrikeDist.strip() in ['miles']:
-                    if math.isnan(cObs[ii-1]):
-                        cObs[ii-1] = '-'
-                    else:
-                        cObs[ii-1] = '{:.0f}'.format(max(cObs[ii-1]-3*0.62137,0)) + '-' +  '{:.0f}'.format(cObs[ii-1]+3*0.62137)
-
-    # Format lightning strike frequency observations
-    elif Type == 'StrikeFrequency':
-        for ii,StrikeFreq in enumerate(Obs):
-            if isinstance(StrikeFreq,str):
-                if StrikeFreq.strip() in ['/min']:
-                    if math.isnan(cObs[ii-1]):
-                        cObs[ii-1] = '-'
-                        cObs[ii] = ' /min'
-                    elif cObs[ii-1].tolist().is_integer():
-                        cObs[ii-1] = '{:.0f}'.format(cObs[ii-1])
-                        cObs[ii] = ' /min'
-                    else:
-                        cObs[ii-1] = '{:.1f}'.format(cObs[ii-1])
-                        cObs[ii] = ' /min'
-
-    # Format time difference observations
-    elif Type == 'TimeDelta':
-        for ii,Delta in enumerate(Obs):
-            if isinstance(Delta,str) and Delta.strip() in ['s']:
-                if math.isnan(cObs[ii-1]):
-                    cObs = ['-','-','-','-',cObs[2]]
+                            cObs = ['{:.0f}'.format(hours),'hours','{:.0f}'.format(minutes),'mins',cObs[2]]
                 else:
-                    days,remainder = divmod(cObs[ii-1],86400)
-                    hours,remainder = divmod(remainder,3600)
-                    minutes,seconds = divmod(remainder,60)
-                    if days >= 1:
-                        if days == 1:
-                            if hours == 1:
-                                cObs = ['{:.0f}'.format(days),'day','{:.0f}'.format(hours),'hour',cObs[2]]
-                            else:
-                                cObs = ['{:.0f}'.format(days),'day','{:.0f}'.format(hours),'hours',cObs[2]]
-                        elif days <= 99:
-                            if hours == 1:
-                                cObs = ['{:.0f}'.format(days),'days','{:.0f}'.format(hours),'hour',cObs[2]]
-                            else:
-                                cObs = ['{:.0f}'.format(days),'days','{:.0f}'.format(hours),'hours',cObs[2]]
-                        elif days >= 100:
-                                cObs = ['{:.0f}'.format(days),'days','-','-',cObs[2]]
-                    elif hours >= 1:
-                        if hours == 1:
-                            if minutes == 1:
-                                cObs = ['{:.0f}'.format(hours),'hour','{:.0f}'.format(minutes),'min',cObs[2]]
-                            else:
-                                cObs = ['{:.0f}'.format(hours),'hour','{:.0f}'.format(minutes),'mins',cObs[2]]
-                        elif hours > 1:
-                            if minutes == 1:
-                                cObs = ['{:.0f}'.format(hours),'hours','{:.0f}'.format(minutes),'min',cObs[2]]
-                            else:
-                                cObs = ['{:.0f}'.format(hours),'hours','{:.0f}'.format(minutes),'mins',cObs[2]]
+                    if minutes == 0:
+                        cObs = ['< 1','minute','-','-',cObs[2]]
+                    elif minutes == 1:
+                        cObs = ['{:.0f}'.format(minutes),'minute','-','-',cObs[2]]
                     else:
-                        if minutes == 0:
-                            cObs = ['< 1','minute','-','-',cObs[2]]
-                        elif minutes == 1:
-                            cObs = ['{:.0f}'.format(minutes),'minute','-','-',cObs[2]]
-                        else:
-                            cObs = ['{:.0f}'.format(minutes),'minutes','-','-',cObs[2]]
+                        cObs = ['{:.0f}'.format(minutes),'minutes','-','-',cObs[2]]
 
     # Return formatted observations
     return cObs
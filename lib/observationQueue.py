@@ -0,0 +1,175 @@
+""" Defines the bounded websocket observation queue required by the Raspberry
+Pi Python console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required library modules
+from lib.eventLoop import Clock
+
+# Import required Python modules
+import threading
+import traceback
+
+# Define global variables
+NaN = float('NaN')
+
+class ObservationQueue():
+
+    """ Bounded queue feeding one worker thread per device type. Each device
+    type holds at most one pending message. If a newer message arrives before
+    the pending message has been processed, the pending message is dropped
+    """
+
+    def __init__(self,wfpiconsole):
+
+        # Define pending messages, worker threads, and message counters
+        self.wfpiconsole = wfpiconsole
+        self.Pending     = {}
+        self.Workers     = {}
+        self.Condition   = threading.Condition()
+        self.Processed   = 0
+        self.Dropped     = 0
+
+    def put(self,Type,Handler,Msg):
+
+        """ Adds a websocket message to the queue, replacing any pending
+        message for the same device type
+
+        INPUTS:
+            Type                Device type (Tempest/Sky/outdoorAir/indoorAir)
+            Handler             Function used to process message
+            Msg                 Websocket message
+        """
+
+        # Add message to queue, dropping any pending message for the same
+        # device type
+        with self.Condition:
+            if Type in self.Pending:
+                self.Dropped += 1
+            self.Pending[Type] = (Handler,Msg)
+
+            # Start worker thread for device type if required
+            if Type not in self.Workers:
+                self.Workers[Type] = threading.Thread(target=self.worker, args=(Type,), name=Type, daemon=True)
+                self.Workers[Type].start()
+            self.Condition.notify_all()
+
+    def worker(self,Type):
+
+        """ Processes pending messages for the specified device type
+
+        INPUTS:
+            Type                Device type (Tempest/Sky/outdoorAir/indoorAir)
+        """
+
+        # Wait for next pending message and process it
+        while True:
+            with self.Condition:
+                while Type not in self.Pending:
+                    self.Condition.wait()
+                Handler, Msg = self.Pending.pop(Type)
+            try:
+                Handler(Msg,self.wfpiconsole)
+            except Exception:
+                traceback.print_exc()
+            with self.Condition:
+                self.Processed += 1
+
+    def Status(self):
+
+        """ Returns the current queue status
+
+        OUTPUT:
+            Status              Dictionary containing fields:
+                Depth               Number of pending messages
+                Dropped             Number of dropped messages
+                Processed           Number of processed messages
+        """
+
+        # Return current queue status
+        with self.Condition:
+            return {'Depth':     len(self.Pending),
+                    'Dropped':   self.Dropped,
+                    'Processed': self.Processed}
+
+class RapidWindChannel():
+
+    """ Coalescing channel for rapid wind messages. Only the latest rapid wind
+    observation is kept, and it is processed on the next frame of the main
+    thread. If a newer observation arrives before the latest observation has
+    been processed, the older observation is dropped. The channel also holds
+    the last wind direction and speed used to animate the wind rose
+    """
+
+    def __init__(self,wfpiconsole,Handler):
+
+        # Define pending observation, handler, and last wind direction and
+        # speed
+        self.wfpiconsole = wfpiconsole
+        self.Handler     = Handler
+        self.Pending     = None
+        self.Direction   = 0
+        self.Speed       = NaN
+        self.Processed   = 0
+        self.Dropped     = 0
+        self.Trigger     = Clock.create_trigger(self.process)
+
+    def put(self,Msg):
+
+        """ Adds a rapid wind message to the channel, replacing any pending
+        observation
+
+        INPUTS:
+            Msg                 Rapid wind websocket message
+        """
+
+        # Replace pending observation and schedule processing on next frame
+        if self.Pending is not None:
+            self.Dropped += 1
+        self.Pending = Msg['ob']
+        self.Trigger()
+
+    def process(self,dt):
+
+        """ Processes the pending rapid wind observation
+
+        INPUTS:
+            dt                  Time since processing was scheduled
+        """
+
+        # Process pending observation
+        Ob, self.Pending = self.Pending, None
+        if Ob is not None:
+            try:
+                self.Handler(Ob,self,self.wfpiconsole)
+            except Exception:
+                traceback.print_exc()
+            self.Processed += 1
+
+    def Status(self):
+
+        """ Returns the current channel status
+
+        OUTPUT:
+            Status              Dictionary containing fields:
+                Depth               Number of pending observations
+                Dropped             Number of dropped observations
+                Processed           Number of processed observations
+        """
+
+        # Return current channel status
+        return {'Depth':     int(self.Pending is not None),
+                'Dropped':   self.Dropped,
+                'Processed': self.Processed}
@@ -0,0 +1,212 @@
+""" Maintains the local observation store required by the Raspberry Pi Python
+console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required library modules
+from lib import requestAPI
+
+# Import required Python modules
+from datetime import datetime
+import threading
+import sqlite3
+import pytz
+
+# Define global variables
+dbFile = 'wfpiconsole.db'
+dbLock = threading.Lock()
+
+def Connect():
+
+    """ Opens a connection to the local observation store, creating the
+    required tables if they do not already exist
+
+    OUTPUT:
+        Connection          Connection to the local observation store
+    """
+
+    # Open connection to local observation store
+    Connection = sqlite3.connect(dbFile)
+
+    # Create observation and coverage tables if required
+    Connection.execute('CREATE TABLE IF NOT EXISTS obs (device TEXT, epoch INTEGER, bucket INTEGER, '
+                       'rain REAL, strikes INTEGER, PRIMARY KEY (device,epoch))')
+    Connection.execute('CREATE TABLE IF NOT EXISTS coverage (device TEXT PRIMARY KEY, '
+                       'time_start INTEGER, time_end INTEGER)')
+
+    # Return connection to local observation store
+    return Connection
+
+def Window(Config):
+
+    """ Defines the time window covered by the local observation store in the
+    station timezone
+
+    INPUTS:
+        Config              Station configuration
+
+    OUTPUT:
+        Window              Dictionary containing start of current year, start
+                            of current month, and midnight today as UNIX
+                            timestamps
+    """
+
+    # Define current time in station timezone
+    Tz = pytz.timezone(Config['Station']['Timezone'])
+    Now = datetime.now(pytz.utc).astimezone(Tz)
+
+    # Convert start of current year, start of current month, and midnight
+    # today in station timezone into UNIX timestamps
+    Window = {'Year':     int(Tz.localize(datetime(Now.year,1,1)).timestamp()),
+              'Month':    int(Tz.localize(datetime(Now.year,Now.month,1)).timestamp()),
+              'Midnight': int(Tz.localize(datetime(Now.year,Now.month,Now.day)).timestamp())}
+
+    # Return time window covered by the local observation store
+    return Window
+
+def extractRows(Device,Data,Config):
+
+    """ Extracts the rainfall and lightning strike observations required by
+    the local observation store from an API response
+
+    INPUTS:
+        Device              Device ID
+        Data                Parsed API response
+        Config              Station configuration
+
+    OUTPUT:
+        Rows                List of [device, epoch, bucket, rain, strikes] rows
+    """
+
+    # Define observation indices based on device type and bucket step
+    bucketStep = Data['bucket_step_minutes'] if 'bucket_step_minutes' in Data else 1
+    if Device == Config['Station']['TempestID']:
+        if bucketStep == 1440:
+            rainInd, strikeInd = 28, 24
+        else:
+            rainInd, strikeInd = 12, 15
+    elif Device == Config['Station']['SkyID']:
+        rainInd, strikeInd = 3, None
+    elif Device == Config['Station']['OutAirID']:
+        rainInd, strikeInd = None, 4
+    else:
+        rainInd, strikeInd = None, None
+
+    # Extract required observations from API response
+    Rows = []
+    for item in Data['obs']:
+        if item[0] != None:
+            Rain    = item[rainInd]   if rainInd   is not None else None
+            Strikes = item[strikeInd] if strikeInd is not None else None
+            Rows.append([Device,item[0],bucketStep,Rain,Strikes])
+
+    # Return observation rows
+    return Rows
+
+def Sync(Device,Config):
+
+    """ Updates the local observation store with all observations from the
+    start of the current year up to midnight today. Only observations that are
+    missing from the store are downloaded from the WeatherFlow API
+
+    INPUTS:
+        Device              Device ID
+        Config              Station configuration
+
+    OUTPUT:
+        Flag                True or False flag confirming the store is up to
+                            date
+    """
+
+    # Define time window covered by the local observation store
+    Times = Window(Config)
+
+    # Extract time window currently covered by the local observation store. If
+    # the store is empty or does not cover the start of the current year, all
+    # data for the current year is downloaded. Else only data since the store
+    # was last updated is downloaded
+    with dbLock:
+        Connection = Connect()
+        try:
+            Coverage = Connection.execute('SELECT time_start,time_end FROM coverage WHERE device=?',(Device,)).fetchone()
+        finally:
+            Connection.close()
+    Reset = Coverage is None or Coverage[0] > Times['Year'] or Coverage[1] < Times['Year']
+    startTime = Times['Year'] if Reset else Coverage[1]
+
+    # Download missing observations without holding the store lock.
+    # Observations from the current month are downloaded separately so that
+    # they are returned at a finer resolution than observations from previous
+    # months
+    Rows = []
+    Segments = [[startTime,min(Times['Month'],Times['Midnight'])],
+                [max(startTime,Times['Month']),Times['Midnight']]]
+    for Start,End in Segments:
+        if End <= Start:
+            continue
+        Data = requestAPI.weatherflow.Period(Device,Start,End,Config)
+        if not requestAPI.weatherflow.verifyResponse(Data,'obs'):
+            return False
+        Rows += [Row for Row in extractRows(Device,Data.json(),Config) if Start <= Row[1] < End]
+
+    # Update local observation store. If the store did not cover the start of
+    # the current year, remove existing observations first. Else remove
+    # observations from previous years
+    with dbLock:
+        Connection = Connect()
+        try:
+            if Reset:
+                Connection.execute('DELETE FROM obs WHERE device=?',(Device,))
+            else:
+                Connection.execute('DELETE FROM obs WHERE device=? AND epoch<?',(Device,Times['Year']))
+            Connection.executemany('INSERT OR REPLACE INTO obs VALUES (?,?,?,?,?)',Rows)
+            Connection.execute('INSERT OR REPLACE INTO coverage VALUES (?,?,?)',(Device,Times['Year'],Times['Midnight']))
+            Connection.commit()
+        finally:
+            Connection.close()
+
+    # Return flag confirming the store is up to date
+    return True
+
+def Totals(Device,Period,Config):
+
+    """ Calculates the total rainfall and lightning strikes stored for the
+    current month or year up to midnight today
+
+    INPUTS:
+        Device              Device ID
+        Period              Required period (Month/Year)
+        Config              Station configuration
+
+    OUTPUT:
+        Totals              Dictionary containing fields:
+            Rain                Total rainfall                              [mm]
+            Strikes             Total number of lightning strikes           [Count]
+    """
+
+    # Define time window covered by the local observation store
+    Times = Window(Config)
+
+    # Calculate total rainfall and lightning strikes
+    with dbLock:
+        Connection = Connect()
+        try:
+            Rain, Strikes = Connection.execute('SELECT TOTAL(rain),TOTAL(strikes) FROM obs WHERE device=? AND epoch>=? AND epoch<?',
+                                               (Device,Times[Period],Times['Midnight'])).fetchone()
+        finally:
+            Connection.close()
+
+    # Return total rainfall and lightning strikes
+    return {'Rain': Rain, 'Strikes': int(Strikes)}
@@ -0,0 +1,511 @@
+""" Records and replays websocket messages and API responses for the Raspberry
+Pi Python console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+
+A session is recorded by starting the console with:
+
+    python main.py -- --record session.jsonl
+
+and replayed without a display, either in real time or as fast as possible,
+with:
+
+    python -m lib.replay session.jsonl [--fast] [--config wfpiconsole.ini]
+"""
+
+# Import required library modules
+from lib.eventLoop import Clock
+from lib import observationQueue
+from lib import websocket
+from lib import udp
+from lib import core
+from lib.requestAPI import session
+
+# Import required Python modules
+from http.server  import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl, urlencode
+from optparse     import OptionParser
+import configparser
+import collections
+import threading
+import json
+import time
+
+# Define query fields removed from recorded API requests, and query fields
+# ignored when matching a replayed API request to a recorded response
+privateFields = ['api_key']
+timeFields    = ['time_start','time_end']
+
+# Define maximum time to wait for queued messages to be processed in seconds
+drainTimeout = 60
+
+def stripKey(URL):
+
+    """ Removes the API key from a request URL
+
+    INPUTS:
+        URL                 Request URL
+
+    OUTPUT:
+        URL                 Request URL without API key
+    """
+
+    # Return request URL without API key
+    Parts = urlparse(URL)
+    Query = [(Key,Value) for Key,Value in parse_qsl(Parts.query) if Key not in privateFields]
+    return Parts._replace(query=urlencode(Query)).geturl()
+
+class Recorder():
+
+    """ Records every raw websocket message or UDP hub message, and every API
+    response, to a JSON lines file so that a session can be replayed offline
+    """
+
+    def __init__(self,Path):
+
+        # Open session file and register recorder with the API session
+        self.File = open(Path,'a')
+        self.Lock = threading.Lock()
+        session.Recorder = self
+
+    def message(self,Frame,Source='Websocket'):
+
+        """ Records a raw message before it is decoded
+
+        INPUTS:
+            Frame               Raw websocket message or UDP hub message
+            Source              Message source (Websocket/UDP)
+        """
+
+        # Record raw message frame
+        self.write({'Kind': 'Message', 'Time': time.time(), 'Source': Source, 'Frame': Frame.decode('utf8')})
+
+    def response(self,URL,Response):
+
+        """ Records an API response
+
+        INPUTS:
+            URL                 Request URL
+            Response            HTTP response
+        """
+
+        # Record API response with API key removed from request URL
+        self.write({'Kind': 'Response', 'Time': time.time(), 'URL': stripKey(URL),
+                    'Status': Response.status_code, 'Body': Response.text})
+
+    def write(self,Record):
+
+        """ Writes a single record to the session file
+
+        INPUTS:
+            Record              Session record
+        """
+
+        # Write record and flush so session survives an unclean exit
+        with self.Lock:
+            self.File.write(json.dumps(Record) + '\n')
+            self.File.flush()
+
+    def close(self):
+
+        """ Stops recording and closes the session file
+        """
+
+        # Unregister recorder and close session file
+        if session.Recorder is self:
+            session.Recorder = None
+        with self.Lock:
+            self.File.close()
+
+class StandInHandler(BaseHTTPRequestHandler):
+
+    """ Serves recorded API responses from the local stand-in server
+    """
+
+    def do_GET(self):
+
+        # Return recorded API response matching request
+        Status, Body = self.server.standIn.match(self.path)
+        Body = Body.encode('utf8')
+        self.send_response(Status)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(Body)))
+        self.end_headers()
+        self.wfile.write(Body)
+
+    def log_message(self,*largs):
+        pass
+
+class StandIn():
+
+    """ Local HTTP stand-in for swd.weatherflow.com and the other API hosts
+    in a recorded session. Each request is answered with the recorded response
+    for the same path and query. Requests for the same path that differ only
+    in their time window are answered with the recorded response whose window
+    has the closest length, so that 'Today' and 'Yesterday' requests are
+    served correctly when a session is replayed on a later date
+    """
+
+    def __init__(self,Responses):
+
+        # Index recorded responses by request path
+        self.Responses = collections.defaultdict(list)
+        Hosts = set()
+        for Record in Responses:
+            Parts = urlparse(Record['URL'])
+            Hosts.add(Parts.netloc)
+            self.Responses[Parts.path].append((dict(parse_qsl(Parts.query)),Record['Status'],Record['Body']))
+
+        # Start stand-in server and replace recorded API hosts
+        self.Server = ThreadingHTTPServer(('127.0.0.1',0),StandInHandler)
+        self.Server.standIn = self
+        self.Server.daemon_threads = True
+        threading.Thread(target=self.Server.serve_forever, name='StandIn', daemon=True).start()
+        Address = '127.0.0.1:' + str(self.Server.server_address[1])
+        for Host in Hosts:
+            session.hostOverrides[Host] = Address
+        self.Hosts = Hosts
+
+    def match(self,Path):
+
+        """ Returns the recorded response that best matches a request
+
+        INPUTS:
+            Path                Request path and query
+
+        OUTPUT:
+            Status              HTTP status code
+            Body                Response body
+        """
+
+        # Define fields that must match exactly and length of time window
+        Parts = urlparse(Path)
+        Query = {Key: Value for Key,Value in parse_qsl(Parts.query) if Key not in privateFields}
+        Fixed = {Key: Value for Key,Value in Query.items() if Key not in timeFields}
+        Span  = windowLength(Query)
+
+        # Return recorded response with matching fields and closest time
+        # window length
+        Candidates = [Response for Response in self.Responses.get(Parts.path,[])
+                      if {Key: Value for Key,Value in Response[0].items() if Key not in timeFields} == Fixed]
+        if not Candidates:
+            return 404, '{}'
+        Best = min(Candidates,key=lambda Response: abs(windowLength(Response[0])-Span))
+        return Best[1], Best[2]
+
+    def close(self):
+
+        """ Stops the stand-in server and restores the API hosts
+        """
+
+        # Restore API hosts and stop server
+        for Host in self.Hosts:
+            session.hostOverrides.pop(Host,None)
+        self.Server.shutdown()
+        self.Server.server_close()
+
+def windowLength(Query):
+
+    """ Returns the length of the time window in an API request query
+
+    INPUTS:
+        Query               API request query fields
+
+    OUTPUT:
+        Length              Length of time window in seconds. Set to 0 if the
+                            request has no time window
+    """
+
+    # Return length of time window
+    try:
+        return int(Query['time_end']) - int(Query['time_start'])
+    except:
+        return 0
+
+class Metrics():
+
+    """ Collects the latency of each stage of the websocket pipeline during a
+    replayed session
+    """
+
+    def __init__(self):
+
+        # Define latency samples for each stage
+        self.Samples = collections.defaultdict(list)
+        self.Lock    = threading.Lock()
+
+    def record(self,Stage,Seconds):
+
+        """ Records the latency of a single pipeline stage
+
+        INPUTS:
+            Stage               Pipeline stage
+            Seconds             Latency in seconds
+        """
+
+        # Add latency sample to stage
+        with self.Lock:
+            self.Samples[Stage].append(Seconds)
+
+    def timed(self,Stage,Handler,Queued=None):
+
+        """ Returns a copy of a message handler that records its latency, and
+        the time the message spent in the queue
+
+        INPUTS:
+            Stage               Pipeline stage
+            Handler             Message handler
+            Queued              Time message was queued
+
+        OUTPUT:
+            Handler             Timed message handler
+        """
+
+        # Define timed message handler
+        def timedHandler(*largs):
+            Start = time.perf_counter()
+            if Queued is not None:
+                self.record('queue',Start-Queued)
+            try:
+                return Handler(*largs)
+            finally:
+                self.record(Stage,time.perf_counter()-Start)
+
+        # Return timed message handler
+        return timedHandler
+
+    def Report(self):
+
+        """ Returns a summary of the latency of each pipeline stage
+
+        OUTPUT:
+            Report              Dictionary containing count, mean, median,
+                                95th percentile and maximum latency in
+                                milliseconds for each stage
+        """
+
+        # Summarise latency samples for each stage
+        Report = {}
+        with self.Lock:
+            for Stage, Samples in self.Samples.items():
+                Samples = sorted(Samples)
+                Report[Stage] = {'Count': len(Samples),
+                                 'Mean':  1000*sum(Samples)/len(Samples),
+                                 'P50':   1000*Samples[len(Samples)//2],
+                                 'P95':   1000*Samples[min(int(len(Samples)*0.95),len(Samples)-1)],
+                                 'Max':   1000*Samples[-1]}
+
+        # Return latency summary
+        return Report
+
+class TimedQueue(observationQueue.ObservationQueue):
+
+    """ Observation queue that records the queue and handler latency of each
+    websocket message
+    """
+
+    def __init__(self,wfpiconsole,Metrics):
+        super(TimedQueue,self).__init__(wfpiconsole)
+        self.Metrics = Metrics
+        self.Queued  = 0
+
+    def put(self,Type,Handler,Msg):
+
+        # Add timed message handler to queue
+        self.Queued += 1
+        super(TimedQueue,self).put(Type,self.Metrics.timed(Handler.__name__,Handler,time.perf_counter()),Msg)
+
+    def Idle(self):
+
+        # Return True once every queued message has been processed or dropped
+        Status = self.Status()
+        return Status['Processed'] + Status['Dropped'] >= self.Queued
+
+class HeadlessConsole(core.CoreService):
+
+    """ Core service used to replay a recorded session. Messages are passed
+    through timed copies of the observation queue and rapid wind channel, and
+    messages sent to the websocket server are collected instead of being sent
+    """
+
+    def __init__(self,Config,Metrics):
+
+        # Define core service, and initialise the Sunrise and Sunset time and
+        # Moonrise and Moonset time required by the observation handlers
+        super(HeadlessConsole,self).__init__(Config)
+        self.UpdateSunriseSunset(None)
+        self.UpdateMoonriseMoonset(None)
+
+        # Define timed websocket observation queue and rapid wind channel, and
+        # UDP hub message converter
+        self.obsQueue  = TimedQueue(self,Metrics)
+        self.rapidWind = observationQueue.RapidWindChannel(self,Metrics.timed('rapidWind',websocket.rapidWind))
+        self.Listener  = udp.HubListener(self)
+        self.Sent      = []
+
+    def WebsocketSendMessage(self,Message):
+        self.Sent.append(Message)
+
+def Load(Path):
+
+    """ Loads a recorded session
+
+    INPUTS:
+        Path                Path to session file
+
+    OUTPUT:
+        Messages            List of recorded websocket messages
+        Responses           List of recorded API responses
+    """
+
+    # Split recorded session into websocket messages and API responses
+    Messages, Responses = [], []
+    with open(Path) as File:
+        for Line in File:
+            if Line.strip():
+                Record = json.loads(Line)
+                (Messages if Record['Kind'] == 'Message' else Responses).append(Record)
+
+    # Return websocket messages and API responses
+    return Messages, Responses
+
+def Drain(wfpiconsole,Timeout=drainTimeout):
+
+    """ Runs the event loop until every queued message has been processed
+
+    INPUTS:
+        wfpiconsole         Headless console
+        Timeout             Maximum time to wait in seconds
+
+    OUTPUT:
+        Idle                True if every queued message has been processed
+    """
+
+    # Run event loop until observation queue is idle
+    Deadline = time.time() + Timeout
+    while time.time() < Deadline:
+        Clock.tick()
+        if wfpiconsole.obsQueue.Idle() and wfpiconsole.rapidWind.Pending is None:
+            return True
+        time.sleep(0.001)
+    return False
+
+def Replay(Path,Config,Fast=False):
+
+    """ Replays a recorded session through the websocket message pipeline
+    using a local stand-in for the WeatherFlow API
+
+    INPUTS:
+        Path                Path to session file
+        Config              Station configuration
+        Fast                Replay messages as fast as possible instead of in
+                            real time. Each message is fully processed before
+                            the next message is replayed
+
+    OUTPUT:
+        Report              Dictionary containing fields:
+                                Messages    Number of replayed messages
+                                Elapsed     Replay duration in seconds
+                                Rate        Messages per second
+                                Dropped     Number of dropped messages
+                                Stages      Latency of each pipeline stage
+    """
+
+    # Load recorded session and start local API stand-in
+    Messages, Responses = Load(Path)
+    standIn = StandIn(Responses)
+    metrics = Metrics()
+    Console = HeadlessConsole(Config,metrics)
+    if any(Record.get('Source') == 'UDP' for Record in Messages):
+        Console.Listener.getDevices()
+
+    # Replay each websocket message in turn
+    try:
+        Start = time.perf_counter()
+        First = Messages[0]['Time'] if Messages else 0
+        for Record in Messages:
+
+            # Wait until message is due if replaying in real time
+            if not Fast:
+                Due = Start + Record['Time'] - First
+                while time.perf_counter() < Due:
+                    Clock.tick()
+                    time.sleep(min(0.01,max(Due-time.perf_counter(),0)))
+
+            # Decode and route message. UDP hub messages are converted to the
+            # equivalent websocket message as part of the decode stage
+            Decode = time.perf_counter()
+            if Record.get('Source','Websocket') == 'UDP':
+                Msg = Console.Listener.convert(Record['Frame'].encode('utf8'))
+            else:
+                Msg = json.loads(Record['Frame'])
+            Route = time.perf_counter()
+            if Msg is not None:
+                Console.WebsocketDecodeMessage(Msg)
+            metrics.record('decode',Route-Decode)
+            metrics.record('route',time.perf_counter()-Route)
+
+            # Process message before replaying next message if required
+            if Fast:
+                Drain(Console)
+            else:
+                Clock.tick()
+
+        # Wait for remaining messages to be processed
+        Drain(Console)
+        Elapsed = time.perf_counter() - Start
+    finally:
+        standIn.close()
+
+    # Return replay report
+    Dropped = Console.obsQueue.Status()['Dropped'] + Console.rapidWind.Status()['Dropped']
+    return {'Messages': len(Messages),
+            'Elapsed':  Elapsed,
+            'Rate':     len(Messages)/Elapsed if Elapsed else float('NaN'),
+            'Dropped':  Dropped,
+            'Stages':   metrics.Report()}
+
+def printReport(Report):
+
+    """ Prints a replay report
+
+    INPUTS:
+        Report              Replay report
+    """
+
+    # Print message rate and latency of each pipeline stage
+    print('{} messages in {:.2f} s ({:.1f} messages/s, {} dropped)'.format(
+          Report['Messages'],Report['Elapsed'],Report['Rate'],Report['Dropped']))
+    print('{:<12}{:>8}{:>10}{:>10}{:>10}{:>10}'.format('Stage','Count','Mean ms','P50 ms','P95 ms','Max ms'))
+    for Stage, Stats in sorted(Report['Stages'].items()):
+        print('{:<12}{:>8}{:>10.3f}{:>10.3f}{:>10.3f}{:>10.3f}'.format(
+              Stage,Stats['Count'],Stats['Mean'],Stats['P50'],Stats['P95'],Stats['Max']))
+
+if __name__ == '__main__':
+
+    # Parse command line options
+    Parser = OptionParser(usage='python -m lib.replay [options] SESSION')
+    Parser.add_option('--fast', action='store_true', default=False,
+                      help='replay messages as fast as possible')
+    Parser.add_option('--config', default='wfpiconsole.ini', metavar='FILE',
+                      help='station configuration file')
+    Options, Args = Parser.parse_args()
+    if len(Args) != 1:
+        Parser.error('session file required')
+
+    # Load station configuration and replay session
+    Config = configparser.ConfigParser(allow_no_value=True)
+    Config.optionxform = str
+    Config.read(Options.config)
+    printReport(Replay(Args[0],Config,Options.fast))
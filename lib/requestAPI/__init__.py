@@ -1,3 +1,4 @@
+import lib.requestAPI.session
 import lib.requestAPI.weatherflow
 import lib.requestAPI.checkWX
 import lib.requestAPI.github
\ No newline at end of file
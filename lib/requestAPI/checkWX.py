@@ -16,7 +16,25 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 # Import required modules
-import requests
+from lib.requestAPI import session
+
+def retryDelay(Config,Default):
+
+    """ Returns the delay before a failed CheckWX METAR request should be
+    retried
+
+    INPUTS:
+        Config              Station configuration
+        Default             Retry delay when API is healthy in seconds
+
+    OUTPUT:
+        Delay               Retry delay in seconds
+    """
+
+    # Return retry delay for CheckWX METAR endpoint
+    Template = 'https://api.checkwx.com/metar/lat/{}/lon/{}/'
+    URL = Template.format(Config['Station']['Latitude'],Config['Station']['Longitude'])
+    return session.retryDelay(URL,Default)
 
 def verifyResponse(Response,Field):
 
@@ -30,23 +48,15 @@ def verifyResponse(Response,Field):
         Flag            True or False flag confirming validity of response
 
     """
-    if Response is None:
-        return False
-    if not Response.ok:
-        return False
-    try:
-        Response.json()
-    except ValueError:
+
+    # Verify API response has been decoded and contains required field
+    if Response is None or not Response.ok:
         return False
-    else:
-        Response = Response.json()
-        if isinstance(Response,dict):
-            if Field in Response and Response[Field] is not None:
-                return True
-            else:
-                return False
-        else:
-            return False
+    Payload = Response.Payload
+    if isinstance(Payload,dict) and Field in Payload and Payload[Field] is not None:
+        return True
+    Response.Reason = 'Missing ' + Field
+    return False
 
 def METAR(Config):
 
@@ -66,10 +76,7 @@ def METAR(Config):
     header = {'X-API-Key':Config['Keys']['CheckWX']}
     Template = 'https://api.checkwx.com/metar/lat/{}/lon/{}/'
     URL = Template.format(Config['Station']['Latitude'],Config['Station']['Longitude'])
-    try:
-        Data = requests.get(URL,headers=header,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config,header)
 
     # Return closest METAR report to station location
     return Data
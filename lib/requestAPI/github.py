@@ -16,7 +16,24 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 # Import required modules
-import requests
+from lib.requestAPI import session
+
+def retryDelay(Default):
+
+    """ Returns the delay before a failed Github release request should be
+    retried
+
+    INPUTS:
+        Default             Retry delay when API is healthy in seconds
+
+    OUTPUT:
+        Delay               Retry delay in seconds
+    """
+
+    # Return retry delay for Github release endpoint
+    Template = 'https://api.github.com/repos/{}/{}/releases/latest'
+    URL = Template.format('peted-davis','WeatherFlow_PiConsole')
+    return session.retryDelay(URL,Default)
 
 def verifyResponse(Response,Field):
 
@@ -30,23 +47,15 @@ def verifyResponse(Response,Field):
         Flag            True or False flag confirming validity of response
 
     """
-    if Response is None:
-        return False
-    if not Response.ok:
-        return False
-    try:
-        Response.json()
-    except ValueError:
+
+    # Verify API response has been decoded and contains required field
+    if Response is None or not Response.ok:
         return False
-    else:
-        Response = Response.json()
-        if isinstance(Response,dict):
-            if Field in Response and Response[Field] is not None:
-                return True
-            else:
-                return False
-        else:
-            return False
+    Payload = Response.Payload
+    if isinstance(Payload,dict) and Field in Payload and Payload[Field] is not None:
+        return True
+    Response.Reason = 'Missing ' + Field
+    return False
 
 def version(Config):
 
@@ -65,10 +74,7 @@ def version(Config):
     header = {'Accept': 'application/vnd.github.v3+json'}
     Template = 'https://api.github.com/repos/{}/{}/releases/latest'
     URL = Template.format('peted-davis','WeatherFlow_PiConsole')
-    try:
-        Data = requests.get(URL,headers=header,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config,header)
 
     # Return latest version info from Github
     return Data
@@ -0,0 +1,298 @@
+""" Returns the pooled HTTP session used for all API requests made by the
+Raspberry Pi Python console for WeatherFlow Tempest and Smart Home Weather
+stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required modules
+from requests.adapters  import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse       import urlparse
+import numpy as np
+import threading
+import requests
+import random
+import time
+
+# Import fastest available JSON decoder
+try:
+    import orjson as jsonDecoder
+except ImportError:
+    try:
+        import ujson as jsonDecoder
+    except ImportError:
+        import json as jsonDecoder
+
+# Define global variables
+httpSession = None
+sessionLock = threading.Lock()
+healthLock  = threading.Lock()
+Health      = {}
+
+# Define local stand-in servers that replace API hosts, and the recorder that
+# captures API responses. Both are set by the replay harness
+hostOverrides = {}
+Recorder      = None
+
+# Define number of consecutive failures that open the circuit for an endpoint,
+# the base and maximum backoff before the endpoint is retried in seconds, and
+# the HTTP status codes that count as an endpoint failure
+failureLimit = 3
+backoffBase  = 30
+backoffMax   = 3600
+failureCodes = [429,500,502,503,504]
+
+class EndpointHealth():
+
+    """ Tracks the health of a single API endpoint. After failureLimit
+    consecutive failures the circuit is opened and requests fail immediately
+    until a jittered exponential backoff has elapsed. A single request is then
+    allowed through to probe the endpoint. A successful probe closes the
+    circuit, while a failed probe reopens it with a doubled backoff. Each
+    endpoint is identified by its host and path, so that a failing endpoint
+    does not open the circuit for other endpoints on the same host
+    """
+
+    def __init__(self):
+
+        # Define consecutive failures, time of next permitted request, and
+        # probe flag
+        self.Failures  = 0
+        self.retryTime = 0
+        self.Probing   = False
+        self.Lock      = threading.Lock()
+
+    def allow(self):
+
+        """ Returns True if a request can be sent to the endpoint
+        """
+
+        # Allow request if circuit is closed, or if backoff has elapsed and no
+        # probe request is in progress
+        with self.Lock:
+            if self.Failures < failureLimit:
+                return True
+            if self.Probing or time.time() < self.retryTime:
+                return False
+            self.Probing = True
+            return True
+
+    def success(self):
+
+        """ Records a successful request and closes the circuit
+        """
+
+        # Reset consecutive failures
+        with self.Lock:
+            self.Failures = 0
+            self.Probing  = False
+
+    def failure(self):
+
+        """ Records a failed request and sets the time of the next permitted
+        request using a jittered exponential backoff
+        """
+
+        # Increment consecutive failures and define backoff. The backoff
+        # starts at backoffBase when the circuit opens, and doubles with each
+        # failed probe
+        with self.Lock:
+            self.Failures += 1
+            self.Probing   = False
+            Backoff = min(backoffMax,backoffBase*2**max(self.Failures-failureLimit,0))
+            self.retryTime = time.time() + random.uniform(Backoff/2,Backoff)
+
+    def retryDelay(self,Default):
+
+        """ Returns the delay before a failed request to the endpoint should be
+        retried
+
+        INPUTS:
+            Default             Retry delay when endpoint is healthy in seconds
+
+        OUTPUT:
+            Delay               Retry delay in seconds
+        """
+
+        # Return time until next permitted request, limited to the default
+        # retry delay
+        with self.Lock:
+            if self.Failures == 0:
+                return Default
+            return min(Default,max(self.retryTime-time.time(),1))
+
+def endpointHealth(URL):
+
+    """ Returns the health tracker for the endpoint serving the specified URL,
+    creating the tracker on first use
+
+    INPUTS:
+        URL                 Request URL
+
+    OUTPUT:
+        Tracker             Endpoint health tracker
+    """
+
+    # Return health tracker for endpoint host and path
+    Parts    = urlparse(URL)
+    Endpoint = Parts.netloc + Parts.path
+    with healthLock:
+        if Endpoint not in Health:
+            Health[Endpoint] = EndpointHealth()
+        return Health[Endpoint]
+
+def retryDelay(URL,Default):
+
+    """ Returns the delay before a failed request to the endpoint serving the
+    specified URL should be retried
+
+    INPUTS:
+        URL                 Request URL
+        Default             Retry delay when endpoint is healthy in seconds
+
+    OUTPUT:
+        Delay               Retry delay in seconds
+    """
+
+    # Return retry delay for endpoint
+    return endpointHealth(URL).retryDelay(Default)
+
+class APIResponse():
+
+    """ API response that is decoded once when it is received. Holds the HTTP
+    status, the decoded JSON payload, the observations decoded into columns,
+    and the reason the response is invalid
+    """
+
+    __slots__ = ('Status','ok','Payload','Reason','_Columns')
+
+    def __init__(self,Response,Reason='Request failed'):
+
+        # Define HTTP status and decode JSON payload
+        self.Payload  = None
+        self.Reason   = None
+        self._Columns = None
+        if Response is None:
+            self.Status = None
+            self.ok     = False
+            self.Reason = Reason
+            return
+        self.Status = Response.status_code
+        self.ok     = Response.ok
+        if not self.ok:
+            self.Reason = 'HTTP status ' + str(self.Status)
+        try:
+            self.Payload = jsonDecoder.loads(Response.content)
+        except:
+            self.ok     = False
+            self.Reason = 'Invalid JSON'
+
+    def json(self):
+
+        """ Returns the decoded JSON payload
+        """
+        return self.Payload
+
+    def Columns(self):
+
+        """ Returns the observations in the payload as a typed NumPy array,
+        with one column per observation field. Missing observations are set to
+        NaN. The array is built once on first use
+
+        OUTPUT:
+            Columns             Observations as a 2D NumPy array
+        """
+
+        # Convert observations into typed NumPy array
+        if self._Columns is None:
+            Obs = self.Payload['obs'] if isinstance(self.Payload,dict) and self.Payload.get('obs') else []
+            if Obs:
+                self._Columns = np.array(Obs,dtype=np.float64)
+            else:
+                self._Columns = np.empty((0,1))
+
+        # Return observations as typed NumPy array
+        return self._Columns
+
+def Session():
+
+    """ Returns the pooled HTTP session shared by all API requests, creating
+    the session on first use. Connections are kept alive and reused for each
+    host. Failed requests are not retried by the session, as retries and
+    backoff are handled by the circuit breaker for each endpoint
+
+    OUTPUT:
+        Session             Pooled HTTP session
+    """
+
+    # Create pooled HTTP session if required. Failed requests are not retried,
+    # so that every failure is counted by the endpoint circuit breaker and
+    # costs at most one timeout
+    global httpSession
+    with sessionLock:
+        if httpSession is None:
+            Retries = Retry(total=0, raise_on_status=False)
+            Adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retries)
+            httpSession = requests.Session()
+            httpSession.mount('https://',Adapter)
+            httpSession.mount('http://', Adapter)
+            httpSession.headers.update({'Accept-Encoding': 'gzip, deflate'})
+
+    # Return pooled HTTP session
+    return httpSession
+
+def Get(URL,Config,Headers=None):
+
+    """ Sends a GET request using the pooled HTTP session. Requests to an
+    endpoint with an open circuit fail immediately without being sent
+
+    INPUTS:
+        URL                 Request URL
+        Config              Station configuration
+        Headers             Optional request headers
+
+    OUTPUT:
+        Response            Decoded API response. Reason is set if the request
+                            has failed
+    """
+
+    # Fail immediately if circuit is open for endpoint
+    Tracker = endpointHealth(URL)
+    if not Tracker.allow():
+        return APIResponse(None,'Circuit open')
+
+    # Send request to local stand-in server if one replaces the API host
+    Parts = urlparse(URL)
+    if Parts.netloc in hostOverrides:
+        URL = Parts._replace(scheme='http',netloc=hostOverrides[Parts.netloc]).geturl()
+
+    # Send GET request using pooled HTTP session
+    try:
+        Data = Session().get(URL,headers=Headers,timeout=int(Config['System']['Timeout']))
+    except:
+        Data = None
+
+    # Record health of endpoint
+    if Data is None or Data.status_code in failureCodes:
+        Tracker.failure()
+    else:
+        Tracker.success()
+
+    # Record API response if required
+    if Recorder is not None and Data is not None:
+        Recorder.response(Parts.geturl(),Data)
+
+    # Return decoded API response
+    return APIResponse(Data)
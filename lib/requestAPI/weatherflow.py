@@ -17,9 +17,24 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 # Import required modules
 from datetime   import datetime, date, time, timedelta
-import requests
+from lib.requestAPI import session
 import pytz
 
+def retryDelay(Endpoint,Default):
+
+    """ Returns the delay before a failed WeatherFlow API request should be retried
+
+    INPUTS:
+        Endpoint            Path of API endpoint relative to /swd/rest/
+        Default             Retry delay when API is healthy in seconds
+
+    OUTPUT:
+        Delay               Retry delay in seconds
+    """
+
+    # Return retry delay for WeatherFlow API endpoint
+    return session.retryDelay('https://swd.weatherflow.com/swd/rest/' + Endpoint,Default)
+
 def verifyResponse(Response,Field):
 
     """ Verifies the validity of the API response response
@@ -32,23 +47,19 @@ def verifyResponse(Response,Field):
         Flag            True or False flag confirming validity of response
 
     """
-    if Response is None:
-        return False
-    if not Response.ok:
-        return False
-    try:
-        Response.json()
-    except ValueError:
+
+    # Verify API response has been decoded and contains required field
+    if Response is None or not Response.ok:
         return False
+    Payload = Response.Payload
+    if isinstance(Payload,dict):
+        Status = Payload.get('status') or {}
+        if 'SUCCESS' in str(Status.get('status_message')) and Field in Payload and Payload[Field] is not None:
+            return True
+        Response.Reason = str(Status.get('status_message','Missing ' + Field))
     else:
-        Response = Response.json()
-        if isinstance(Response,dict):
-            if 'SUCCESS' in Response['status']['status_message'] and Field in Response and Response[Field] is not None:
-                return True
-            else:
-                return False
-        else:
-            return False
+        Response.Reason = 'Unexpected response'
+    return False
 
 def Last3h(Device,endTime,Config):
 
@@ -70,10 +81,7 @@ def Last3h(Device,endTime,Config):
     # Download WeatherFlow data for last three hours
     Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&api_key={}'
     URL = Template.format(Device,startTime,endTime,Config['Keys']['WeatherFlow'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return observations from the last three hours
     return Data
@@ -98,10 +106,7 @@ def Last6h(Device,endTime,Config):
     # Download WeatherFlow data for last three hours
     Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&api_key={}'
     URL = Template.format(Device,startTime,endTime,Config['Keys']['WeatherFlow'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return observations from the last three hours
     return Data
@@ -126,10 +131,7 @@ def Last24h(Device,endTime,Config):
     # Download WeatherFlow data for last three hours
     Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&api_key={}'
     URL = Template.format(Device,startTime,endTime,Config['Keys']['WeatherFlow'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return observations from the last three hours
     return Data
@@ -162,10 +164,7 @@ def Today(Device,Config):
     # Download WeatherFlow data
     Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&api_key={}'
     URL = Template.format(Device,startTime,endTime,Config['Keys']['WeatherFlow'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return observations from today
     return Data
@@ -200,10 +199,7 @@ def Yesterday(Device,Config):
     # Download WeatherFlow data
     Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&api_key={}'
     URL = Template.format(Device,startTime,endTime,Config['Keys']['WeatherFlow'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return observations from yesterday
     return Data
@@ -236,10 +232,7 @@ def Month(Device,Config):
     # Download WeatherFlow data
     Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&api_key={}'
     URL = Template.format(Device,startTime,endTime,Config['Keys']['WeatherFlow'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return observations from the last month
     return Data
@@ -272,14 +265,35 @@ def Year(Device,Config):
     # Download WeatherFlow data
     Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&api_key={}'
     URL = Template.format(Device,startTime,endTime,Config['Keys']['WeatherFlow'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return observations from the last year
     return Data
 
+def Period(Device,startTime,endTime,Config):
+
+    """ API Request for data between two specified times from a WeatherFlow
+        Smart Home Weather Station device
+
+    INPUTS:
+        Device              Device ID
+        startTime           Start time of window as a UNIX timestamp
+        endTime             End time of window as a UNIX timestamp
+        Config              Station configuration
+
+    OUTPUT:
+        Response            API response containing observations between the
+                            start and end times
+    """
+
+    # Download WeatherFlow data
+    Template = 'https://swd.weatherflow.com/swd/rest/observations/device/{}?time_start={}&time_end={}&api_key={}'
+    URL = Template.format(Device,startTime,endTime,Config['Keys']['WeatherFlow'])
+    Data = session.Get(URL,Config)
+
+    # Return observations between the start and end times
+    return Data
+
 def stationMetaData(Station,Config):
 
     """ API Request for station meta data from a WeatherFlow Smart Home Weather
@@ -296,10 +310,7 @@ def stationMetaData(Station,Config):
     # Download station meta data
     Template = 'https://swd.weatherflow.com/swd/rest/stations/{}?api_key={}'
     URL = Template.format(Station,Config['Keys']['WeatherFlow'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return station meta data
     return Data
@@ -318,10 +329,7 @@ def Forecast(Config):
     # Download WeatherFlow forecast
     Template = 'https://swd.weatherflow.com/swd/rest/better_forecast?api_key={}&station_id={}&lat={}&lon={}'
     URL = Template.format(Config['Keys']['WeatherFlow'],Config['Station']['StationID'],Config['Station']['Latitude'],Config['Station']['Longitude'])
-    try:
-        Data = requests.get(URL,timeout=int(Config['System']['Timeout']))
-    except:
-        Data = None
+    Data = session.Get(URL,Config)
 
     # Return WeatherFlow forecast data
     return Data
\ No newline at end of file
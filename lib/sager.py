@@ -22,12 +22,15 @@ http://www.freewebs.com/btjustice/bt-forecasters.html
 
 # Import required library modules
 from lib         import derivedVariables  as derive
+from lib         import stationContext
 from lib         import requestAPI
+from lib         import taskRunner
 
 # Import required modules
-from kivy.clock  import Clock
 from datetime    import datetime, timedelta, time
 import time      as UNIX
+import functools
+import bisect
 import numpy     as np
 import requests
 import math
@@ -36,26 +39,94 @@ import pytz
 # Define global variables
 NaN = float('NaN')
 
+# Define Sager Weathercaster lookup tables. Wind directions are listed in
+# clockwise order, with the sector boundaries in degrees between each direction
+sagerDirections = ['N','NE','E','SE','S','SW','W','NW']
+sagerSectors    = [22.5,67.5,112.5,157.5,202.5,247.5,292.5,337.5]
+
+# Define change in wind direction over the last 6 hours based on the number of
+# clockwise sectors between the current direction and the direction 6 hours ago:
+#   - Backing changing counter-clockwise
+#   - Steady same direction or opposite direction
+#   - Veering changing clockwise
+sagerWindChange = ['Steady','Backing','Backing','Backing','Steady','Veering','Veering','Veering']
+
+# Define Wind Dial position for each wind direction and change in wind
+# direction. The Sager Weathercaster is designed for use in the Northern
+# Temperate Zone. The relationship between the wind direction and the setting
+# on the Wind Dial changes with latitude due to the Coriolis effect
+sagerWindDial = {}
+for Zone,Order in {'NorthPolarTropical': ['S','SW','W','NW','N','NE','E','SE'],
+                   'NorthTemperate':     ['N','NE','E','SE','S','SW','W','NW'],
+                   'SouthPolarTropical': ['N','NW','W','SW','S','SE','E','NE'],
+                   'SouthTemperate':     ['S','SE','E','NE','N','NW','W','SW']}.items():
+    for Direction,Letters in zip(Order,['ABC','DEF','GHJ','KLM','NOP','QRS','TUV','WXY']):
+        for Change,Letter in zip(['Backing','Steady','Veering'],Letters):
+            sagerWindDial[(Zone,Direction,Change)] = Letter
+    sagerWindDial[(Zone,'Calm','Calm')] = 'Z'
+
+# Define lower pressure bound in hPa of each Barometer Dial position from 7 to 1
+sagerPressure = [975.3,988.8,999.0,1005.8,1012.5,1019.3,1029.5]
+
+# Define METAR Cloud Codes and the corresponding Present Weather Dial position
+sagerCloudCodes = ['CAVOK','CLR','NCD','NSC','SKC','FEW','SCT','BKN','OVC','VV']
+sagerCloudDial  = {'CAVOK': '1', 'CLR': '1', 'NCD': '1', 'NSC': '1', 'SKC': '1',
+                   'FEW':   '2', 'SCT': '2', 'BKN': '3', 'OVC': '4', 'VV':  '5'}
+
 # Define circular mean
 def CircularMean(angles):
     angles = np.radians(angles)
     r = np.nanmean(np.exp(1j*angles))
     return np.angle(r, deg=True) % 360
 
-def Generate(sagerDict,Config):
+def Generate(sagerDict,Config,Delay=0):
+
+    ''' Generates the Sager Weathercaster forecast in the background task
+    runner. The forecast is delivered to sagerDict on the main thread
+
+    INPUTS:
+        sagerDict               Dictionary to hold the forecast information
+        Config                  Station configuration
+        Delay                   Delay before forecast is queued in seconds
+    '''
+
+    # Queue Sager Weathercaster forecast after specified delay
+    taskRunner.Tasks.schedule('Sager',functools.partial(Calculate,Config),functools.partial(Update,sagerDict,Config),Delay)
+
+def Update(sagerDict,Config,Result):
 
-    ''' Generates the Sager Weathercaster forecast based on the current weather
-    conditions and the trend in conditions over the previous 6 hours.
+    ''' Updates the Sager Weathercaster forecast on the main thread and
+    schedules generation of the next forecast
 
     INPUTS:
         sagerDict               Dictionary to hold the forecast information
         Config                  Station configuration
+        Result                  Sager Weathercaster forecast and time until
+                                next forecast in seconds
+    '''
+
+    # Update Sager Weathercaster forecast and schedule next forecast
+    Sager, Seconds = Result
+    sagerDict.update(Sager)
+    Generate(sagerDict,Config,Seconds)
+
+def Calculate(Config):
+
+    ''' Calculates the Sager Weathercaster forecast based on the current
+    weather conditions and the trend in conditions over the previous 6 hours.
+
+    INPUTS:
+        Config                  Station configuration
 
     OUTPUT:
         sagerDict               Dictionary containing the Sager Weathercaster
                                 forecast
+        Seconds                 Time until next forecast in seconds
     '''
 
+    # Define dictionary to hold the forecast information
+    sagerDict = {}
+
     # Get station timezone and current UNIX timestamp in UTC
     Now = int(UNIX.time())
     Tz  = pytz.timezone(Config['Station']['Timezone'])
@@ -72,10 +143,7 @@ def Generate(sagerDict,Config):
         Obs = {}
         getTempestData(Obs,Now,Config)
         if not Obs:
-            sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing TEMPEST data. Forecast will be regenerated in 60 minutes'
-            sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-            Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-            return sagerDict
+            return apiError(sagerDict,'Missing TEMPEST data',requestAPI.weatherflow.retryDelay('observations/device/' + Config['Station']['TempestID'],3600),Tz)
 
     # If applicable, download wind and rain data from last 6 hours from SKY
     # module. If API call fails, return missing data error message
@@ -83,10 +151,7 @@ def Generate(sagerDict,Config):
         Obs = {}
         getSkyData(Obs,Now,Config)
         if not Obs:
-            sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing SKY data. Forecast will be regenerated in 60 minutes'
-            sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-            Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-            return sagerDict
+            return apiError(sagerDict,'Missing SKY data',requestAPI.weatherflow.retryDelay('observations/device/' + Config['Station']['SkyID'],3600),Tz)
 
     # DERIVE REQUIRED WIND AND RAINFALL VARIABLES FROM TEMPEST OR SKY DATA
     # --------------------------------------------------------------------------
@@ -104,8 +169,7 @@ def Generate(sagerDict,Config):
     if np.all(np.isnan(WindDir6)) or np.all(np.isnan(WindDir)):
         sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing wind direction data. Forecast will be regenerated in 60 minutes'
         sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-        Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-        return sagerDict
+        return sagerDict, 3600
     else:
         sagerDict['WindDir6'] = CircularMean(WindDir6)
         sagerDict['WindDir']  = CircularMean(WindDir)
@@ -117,8 +181,7 @@ def Generate(sagerDict,Config):
     if np.all(np.isnan(WindSpd6)) or np.all(np.isnan(WindSpd)):
         sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing wind speed data. Forecast will be regenerated in 60 minutes'
         sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-        Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-        return sagerDict
+        return sagerDict, 3600
     else:
         sagerDict['WindSpd6'] = np.nanmean(WindSpd6)
         sagerDict['WindSpd']  = np.nanmean(WindSpd)
@@ -141,10 +204,7 @@ def Generate(sagerDict,Config):
         Obs = {}
         getAirData(Obs,Now,Config)
         if not Obs:
-            sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing AIR data. Forecast will be regenerated in 60 minutes'
-            sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-            Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-            return sagerDict
+            return apiError(sagerDict,'Missing AIR data',requestAPI.weatherflow.retryDelay('observations/device/' + Config['Station']['OutAirID'],3600),Tz)
 
     # DERIVE REQUIRED TEMPERATURE AND PRESSURE VARIABLES FROM TEMPEST OR AIR
     # DATA
@@ -160,11 +220,11 @@ def Generate(sagerDict,Config):
     if np.all(np.isnan(Pres6)) or np.all(np.isnan(Pres)):
         sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing pressure data. Forecast will be regenerated in 60 minutes'
         sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-        Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-        return sagerDict
+        return sagerDict, 3600
     else:
-        sagerDict['Pres6'] = derive.SLP([np.nanmean(Pres6).tolist(),'mb'], Config)[0]
-        sagerDict['Pres']  = derive.SLP([np.nanmean(Pres).tolist(),'mb'], Config)[0]
+        Context = stationContext.StationContext(Config)
+        sagerDict['Pres6'] = derive.SLP([np.nanmean(Pres6).tolist(),'mb'], Context)[0]
+        sagerDict['Pres']  = derive.SLP([np.nanmean(Pres).tolist(),'mb'], Context)[0]
 
     # Define required temperature variables for the Sager Weathercaster
     # Forecast
@@ -172,8 +232,7 @@ def Generate(sagerDict,Config):
     if np.all(np.isnan(Temp)):
         sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing temperature data. Forecast will be regenerated in 60 minutes'
         sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-        Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-        return sagerDict
+        return sagerDict, 3600
     else:
         sagerDict['Temp'] = np.nanmean(Temp)
 
@@ -183,10 +242,7 @@ def Generate(sagerDict,Config):
     if requestAPI.checkWX.verifyResponse(Data,'data'):
         sagerDict['METAR'] = Data.json()['data'][0]
     else:
-        sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Missing METAR information. Forecast will be regenerated in 60 minutes'
-        sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-        Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-        return sagerDict
+        return apiError(sagerDict,'Missing METAR information',requestAPI.checkWX.retryDelay(Config,3600),Tz)
 
     # DERIVCE SAGER WEATHERCASTER FORECAST
     # --------------------------------------------------------------------------
@@ -197,8 +253,7 @@ def Generate(sagerDict,Config):
     else:
         sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] Forecast will be regenerated in 60 minutes'
         sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
-        Clock.schedule_once(lambda dt: Generate(sagerDict,Config),3600)
-        return sagerDict
+        return sagerDict, 3600
 
     # SCHEDULE GENERATION OF NEXT SAGER WEATHERCASTER FORECAST
     # --------------------------------------------------------------------------
@@ -216,10 +271,33 @@ def Generate(sagerDict,Config):
         Time = time(6,0,0)
         ForecastTime = Tz.localize(datetime.combine(Date,Time))
     Seconds = (ForecastTime - Now).total_seconds()
-    Clock.schedule_once(lambda dt: Generate(sagerDict,Config), Seconds)
 
-    # Return Sager Weathercaster forecast
-    return sagerDict
+    # Return Sager Weathercaster forecast and time until next forecast
+    return sagerDict, Seconds
+
+def apiError(sagerDict,Error,Seconds,Tz):
+
+    ''' Sets the Sager Weathercaster forecast to an error message when an API
+    request has failed
+
+    INPUTS:
+        sagerDict               Dictionary to hold the forecast information
+        Error                   Error message
+        Seconds                 Time until next forecast in seconds
+        Tz                      Station timezone
+
+    OUTPUT:
+        sagerDict               Dictionary containing the error message
+        Seconds                 Time until next forecast in seconds
+    '''
+
+    # Set error message and time until next forecast
+    Minutes = max(int(round(Seconds/60)),1)
+    sagerDict['Forecast'] = '[color=f05e40ff]ERROR:[/color] ' + Error + '. Forecast will be regenerated in ' + str(Minutes) + (' minutes' if Minutes > 1 else ' minute')
+    sagerDict['Issued']   = datetime.now(pytz.utc).astimezone(Tz).strftime('%H:%M')
+
+    # Return error message and time until next forecast
+    return sagerDict, Seconds
 
 def getTempestData(Obs,Now,Config):
 
@@ -228,13 +306,14 @@ def getTempestData(Obs,Now,Config):
 
     # Extract observation times, wind speed, wind direction, and rainfall if API
     # call has not failed
-    if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-        Obs['Time']    = [item[0] if item[0]   != None else NaN for item in Data.json()['obs']]
-        Obs['WindSpd'] = [item[2] if item[2]   != None else NaN for item in Data.json()['obs']]
-        Obs['WindDir'] = [item[4] if item[4]   != None else NaN for item in Data.json()['obs']]
-        Obs['Pres']    = [item[6] if item[7]   != None else NaN for item in Data.json()['obs']]
-        Obs['Temp']    = [item[6] if item[7]   != None else NaN for item in Data.json()['obs']]
-        Obs['Rain']    = [item[12] if item[12] != None else NaN for item in Data.json()['obs']]
+    if requestAPI.weatherflow.verifyResponse(Data,'obs') and Data.Columns().shape[1] > 12:
+        Columns = Data.Columns()
+        Obs['Time']    = Columns[:,0]
+        Obs['WindSpd'] = Columns[:,2]
+        Obs['WindDir'] = Columns[:,4]
+        Obs['Pres']    = Columns[:,6]
+        Obs['Temp']    = Columns[:,7]
+        Obs['Rain']    = Columns[:,12]
 
 def getSkyData(Obs,Now,Config):
 
@@ -243,11 +322,12 @@ def getSkyData(Obs,Now,Config):
 
     # Extract observation times, wind speed, wind direction, and rainfall if API
     # call has not failed
-    if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-        Obs['Time']    = [item[0] if item[0] != None else NaN for item in Data.json()['obs']]
-        Obs['WindSpd'] = [item[5] if item[5] != None else NaN for item in Data.json()['obs']]
-        Obs['WindDir'] = [item[7] if item[7] != None else NaN for item in Data.json()['obs']]
-        Obs['Rain']    = [item[3] if item[3] != None else NaN for item in Data.json()['obs']]
+    if requestAPI.weatherflow.verifyResponse(Data,'obs') and Data.Columns().shape[1] > 7:
+        Columns = Data.Columns()
+        Obs['Time']    = Columns[:,0]
+        Obs['WindSpd'] = Columns[:,5]
+        Obs['WindDir'] = Columns[:,7]
+        Obs['Rain']    = Columns[:,3]
 
 def getAirData(Obs,Now,Config):
 
@@ -256,16 +336,18 @@ def getAirData(Obs,Now,Config):
 
     # Extract observation times, pressure and temperature if API # call has not
     # failed
-    if requestAPI.weatherflow.verifyResponse(Data,'obs'):
-        Obs['Time'] = [item[0] if item[0] != None else NaN for item in Data.json()['obs']]
-        Obs['Pres'] = [item[1] if item[1] != None else NaN for item in Data.json()['obs']]
-        Obs['Temp'] = [item[2] if item[2] != None else NaN for item in Data.json()['obs']]
+    if requestAPI.weatherflow.verifyResponse(Data,'obs') and Data.Columns().shape[1] > 2:
+        Columns = Data.Columns()
+        Obs['Time'] = Columns[:,0]
+        Obs['Pres'] = Columns[:,1]
+        Obs['Temp'] = Columns[:,2]
 
 def dialSetting(Met):
 
     ''' Calculates the position of the Sager Weathercaster Dial based on the
     current weather conditions and the trend in conditions over the previous 6
-    hours.
+    hours. Each dial position is resolved in constant time from the Sager
+    Weathercaster lookup tables.
 
     INPUTS:
         Met                     Dictionary containing the following fields:
@@ -299,476 +381,119 @@ def dialSetting(Met):
     t = Met['Temp']                             # Current temperature
     METAR = Met['METAR']                        # Closet METAR information to station location
 
-    # Define required variables
-    ccode  = {}
-    pcode  = {}
-    pcodes = ['FZDZ','FZRA','SHGR','SHGS','SHPL','SHRA','SHSN','TSGR','TSGS','TSPL','TSRA',
-              'TSSN','VCSH','VCTS','DZ','GR','GS','IC','PL','RA','SG','SN','UP']
-    ccodes = ['CAVOK','CLR','NCD','NSC','SKC','FEW','SCT','BKN','OVC','VV']               
-
-    # Searches METAR information for Cloud Codes
-    Ind = {}
-    try:
-        for count,code in enumerate(ccodes):
-            if METAR.find(code) != -1:
-                Ind[count] = METAR.find(code)
-    except:
-        return None
-    if len(Ind) != 0:
-        ccode = ccodes[min(Ind,key=Ind.get)]
-
-    # Searches METAR information for Precipitation Codes
+    # Searches METAR information for the first reported Cloud Code
+    ccode = None
     Ind = {}
     try:
-        for count,code in enumerate(pcodes):
+        for count,code in enumerate(sagerCloudCodes):
             if METAR.find(code) != -1:
                 Ind[count] = METAR.find(code)
     except:
         return None
     if len(Ind) != 0:
-        pcode = pcodes[min(Ind,key=Ind.get)]
-
-    # Determines the Present Weather result used with The Sager Weathercaster:
-    if len(pcode) > 0:
-        pw = 'Precipitation'
-    if ccode == 'CAVOK' or ccode == 'CLR' or ccode == 'NCD' or ccode == 'NSC' or ccode == 'SKC':
-        pw = 'Clear'
-    elif ccode == 'FEW' or ccode == 'SCT':
-        pw = 'Partly Cloudy'
-    elif ccode == 'BKN':
-        pw = 'Mostly Cloudy'
-    elif ccode == 'OVC':
-        pw = 'Overcast'
-    elif ccode == 'VV':
-        pw = 'Precipitation'
-    else:
-        pw = None
+        ccode = sagerCloudCodes[min(Ind,key=Ind.get)]
 
-    # Convert the average wind direction in degrees from 6 hours
-    # ago into a direction. An average direction of exactly zero
-    # is assumed to indicate calm conditions
-    if ws6 <= 1:
-        wd6 = 'Calm'
-    elif wd6 >= 0 and wd6 < 22.5 or wd6 >= 337.5:
-        wd6 = 'N'
-    elif wd6 >= 22.5 and wd6 < 67.5:
-        wd6 = 'NE'
-    elif wd6 >= 67.5 and wd6 < 112.5:
-        wd6 = 'E'
-    elif wd6 >= 112.5 and wd6 < 157.5:
-        wd6 = 'SE'
-    elif wd6 >= 157.5 and wd6 < 202.5:
-        wd6 = 'S'
-    elif wd6 >= 202.5 and wd6 < 247.5:
-        wd6 = 'SW'
-    elif wd6 >= 247.5 and wd6 < 292.5:
-        wd6 = 'W'
-    elif wd6 >= 292.5 and wd6 < 337.5:
-        wd6 = 'NW'
+    # Convert the current average wind direction and the average wind direction
+    # from 6 hours ago into compass directions
+    wd  = windSector(wd, ws)
+    wd6 = windSector(wd6,ws6)
 
-    # Convert the current average wind direction in degrees into
-    # a direction. An average direction of exactly zero is
-    # assumed to indicate calm conditions
-    if ws <= 1:
-        wd = 'Calm'
-    elif wd >= 0 and wd < 22.5 or wd >= 337.5:
-        wd = 'N'
-    elif wd >= 22.5 and wd < 67.5:
-        wd = 'NE'
-    elif wd >= 67.5 and wd < 112.5:
-        wd = 'E'
-    elif wd >= 112.5 and wd < 157.5:
-        wd = 'SE'
-    elif wd >= 157.5 and wd < 202.5:
-        wd = 'S'
-    elif wd >= 202.5 and wd < 247.5:
-        wd = 'SW'
-    elif wd >= 247.5 and wd < 292.5:
-        wd = 'W'
-    elif wd >= 292.5 and wd < 337.5:
-        wd = 'NW'
-
-    # Compare the change in wind direction over the last 6 hours
-    # to determine if the wind is:
-    #   - Backing changing counter-clockwise
-    #   - Steady same direction or opposite direction
-    #   - Veering changing clockwise
-    #   - Calm
-    if wd == 'N':
-        if wd6 == 'NE' or wd6 == 'E' or wd6 == 'SE':
-            wdc = 'Backing'
-        elif wd6 == 'N' or wd6 == 'S' or wd6 == 'Calm':
-            wdc = 'Steady'
-        elif wd6 == 'NW' or wd6 == 'W' or wd6 == 'SW':
-            wdc = 'Veering'
-    elif wd == 'NE':
-        if wd6 == 'E' or wd6 == 'SE' or wd6 == 'S':
-            wdc = 'Backing'
-        elif wd6 == 'NE' or wd6 == 'SW' or wd6 == 'Calm':
-            wdc = 'Steady'
-        elif wd6 == 'N' or wd6 == 'NW' or wd6 == 'W':
-            wdc = 'Veering'
-    elif wd == 'E':
-        if wd6 == 'SE' or wd6 == 'S' or wd6 == 'SW':
-            wdc = 'Backing'
-        elif wd6 == 'E' or wd6 == 'W' or wd6 == 'Calm':
-            wdc = 'Steady'
-        elif wd6 == 'NE' or wd6 == 'N' or wd6 == 'NW':
-            wdc = 'Veering'
-    elif wd == 'SE':
-        if wd6 == 'S' or wd6 == 'SW' or wd6 == 'W':
-            wdc = 'Backing'
-        elif wd6 == 'SE' or wd6 == 'NW' or wd6 == 'Calm':
-            wdc = 'Steady'
-        elif wd6 == 'E' or wd6 == 'NE' or wd6 == 'N':
-            wdc = 'Veering'
-    elif wd == 'S':
-        if wd6 == 'SW' or wd6 == 'W' or wd6 == 'NW':
-            wdc = 'Backing'
-        elif wd6 == 'S' or wd6 == 'N' or wd6 == 'Calm':
-            wdc = 'Steady'
-        elif wd6 == 'SE' or wd6 == 'E' or wd6 == 'NE':
-            wdc = 'Veering'
-    elif wd == 'SW':
-        if wd6 == 'W' or wd6 == 'NW' or wd6 == 'N':
-            wdc = 'Backing'
-        elif wd6 == 'SW' or wd6 == 'NE' or wd6 == 'Calm':
-            wdc = 'Steady'
-        elif wd6 == 'S' or wd6 == 'SE' or wd6 == 'E':
-            wdc = 'Veering'
-    elif wd == 'W':
-        if wd6 == 'NW' or wd6 == 'N' or wd6 == 'NE':
-            wdc = 'Backing'
-        elif wd6 == 'W' or wd6 == 'E' or wd6 == 'Calm':
-            wdc = 'Steady'
-        elif wd6 == 'SW' or wd6 == 'S' or wd6 == 'SE':
-            wdc = 'Veering'
-    elif wd == 'NW':
-        if wd6 == 'N' or wd6 == 'NE' or wd6 == 'E':
-            wdc = 'Backing'
-        elif wd6 == 'NW' or wd6 == 'SE' or wd6 == 'Calm':
-            wdc = 'Steady'
-        elif wd6 == 'W' or wd6 == 'SW' or wd6 == 'S':
-            wdc = 'Veering'
-    elif wd == 'Calm':
+    # Compare the change in wind direction over the last 6 hours to determine
+    # if the wind is Backing/Steady/Veering/Calm
+    if wd == 'Calm':
         wdc = 'Calm'
+    elif wd6 == 'Calm':
+        wdc = 'Steady'
+    elif wd is not None and wd6 is not None:
+        wdc = sagerWindChange[(sagerDirections.index(wd6) - sagerDirections.index(wd)) % 8]
+    else:
+        wdc = None
 
-    # Determine the Wind Dial position from the current wind direction and whether
-    # the change from 6 hours ago is Backing/Steady/Veering/Calm modified by the
-    # weather station latitude. The Sager Weathercaster is designed for use in the
-    # Northern Temperate Zone. The relationship between the wind direction and the
-    # setting on the Wind Dial changes with latitude due to the Coriolis effect.
-
-    # Northern Hemisphere: Polar Zone & Tropical Zone
-    if Lat >= 0:
-        if Lat < 23.5 or Lat >= 66.6:
-            if wd == 'S':
-                if wdc == 'Backing':
-                    d1 = 'A'
-                elif wdc == 'Steady':
-                    d1 = 'B'
-                elif wdc == 'Veering':
-                    d1 = 'C'
-            elif wd == 'SW':
-                if wdc == 'Backing':
-                    d1 = 'D'
-                elif wdc == 'Steady':
-                    d1 = 'E'
-                elif wdc == 'Veering':
-                    d1 = 'F'
-            elif wd == 'W':
-                if wdc == 'Backing':
-                    d1 = 'G'
-                elif wdc == 'Steady':
-                    d1 = 'H'
-                elif wdc == 'Veering':
-                    d1 = 'J'
-            elif wd == 'NW':
-                if wdc == 'Backing':
-                    d1 = 'K'
-                elif wdc == 'Steady':
-                    d1 = 'L'
-                elif wdc == 'Veering':
-                    d1 = 'M'
-            elif wd == 'N':
-                if wdc == 'Backing':
-                    d1 = 'N'
-                elif wdc == 'Steady':
-                    d1 = 'O'
-                elif wdc == 'Veering':
-                    d1 = 'P'
-            elif wd == 'NE':
-                if wdc == 'Backing':
-                    d1 = 'Q'
-                elif wdc == 'Steady':
-                    d1 = 'R'
-                elif wdc == 'Veering':
-                    d1 = 'S'
-            elif wd == 'E':
-                if wdc == 'Backing':
-                    d1 = 'T'
-                elif wdc == 'Steady':
-                    d1 = 'U'
-                elif wdc == 'Veering':
-                    d1 = 'V'
-            elif wd == 'SE':
-                if wdc == 'Backing':
-                    d1 = 'W'
-                elif wdc == 'Steady':
-                    d1 = 'X'
-                elif wdc == 'Veering':
-                    d1 = 'Y'
-            elif wd == 'Calm':
-                d1 = 'Z'
-
-        # Northern Hemisphere: Temperate Zone
-        elif Lat >= 23.5 and Lat < 66.6:
-            if wd == 'N':
-                if wdc == 'Backing':
-                    d1 = 'A'
-                elif wdc == 'Steady':
-                    d1 = 'B'
-                elif wdc == 'Veering':
-                    d1 = 'C'
-            elif wd == 'NE':
-                if wdc == 'Backing':
-                    d1 = 'D'
-                elif wdc == 'Steady':
-                    d1 = 'E'
-                elif wdc == 'Veering':
-                    d1 = 'F'
-            elif wd == 'E':
-                if wdc == 'Backing':
-                    d1 = 'G'
-                elif wdc == 'Steady':
-                    d1 = 'H'
-                elif wdc == 'Veering':
-                    d1 = 'J'
-            elif wd == 'SE':
-                if wdc == 'Backing':
-                    d1 = 'K'
-                elif wdc == 'Steady':
-                    d1 = 'L'
-                elif wdc == 'Veering':
-                    d1 = 'M'
-            elif wd == 'S':
-                if wdc == 'Backing':
-                    d1 = 'N'
-                elif wdc == 'Steady':
-                    d1 = 'O'
-                elif wdc == 'Veering':
-                    d1 = 'P'
-            elif wd == 'SW':
-                if wdc == 'Backing':
-                    d1 = 'Q'
-                elif wdc == 'Steady':
-                    d1 = 'R'
-                elif wdc == 'Veering':
-                    d1 = 'S'
-            elif wd == 'W':
-                if wdc == 'Backing':
-                    d1 = 'T'
-                elif wdc == 'Steady':
-                    d1 = 'U'
-                elif wdc == 'Veering':
-                    d1 = 'V'
-            elif wd == 'NW':
-                if wdc == 'Backing':
-                    d1 = 'W'
-                elif wdc == 'Steady':
-                    d1 = 'X'
-                elif wdc == 'Veering':
-                    d1 = 'Y'
-            elif wd == 'Calm':
-                d1 = 'Z'
-
-    # Southern Hemisphere: Polar Zone & Tropical Zone
-    elif Lat < 0:
-        if Lat > -23.5 or Lat <= -66.6:
-            if wd == 'N':
-                if wdc == 'Backing':
-                    d1 = 'A'
-                elif wdc == 'Steady':
-                    d1 = 'B'
-                elif wdc == 'Veering':
-                    d1 = 'C'
-            elif wd == 'NW':
-                if wdc == 'Backing':
-                    d1 = 'D'
-                elif wdc == 'Steady':
-                    d1 = 'E'
-                elif wdc == 'Veering':
-                    d1 = 'F'
-            elif wd == 'W':
-                if wdc == 'Backing':
-                    d1 = 'G'
-                elif wdc == 'Steady':
-                    d1 = 'H'
-                elif wdc == 'Veering':
-                    d1 = 'J'
-            elif wd == 'SW':
-                if wdc == 'Backing':
-                    d1 = 'K'
-                elif wdc == 'Steady':
-                    d1 = 'L'
-                elif wdc == 'Veering':
-                    d1 = 'M'
-            elif wd == 'S':
-                if wdc == 'Backing':
-                    d1 = 'N'
-                elif wdc == 'Steady':
-                    d1 = 'O'
-                elif wdc == 'Veering':
-                    d1 = 'P'
-            elif wd == 'SE':
-                if wdc == 'Backing':
-                    d1 = 'Q'
-                elif wdc == 'Steady':
-                    d1 = 'R'
-                elif wdc == 'Veering':
-                    d1 = 'S'
-            elif wd == 'E':
-                if wdc == 'Backing':
-                    d1 = 'T'
-                elif wdc == 'Steady':
-                    d1 = 'U'
-                elif wdc == 'Veering':
-                    d1 = 'V'
-            elif wd == 'NE':
-                if wdc == 'Backing':
-                    d1 = 'W'
-                elif wdc == 'Steady':
-                    d1 = 'X'
-                elif wdc == 'Veering':
-                    d1 = 'Y'
-            elif wd == 'Calm':
-                d1 = 'Z'
-
-        # Southern Hemisphere: Temperate Zone
-        elif Lat <= -23.5 and Lat > -66.6:
-            if wd == 'S':
-                if wdc == 'Backing':
-                    d1 = 'A'
-                elif wdc == 'Steady':
-                    d1 = 'B'
-                elif wdc == 'Veering':
-                    d1 = 'C'
-            elif wd == 'SE':
-                if wdc == 'Backing':
-                    d1 = 'D'
-                elif wdc == 'Steady':
-                    d1 = 'E'
-                elif wdc == 'Veering':
-                    d1 = 'F'
-            elif wd == 'E':
-                if wdc == 'Backing':
-                    d1 = 'G'
-                elif wdc == 'Steady':
-                    d1 = 'H'
-                elif wdc == 'Veering':
-                    d1 = 'J'
-            elif wd == 'NE':
-                if wdc == 'Backing':
-                    d1 = 'K'
-                elif wdc == 'Steady':
-                    d1 = 'L'
-                elif wdc == 'Veering':
-                    d1 = 'M'
-            elif wd == 'N':
-                if wdc == 'Backing':
-                    d1 = 'N'
-                elif wdc == 'Steady':
-                    d1 = 'O'
-                elif wdc == 'Veering':
-                    d1 = 'P'
-            elif wd == 'NW':
-                if wdc == 'Backing':
-                    d1 = 'Q'
-                elif wdc == 'Steady':
-                    d1 = 'R'
-                elif wdc == 'Veering':
-                    d1 = 'S'
-            elif wd == 'W':
-                if wdc == 'Backing':
-                    d1 = 'T'
-                elif wdc == 'Steady':
-                    d1 = 'U'
-                elif wdc == 'Veering':
-                    d1 = 'V'
-            elif wd == 'SW':
-                if wdc == 'Backing':
-                    d1 = 'W'
-                elif wdc == 'Steady':
-                    d1 = 'X'
-                elif wdc == 'Veering':
-                    d1 = 'Y'
-            elif wd == 'Calm':
-                d1 = 'Z'
+    # Determine the Wind Dial position from the current wind direction and
+    # whether the change from 6 hours ago is Backing/Steady/Veering/Calm
+    # modified by the weather station latitude
+    d1 = sagerWindDial.get((latitudeZone(Lat),wd,wdc))
 
     # Determine the Barometer Dial position from the current atmospheric pressure
-    if p >= 1029.5:
-        d2 = '1'
-    elif p >= 1019.3 and p < 1029.5:
-        d2 = '2'
-    elif p >= 1012.5 and p < 1019.3:
-        d2 = '3'
-    elif p >= 1005.8 and p < 1012.5:
-        d2 = '4'
-    elif p >= 999.0 and p < 1005.8:
-        d2 = '5'
-    elif p >= 988.8 and p < 999.0:
-        d2 = '6'
-    elif p >= 975.3 and p < 988.8:
-        d2 = '7'
-    elif p < 975.3:
-        d2 = '8'
+    if not math.isnan(p):
+        d2 = '87654321'[bisect.bisect_right(sagerPressure,p)]
+    else:
+        d2 = None
 
     # Determine the Barometer Change Dial position using the current atmospheric
     # pressure trend in hPa/6 hours.
     pt = p - p6
-    if pt >= 1.4:                           # Rising Rapidly
-        trd = 'Rising Rapidly'
-        d3 = '1'
-    elif pt >= 0.7 and pt < 1.4:            # Rising Slowly
-        trd = 'Rising Slowly'
-        d3 = '2'
-    elif pt < 0.7 and pt > -0.7:            # Normal
-        trd = 'Normal'
-        d3 = '3'
-    elif pt <= -0.7 and pt > -1.4:          # Falling Slowly
-        trd = 'Falling Slowly'
-        d3 = '4'
-    elif pt <= -1.4:                        # Falling Rapidly
-        trd = 'Falling Rapidly'
-        d3 = '5'
+    if math.isnan(pt):
+        d3 = None
+    elif pt > -0.7:
+        d3 = '321'[bisect.bisect_right([0.7,1.4],pt)]
+    else:
+        d3 = '54'[bisect.bisect_left([-1.4,-0.7],pt)]
 
     # Determine the Present Weather Dial position using the current weather
     # conditions
     if lr <= 30:
-        pw = 'Precipitation'
-        d4 = '5'
-    elif pw == 'Clear':
-        d4 = '1'
-    elif pw == 'Partly Cloudy':
-        d4 = '2'
-    elif pw == 'Mostly Cloudy':
-        d4 = '3'
-    elif pw == 'Overcast':
-        d4 = '4'
-    elif pw == 'Precipitation':
         d4 = '5'
-    elif pw == None:
-        d4 = 'x'
+    else:
+        d4 = sagerCloudDial.get(ccode,'x')
 
     # Return SagerWeathercaster dial setting as function output
-    try:
-        Sager = dict()
-        Sager['DialSet'] = d1 + d2 + d3 + d4
-        Sager['Temp'] = t
-        Sager['Lat'] = Lat
-        Sager['Units'] = Units
-        return Sager
-    except:
+    if d1 is None or d2 is None or d3 is None:
+        return None
+    Sager = dict()
+    Sager['DialSet'] = d1 + d2 + d3 + d4
+    Sager['Temp'] = t
+    Sager['Lat'] = Lat
+    Sager['Units'] = Units
+    return Sager
+
+def windSector(Dir,Spd):
+
+    ''' Converts an average wind direction in degrees into a compass direction.
+    Wind speeds of 1 mph or less are assumed to indicate calm conditions
+
+    INPUTS:
+        Dir                     Average wind direction in degrees
+        Spd                     Average wind speed in mph
+
+    OUTPUT:
+        Sector                  Compass direction or Calm. None if the wind
+                                direction is invalid
+    '''
+
+    # Return compass direction of average wind direction
+    if Spd <= 1:
+        return 'Calm'
+    elif Dir >= 0:
+        return sagerDirections[bisect.bisect_right(sagerSectors,Dir) % 8]
+    else:
+        return None
+
+def latitudeZone(Lat):
+
+    ''' Returns the latitude zone of the weather station. The relationship
+    between the wind direction and the setting on the Wind Dial changes with
+    latitude due to the Coriolis effect.
+
+    INPUTS:
+        Lat                     Weather station latitude
+
+    OUTPUT:
+        Zone                    Latitude zone. None if latitude is invalid
+    '''
+
+    # Return latitude zone of weather station
+    if Lat >= 0:
+        if Lat < 23.5 or Lat >= 66.6:
+            return 'NorthPolarTropical'
+        else:
+            return 'NorthTemperate'
+    elif Lat < 0:
+        if Lat > -23.5 or Lat <= -66.6:
+            return 'SouthPolarTropical'
+        else:
+            return 'SouthTemperate'
+    else:
         return None
 
 def getForecast(Sager):
@@ -791,14 +516,46 @@ def getForecast(Sager):
     Lat = Sager['Lat']
     t = Sager['Temp']
 
-    # Define precipitation type based on current temperature
+    # Define precipitation type band based on current temperature
     if t <= -1.5:
+        Precip = 'Snow'
+    elif t > -1.5 and t < 1.5:
+        Precip = 'Mixed'
+    else:
+        Precip = 'Rain'
+
+    # Define latitude zone based on station latitude
+    Zone = latitudeZone(Lat)
+
+    # Return SagerWeathercaster forecast text from the precomputed forecast
+    # table for the current precipitation type, latitude zone, and wind units
+    return forecastTable(Precip,Zone,Sager['Units']).get(Dial,'Forecast Unavailable')
+
+@functools.lru_cache(maxsize=None)
+def forecastTable(Precip,Zone,Units):
+
+    ''' Precomputes the Sager Weathercaster Forecast for every Sager Weather
+    Prediction Key. The table is generated once for each combination of inputs
+    and then cached.
+
+    INPUTS:
+        Precip              Precipitation type band (Snow/Mixed/Rain)
+        Zone                Station latitude zone
+        Units               Wind speed units
+
+    OUTPUT:
+        WeatherPredictionKey - Dictionary containing Sager Weathercaster
+                               Forecast for each Weather Prediction Key
+    '''
+
+    # Define precipitation type based on precipitation type band
+    if Precip == 'Snow':
         fp1 = 'Snow'
         fp2 = 'snow'
-    elif t > -1.5 and t < 1.5:
+    elif Precip == 'Mixed':
         fp1 = 'Rain or Snow (possibly mixed)';
         fp2 = 'rain or snow (possibly mixed)';
-    elif t >= 1.5:
+    else:
         fp1 = 'Rain';
         fp2 = 'rain';
 
@@ -831,7 +588,7 @@ def getForecast(Sager):
     # modifications based on Beaufort Scale terminology and users choice of wind
     # speed units
     Wind = [None]*8
-    if Sager['Units'] in ['mph','lfm']:
+    if Units in ['mph','lfm']:
         Wind[0] = 'Wind probably increasing. '
         Wind[1] = 'Wind moderate to fresh (13-24 mph). '                                                                    # Changed from 'Moderate to fresh'.
         Wind[2] = 'Wind strong to near gale (25-38 mph). '                                                                  # Changed from 'Strong'.
@@ -840,7 +597,7 @@ def getForecast(Sager):
         Wind[5] = 'Wind hurricane (74+ mph). '
         Wind[6] = 'Wind diminishing, or moderating somewhat if current winds are of fresh to strong velocity. '
         Wind[7] = 'Wind unchanged. Some tendency for slight increase during day, diminishing in evening. '
-    elif Sager['Units'] == 'kph':
+    elif Units == 'kph':
         Wind[0] = 'Wind probably increasing. '
         Wind[1] = 'Wind moderate to fresh (20-39 km/h). '
         Wind[2] = 'Wind strong to near gale (40-61 km/h). '
@@ -849,7 +606,7 @@ def getForecast(Sager):
         Wind[5] = 'Wind hurricane (118+ km/h). '
         Wind[6] = 'Wind diminishing, or moderating somewhat if current winds are of fresh to strong velocity. '
         Wind[7] = 'Wind unchanged. Some tendency for slight increase during day, diminishing in evening. '
-    elif Sager['Units'] == 'kts':
+    elif Units == 'kts':
         Wind[0] = 'Wind probably increasing. '
         Wind[1] = 'Wind moderate to fresh (11-21 kts). '
         Wind[2] = 'Wind strong to near gale (22-33 kts). '
@@ -858,7 +615,7 @@ def getForecast(Sager):
         Wind[5] = 'Wind hurricane (64+ kts). '
         Wind[6] = 'Wind diminishing, or moderating somewhat if current winds are of fresh to strong velocity. '
         Wind[7] = 'Wind unchanged. Some tendency for slight increase during day, diminishing in evening. '
-    elif Sager['Units'] == 'bft':
+    elif Units == 'bft':
         Wind[0] = 'Wind probably increasing. '
         Wind[1] = 'Wind moderate to fresh (4-5 bft). '
         Wind[2] = 'Wind strong to near gale (6-7 bft). '
@@ -867,7 +624,7 @@ def getForecast(Sager):
         Wind[5] = 'Wind hurricane (12+ bft). '
         Wind[6] = 'Wind diminishing, or moderating somewhat if current winds are of fresh to strong velocity. '
         Wind[7] = 'Wind unchanged. Some tendency for slight increase during day, diminishing in evening. '
-    elif Sager['Units'] == 'mps':
+    elif Units == 'mps':
         Wind[0] = 'Wind probably increasing. '
         Wind[1] = 'Wind moderate to fresh (5.5-10.7 m/s). '
         Wind[2] = 'Wind strong to near gale (10.8-17.1 m/s). '
@@ -881,8 +638,8 @@ def getForecast(Sager):
     # modifications based on latitude of station
     # Northern Hemisphere: Polar & Tropical Zone
     Direction = [None]*9
-    if Lat >= 0:
-        if Lat < 23.5 or Lat >= 66.6:
+    if Zone.startswith('North'):
+        if Zone == 'NorthPolarTropical':
             Direction[0] = 'South or southwest'
             Direction[1] = 'Southwest or west'
             Direction[2] = 'West or northwest'
@@ -894,7 +651,7 @@ def getForecast(Sager):
             Direction[8] = 'Shifting (or variable)'
 
         # Northern Hemisphere: Temperate Zone
-        elif Lat >= 23.5 and Lat < 66.6:
+        elif Zone == 'NorthTemperate':
             Direction[0] = 'North or northeast'
             Direction[1] = 'Northeast or east'
             Direction[2] = 'East or southeast'
@@ -906,8 +663,8 @@ def getForecast(Sager):
             Direction[8] = 'Shifting (or variable)'
 
     # Southern Hemisphere: Polar & Tropical Zone
-    elif Lat < 0:
-        if Lat > -23.5 or Lat <= -66.6:
+    elif Zone.startswith('South'):
+        if Zone == 'SouthPolarTropical':
             Direction[0] = 'North or northwest'
             Direction[1] = 'Northwest or west'
             Direction[2] = 'West or southwest'
@@ -919,7 +676,7 @@ def getForecast(Sager):
             Direction[8] = 'Shifting (or variable)'
 
         # Southern Hemisphere: Temperate Zone
-        elif Lat <= -23.5 and Lat > -66.6:
+        elif Zone == 'SouthTemperate':
             Direction[0] = 'South or southeast'
             Direction[1] = 'Southeast or east'
             Direction[2] = 'East or northeast'
@@ -6309,5 +6066,5 @@ def getForecast(Sager):
                     'Z854': PW97,
                     'Z855': PW97}
 
-    # Return SagerWeathercaster forecast text as function output
-    return WeatherPredictionKey.get(Dial,'Forecast Unavailable')
+    # Return Sager Weathercaster forecast table
+    return WeatherPredictionKey
@@ -0,0 +1,107 @@
+""" Defines the consolidated clock scheduler required by the Raspberry Pi Python
+console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required modules
+from lib.eventLoop import Clock
+from datetime   import datetime
+import pytz
+
+class TickScheduler():
+
+    """ Single one second clock that calculates the current time in the station
+    timezone once per tick and passes it to each subscriber. Subscribers declare
+    the cadence at which they are called:
+        second              Called every tick
+        minute              Called on the first tick of each minute
+        function            Called on the first tick at or after the time
+                            returned by the function
+    """
+
+    def __init__(self,Config):
+
+        # Define station configuration, subscribers, and cached timezone
+        self.Config      = Config
+        self.Subscribers = []
+        self.tzName      = None
+        self.Tz          = None
+        self.Event       = None
+
+    def subscribe(self,Callback,Cadence='second'):
+
+        """ Subscribes a callback to the scheduler
+
+        INPUTS:
+            Callback            Function called with the current time in the
+                                station timezone
+            Cadence             Cadence at which callback is called (second/
+                                minute), or a function returning the time of
+                                the next event boundary
+        """
+
+        # Add callback to list of subscribers
+        self.Subscribers.append([Callback,Cadence,None])
+
+    def start(self):
+
+        """ Starts the one second scheduler clock
+        """
+
+        # Schedule scheduler tick every second
+        if self.Event is None:
+            self.Event = Clock.schedule_interval(self.tick,1.0)
+
+    def timezone(self):
+
+        """ Returns the station timezone, updating the cached timezone if the
+        station timezone has been changed
+
+        OUTPUT:
+            Tz                  Station timezone
+        """
+
+        # Update cached station timezone if required
+        if self.tzName != self.Config['Station']['Timezone']:
+            self.tzName = self.Config['Station']['Timezone']
+            self.Tz     = pytz.timezone(self.tzName)
+
+        # Return station timezone
+        return self.Tz
+
+    def tick(self,dt):
+
+        """ Calculates the current time in the station timezone and calls each
+        subscriber that is due
+
+        INPUTS:
+            dt                  Time since last tick
+        """
+
+        # Get current time in station timezone
+        Now = datetime.now(pytz.utc).astimezone(self.timezone()).replace(microsecond=0)
+
+        # Call each subscriber that is due at the current time
+        Minute = Now.replace(second=0)
+        for Subscriber in self.Subscribers:
+            Callback, Cadence, Last = Subscriber
+            if Cadence == 'second':
+                Callback(Now)
+            elif Cadence == 'minute':
+                if Minute != Last:
+                    Subscriber[2] = Minute
+                    Callback(Now)
+            elif Now >= Cadence():
+                Callback(Now)
@@ -16,15 +16,26 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 # Import required library modules
+from lib import observationBuffer
 from lib import requestAPI
+from lib import taskRunner
 
 # Import required Python modules
-from datetime import datetime
+from lib.eventLoop import Clock
+from functools  import partial
+from datetime   import datetime
 import time
-import pytz
 
 # Define global variables
-NaN = float('NaN')
+NaN       = float('NaN')
+staleTime = 300
+
+# Define device status prefix, voltage index, and minimum voltage for each
+# device type
+deviceTypes = {'Tempest': ['tempest', 16, 1.9],
+               'Sky':     ['sky',     8,  2.0],
+               'outAir':  ['outAir',  6,  1.9],
+               'inAir':   ['inAir',   6,  1.9]}
 
 def getHubStatus(Status,wfpiconsole):
 
@@ -54,118 +65,112 @@ def getHubStatus(Status,wfpiconsole):
     else:
         Status['stationStatus'] = '[color=9aba2fff]Online[/color]'
 
+    # Queue download of hub firmware version
+    taskRunner.Tasks.submit('HubFirmware',partial(getHubFirmware,wfpiconsole.config),partial(setHubFirmware,Status))
+
+def getHubFirmware(Config):
+
+    """ Gets the firmware version of the hub attached to the station from the
+    station meta data
+
+    INPUTS:
+        Config                 Station configuration
+
+    OUTPUT:
+        Firmware               Hub firmware version. Set to None if station
+                               meta data is unavailable
+    """
+
     # Get hub firmware version
-    Station = wfpiconsole.config['Station']['StationID']
-    Data = requestAPI.weatherflow.stationMetaData(Station,wfpiconsole.config)
+    Station = Config['Station']['StationID']
+    Data = requestAPI.weatherflow.stationMetaData(Station,Config)
     if requestAPI.weatherflow.verifyResponse(Data,'stations'):
         Devices = Data.json()['stations'][0]['devices']
         for Device in Devices:
             if Device['device_type'] == 'HB':
-                Status['hubFirmware'] = Device['firmware_revision']
+                return Device['firmware_revision']
+    return None
 
-def getDeviceStatus(Status,wfpiconsole):
+def setHubFirmware(Status,Firmware):
 
-    """ Gets the current status of the devices attached to the station
+    """ Sets the hub firmware version on the main thread
+
+    INPUTS:
+        Status                 Dictionary holding hub status information
+        Firmware               Hub firmware version
+    """
+
+    # Set hub firmware version
+    if Firmware is not None:
+        Status['hubFirmware'] = Firmware
+
+def setDeviceStatus(Status,Timers,Device,Msg,wfpiconsole):
+
+    """ Sets the status of a device attached to the station when a new message
+    is received from the device, and schedules a staleness timer that marks
+    the device as in error if no further message is received
 
     INPUTS:
         Status                 Dictionary holding device status information
+        Timers                 Dictionary holding staleness timer for each
+                               device
+        Device                 Device type (Tempest/Sky/outAir/inAir)
+        Msg                    Latest message received from device
         wfpiconsole            wfpiconsole object
 
     OUTPUT:
         Status                 Dictionary holding device status information
     """
 
-    # Define current time in station timezone
-    Tz = pytz.timezone(wfpiconsole.config['Station']['Timezone'])
-    Now = datetime.now(pytz.utc).astimezone(Tz)
-
-    # Get TEMPEST device status
-    if wfpiconsole.config['Station']['TempestID']:
-        if 'TempestMsg' in wfpiconsole.Obs:
-            lastOb         = [x if x != None else NaN for x in wfpiconsole.Obs['TempestMsg']['obs'][0]]
-            lastSampleTime = datetime.fromtimestamp(lastOb[0],Tz)
-            lastSampleDiff = (Now - lastSampleTime).total_seconds()
-            if lastOb[16] != None:
-                deviceVoltage = float(lastOb[16])
-            else:
-                deviceVoltage = NaN
-            if lastSampleDiff < 300 and deviceVoltage > 1.9:
-                deviceStatus = '[color=9aba2fff]OK[/color]'
-            else:
-                deviceStatus = '[color=d73027ff]Error[/color]'
-
-            # Store outdoor AIR device status variables
-            Status['tempestSampleTime'] = lastSampleTime.strftime('%H:%M:%S')
-            Status['tempestVoltage']    = '{:.2f}'.format(deviceVoltage)
-            Status['tempestStatus']     = deviceStatus
-
-    # Get SKY device status
-    if wfpiconsole.config['Station']['SkyID']:
-        if 'SkyMsg' in wfpiconsole.Obs:
-            lastOb         = [x if x != None else NaN for x in wfpiconsole.Obs['SkyMsg']['obs'][0]]
-            lastSampleTime = datetime.fromtimestamp(lastOb[0],Tz)
-            lastSampleDiff = (Now - lastSampleTime).total_seconds()
-            if lastOb[8] != None:
-                deviceVoltage = float(lastOb[8])
-            else:
-                deviceVoltage = NaN
-            if lastSampleDiff < 300 and deviceVoltage > 2.0:
-                deviceStatus = '[color=9aba2fff]OK[/color]'
-            else:
-                deviceStatus = '[color=d73027ff]Error[/color]'
-
-            # Store outdoor AIR device status variables
-            Status['skySampleTime'] = lastSampleTime.strftime('%H:%M:%S')
-            Status['skyVoltage']    = '{:.2f}'.format(deviceVoltage)
-            Status['skyStatus']     = deviceStatus
-
-    # Get outdoor AIR device status
-    if wfpiconsole.config['Station']['OutAirID']:
-        if 'outAirMsg' in wfpiconsole.Obs:
-            lastOb         = [x if x != None else NaN for x in wfpiconsole.Obs['outAirMsg']['obs'][0]]
-            lastSampleTime = datetime.fromtimestamp(lastOb[0],Tz)
-            lastSampleDiff = (Now - lastSampleTime).total_seconds()
-            if lastOb[6] != None:
-                deviceVoltage = float(lastOb[6])
-            else:
-                deviceVoltage = NaN
-            if lastSampleDiff < 300 and deviceVoltage > 1.9:
-                deviceStatus = '[color=9aba2fff]OK[/color]'
-            else:
-                deviceStatus = '[color=d73027ff]Error[/color]'
-
-            # Store outdoor AIR device status variables
-            Status['outAirSampleTime'] = lastSampleTime.strftime('%H:%M:%S')
-            Status['outAirVoltage']    = '{:.2f}'.format(deviceVoltage)
-            Status['outAirStatus']     = deviceStatus
-
-    # Get outdoor AIR device status
-    if wfpiconsole.config['Station']['InAirID']:
-        if 'inAirMsg' in wfpiconsole.Obs:
-            lastOb         = [x if x != None else NaN for x in wfpiconsole.Obs['inAirMsg']['obs'][0]]
-            lastSampleTime = datetime.fromtimestamp(lastOb[0],Tz)
-            lastSampleDiff = (Now - lastSampleTime).total_seconds()
-            if lastOb[6] != None:
-                deviceVoltage = float(lastOb[6])
-            else:
-                deviceVoltage = NaN
-            if lastSampleDiff < 300 and deviceVoltage > 1.9:
-                deviceStatus = '[color=9aba2fff]OK[/color]'
-            else:
-                deviceStatus = '[color=d73027ff]Error[/color]'
+    # Extract device status prefix, voltage index and minimum voltage
+    Prefix, voltInd, minVoltage = deviceTypes[Device]
 
-            # Store outdoor AIR device status variables
-            Status['inAirSampleTime'] = lastSampleTime.strftime('%H:%M:%S')
-            Status['inAirVoltage']    = '{:.2f}'.format(deviceVoltage)
-            Status['inAirStatus']     = deviceStatus
+    # Get device status from latest observation
+    lastOb         = Msg['obs'][0]
+    lastSampleTime = datetime.fromtimestamp(lastOb[0],wfpiconsole.Context.Tz)
+    lastSampleDiff = time.time() - lastOb[0]
+    if lastOb[voltInd] != None:
+        deviceVoltage = float(lastOb[voltInd])
+    else:
+        deviceVoltage = NaN
+    if lastSampleDiff < staleTime and deviceVoltage > minVoltage:
+        deviceStatus = '[color=9aba2fff]OK[/color]'
+    else:
+        deviceStatus = '[color=d73027ff]Error[/color]'
+
+    # Store device status variables
+    Status[Prefix + 'SampleTime'] = lastSampleTime.strftime('%H:%M:%S')
+    Status[Prefix + 'Voltage']    = '{:.2f}'.format(deviceVoltage)
+    Status[Prefix + 'Status']     = deviceStatus
+
+    # Schedule staleness timer to fire when latest observation becomes older
+    # than the staleness threshold
+    if Device in Timers:
+        Timers[Device].cancel()
+    if lastSampleDiff < staleTime:
+        Timers[Device] = Clock.schedule_once(partial(staleDevice,Status,Device),staleTime - lastSampleDiff)
 
     # Return device status
     return Status
 
+def staleDevice(Status,Device,dt):
+
+    """ Marks a device as in error once its latest observation is older than
+    the staleness threshold
+
+    INPUTS:
+        Status                 Dictionary holding device status information
+        Device                 Device type (Tempest/Sky/outAir/inAir)
+        dt                     Time since staleness timer was scheduled
+    """
+
+    # Set device status to error
+    Status[deviceTypes[Device][0] + 'Status'] = '[color=d73027ff]Error[/color]'
+
 def getObservationCount(Status,wfpiconsole):
 
     """ Gets number of observations in the last 24 hours for each device
-    attached to the station
+    attached to the station from the rolling 24 hour observation counts
 
     INPUTS:
         Status                 Dictionary holding device status information
@@ -175,55 +180,19 @@ def getObservationCount(Status,wfpiconsole):
         Status                 Dictionary holding device status information
     """
 
-    # Define current time in station timezone
-    Tz = pytz.timezone(wfpiconsole.config['Station']['Timezone'])
-    Now = datetime.now(pytz.utc).astimezone(Tz)
-
-    # Get TEMPEST observation count
-    if wfpiconsole.config['Station']['TempestID']:
-        Device  = wfpiconsole.config['Station']['TempestID']
-        while not 'TempestMsg' in wfpiconsole.Obs:
-            time.sleep(0.01)
-        lastOb  = [x if x != None else NaN for x in wfpiconsole.Obs['TempestMsg']['obs'][0]]
-        Data24h = requestAPI.weatherflow.Last24h(Device,lastOb[0],wfpiconsole.config)
-        if requestAPI.weatherflow.verifyResponse(Data24h,'obs'):
-            Data24h = Data24h.json()['obs']
-            Status['tempestObCount'] = str(len(Data24h))
-
-    # Get SKY observation count
-    if wfpiconsole.config['Station']['SkyID']:
-        Device  = wfpiconsole.config['Station']['SkyID']
-        while not 'SkyMsg' in wfpiconsole.Obs:
-            time.sleep(0.01)
-        lastOb  = [x if x != None else NaN for x in wfpiconsole.Obs['SkyMsg']['obs'][0]]
-        Data24h = requestAPI.weatherflow.Last24h(Device,lastOb[0],wfpiconsole.config)
-        if requestAPI.weatherflow.verifyResponse(Data24h,'obs'):
-            Data24h = Data24h.json()['obs']
-            Status['skyObCount'] = str(len(Data24h))
-
-    # Get outdoor AIR observation count
-    if wfpiconsole.config['Station']['OutAirID']:
-        Device  = wfpiconsole.config['Station']['OutAirID']
-        while not 'outAirMsg' in wfpiconsole.Obs:
-            time.sleep(0.01)
-        lastOb  = [x if x != None else NaN for x in wfpiconsole.Obs['outAirMsg']['obs'][0]]
-        Data24h = requestAPI.weatherflow.Last24h(Device,lastOb[0],wfpiconsole.config)
-        if requestAPI.weatherflow.verifyResponse(Data24h,'obs'):
-            Data24h = Data24h.json()['obs']
-            Status['outAirObCount'] = str(len(Data24h))
-
-    # Get indoor AIR observation count
-    if wfpiconsole.config['Station']['InAirID']:
-        Device  = wfpiconsole.config['Station']['InAirID']
-        while not 'inAirMsg' in wfpiconsole.Obs:
-            time.sleep(0.01)
-        lastOb  = [x if x != None else NaN for x in wfpiconsole.Obs['inAirMsg']['obs'][0]]
-        Data24h = requestAPI.weatherflow.Last24h(Device,lastOb[0],wfpiconsole.config)
-        if requestAPI.weatherflow.verifyResponse(Data24h,'obs'):
-            Data24h = Data24h.json()['obs']
-            Status['inAirObCount'] = str(len(Data24h))
+    # Define current time as a UNIX timestamp
+    Now = int(time.time())
+
+    # Get observation count for each device attached to the station
+    Devices = [[wfpiconsole.config['Station']['TempestID'], 'tempestObCount'],
+               [wfpiconsole.config['Station']['SkyID'],     'skyObCount'],
+               [wfpiconsole.config['Station']['OutAirID'],  'outAirObCount'],
+               [wfpiconsole.config['Station']['InAirID'],   'inAirObCount']]
+    for Device, Key in Devices:
+        if Device:
+            Count = observationBuffer.observationCount(Device,Now)
+            if Count is not None:
+                Status[Key] = str(Count)
 
     # Return device observation count
     return Status
-
-
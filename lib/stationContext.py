@@ -0,0 +1,113 @@
+""" Defines the station context required by the Raspberry Pi Python console for
+WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required library modules
+from lib   import observationFormat as observation
+
+# Import required modules
+from types import MappingProxyType
+import pytz
+
+# Define global variables
+NaN = float('NaN')
+
+# Define constants required to calculate sea level pressure
+P0     = 1013.25
+Rd     = 287.05
+GammaS = 0.0065
+g      = 9.80665
+T0     = 288.15
+
+def toFloat(Value):
+
+    """ Converts a configuration value to a float
+
+    INPUTS:
+        Value               Configuration value
+
+    OUTPUT:
+        Value               Configuration value as float. Set to NaN if the
+                            value cannot be converted
+    """
+
+    # Return configuration value as float
+    try:
+        return float(Value)
+    except:
+        return NaN
+
+class StationContext():
+
+    """ Immutable snapshot of the station configuration used when processing
+    each websocket message. The snapshot is built once from wfpiconsole.ini
+    and rebuilt whenever the configuration is changed
+    """
+
+    __slots__ = ('Timezone','Tz','Elevation','slpExponent','slpFactor','slpPower',
+                 'Units','Pipeline','FeelsLike','TimeFormat','TempestID','SkyID',
+                 'OutAirID','InAirID')
+
+    def __init__(self,Config):
+
+        # Define station timezone
+        Station = Config['Station']
+        self._set('Timezone', Station['Timezone'])
+        self._set('Tz',       pytz.timezone(Station['Timezone']))
+
+        # Define station elevation including the height of the pressure sensor
+        # above ground level, and the constants required to calculate sea
+        # level pressure
+        if Station['OutAirHeight']:
+            Height = Station['OutAirHeight']
+        elif Station['TempestHeight']:
+            Height = Station['TempestHeight']
+        else:
+            Height = 0
+        self._set('Elevation',   toFloat(Station['Elevation']) + toFloat(Height))
+        self._set('slpExponent', (Rd*GammaS)/g)
+        self._set('slpFactor',   (GammaS*self.Elevation)/T0)
+        self._set('slpPower',    g/(Rd*GammaS))
+
+        # Define observation units, the compiled unit conversion and formatting
+        # pipeline, and 'Feels Like' temperature cutoffs
+        self._set('Units',     MappingProxyType(dict(Config['Units'])))
+        self._set('Pipeline',  observation.Compile(self.Units))
+        self._set('FeelsLike', tuple(toFloat(item) for item in Config['FeelsLike'].values()))
+
+        # Define time format based on user configuration
+        if Config['Display']['TimeFormat'] == '12 hr':
+            if Config['System']['Hardware'] != 'Other':
+                self._set('TimeFormat', '%-I:%M %P')
+            else:
+                self._set('TimeFormat', '%I:%M %p')
+        else:
+            self._set('TimeFormat', '%H:%M')
+
+        # Define station device IDs
+        self._set('TempestID', Station['TempestID'])
+        self._set('SkyID',     Station['SkyID'])
+        self._set('OutAirID',  Station['OutAirID'])
+        self._set('InAirID',   Station['InAirID'])
+
+    def _set(self,Name,Value):
+        object.__setattr__(self,Name,Value)
+
+    def __setattr__(self,Name,Value):
+        raise AttributeError('StationContext is immutable')
+
+    def __delattr__(self,Name):
+        raise AttributeError('StationContext is immutable')
@@ -17,9 +17,9 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 
 # Import required library modules
 from lib import requestAPI
+from lib import taskRunner
 
 # Import required Python modules
-from kivy.clock import Clock
 from packaging  import version
 from functools  import partial
 from datetime   import datetime, timedelta
@@ -29,13 +29,14 @@ import pytz
 # Define global variables
 NaN = float('NaN')
 
-def realtimeClock(System,Config,*largs):
+def realtimeClock(System,Config,Now):
 
     """ Realtime clock in station timezone
 
     INPUTS:
         System                 Dictionary holding system information
         Config                 Station configuration
+        Now                    Current time in station timezone
 
     OUTPUT:
         System                 Dictionary holding system information
@@ -55,10 +56,6 @@ def realtimeClock(System,Config,*largs):
     else:
         DateFormat = '%a, %d %b %Y'
 
-    # Get current time in station time zone
-    Tz = pytz.timezone(Config['Station']['Timezone'])
-    Now = datetime.now(pytz.utc).astimezone(Tz)
-
     # Format realtime Clock
     System['Time'] = Now.strftime(TimeFormat)
     System['Date'] = Now.strftime(DateFormat)
@@ -66,54 +63,75 @@ def realtimeClock(System,Config,*largs):
     # Return system information
     return System
 
-def checkVersion(verData,Config,updateNotif,*largs):
+def checkVersion(verData,Config,Delay=0):
 
     """ Checks current version of the PiConsole against the latest available
-    version on Github
+    version on Github. Version information is downloaded in the background
+    task runner
+
+    INPUTS:
+        verData                 Dictionary holding version information
+        Config                  Station configuration
+        Delay                   Delay before version check is queued in seconds
+    """
+
+    # Queue download of version information from Github API after specified
+    # delay
+    taskRunner.Tasks.schedule('Version',partial(requestAPI.github.version,Config),partial(updateVersion,verData,Config),Delay)
+
+def updateVersion(verData,Config,Data):
+
+    """ Updates the latest available version on the main thread, and schedules
+    the next version check
 
     INPUTS:
         verData                 Dictionary holding version information
         Config                  Station configuration
-        updateNotif             Instance of the updateNotif widget
+        Data                    Github API response
 
     OUTPUT:
         verData                 Dictionary holding version information
     """
 
-    # Get version information from Github API
-    Data = requestAPI.github.version(Config)
-
     # Get current time in station time zone
     Tz = pytz.timezone(Config['Station']['Timezone'])
     Now = datetime.now(pytz.utc).astimezone(Tz)
 
-    # Extract version number from API response
+    # Extract version number from API response if API call has not failed.
+    # Otherwise retry once the Github API backoff has elapsed, up to a maximum
+    # of one day
+    Next = Tz.localize(datetime(Now.year,Now.month,Now.day)+timedelta(days=1))
     if requestAPI.github.verifyResponse(Data,'tag_name'):
         verData['Latest'] = Data.json()['tag_name']
+        Delay = (Next-Now).total_seconds()
     else:
-        Next = Tz.localize(datetime(Now.year,Now.month,Now.day)+timedelta(days=1))
-        Clock.schedule_once(partial(checkVersion,verData,Config,updateNotif),(Next-Now).total_seconds())
-        return verData
-
-    # If current and latest version numbers do not match, open update
-    # notification
-    if version.parse(Config['System']['Version']) < version.parse(verData['Latest']):
-
-        # Check if update notification is already open. Close if required
-        if 'updateNotif' in verData:
-            verData['updateNotif'].dismiss()
-
-        # Open update notification
-        verData['updateNotif'] = updateNotif()
-        verData['updateNotif'].open()
+        Delay = requestAPI.github.retryDelay((Next-Now).total_seconds())
 
     # Schedule next Version Check
-    Next = Tz.localize(datetime(Now.year,Now.month,Now.day)+timedelta(days=1))
-    Clock.schedule_once(partial(checkVersion,verData,Config,updateNotif),(Next-Now).total_seconds())
+    checkVersion(verData,Config,Delay)
 
     # Return system variables
     return verData
 
+def updateAvailable(verData,Config):
+
+    """ Checks if the latest available version is newer than the current
+    version
+
+    INPUTS:
+        verData                 Dictionary holding version information
+        Config                  Station configuration
+
+    OUTPUT:
+        Available               True if a new version is available
+    """
+
+    # Compare current and latest version numbers
+    try:
+        return version.parse(Config['System']['Version']) < version.parse(verData['Latest'])
+    except:
+        return False
+
 def getStationStatus(Status,wfpiconsole):
 
     """ Gets the current status of the station
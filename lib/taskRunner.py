@@ -0,0 +1,102 @@
+""" Defines the background task runner required by the Raspberry Pi Python
+console for WeatherFlow Tempest and Smart Home Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required library modules
+from lib.eventLoop import Clock
+
+# Import required Python modules
+import threading
+import traceback
+import queue
+
+class TaskRunner():
+
+    """ Runs network-bound jobs on a small pool of background worker threads.
+    The result of each job is delivered to its callback in a single call on
+    the event loop thread, so the display never waits on a network request. A
+    job that is already queued or running is not queued again
+    """
+
+    def __init__(self,Workers=2):
+
+        # Define job queue, active job names, and worker threads
+        self.Queue   = queue.Queue()
+        self.Active  = set()
+        self.Lock    = threading.Lock()
+        self.Workers = [threading.Thread(target=self.worker, name='Task' + str(ii), daemon=True) for ii in range(Workers)]
+        for Worker in self.Workers:
+            Worker.start()
+
+    def submit(self,Name,Job,Callback=None):
+
+        """ Queues a job to run in the background
+
+        INPUTS:
+            Name                Name of job
+            Job                 Function run in background worker thread
+            Callback            Function called on the event loop thread with
+                                the value returned by the job
+        """
+
+        # Queue job unless a job with the same name is already queued or
+        # running
+        with self.Lock:
+            if Name in self.Active:
+                return
+            self.Active.add(Name)
+        self.Queue.put((Name,Job,Callback))
+
+    def schedule(self,Name,Job,Callback=None,Delay=0):
+
+        """ Queues a job to run in the background after the specified delay
+
+        INPUTS:
+            Name                Name of job
+            Job                 Function run in background worker thread
+            Callback            Function called on the event loop thread with
+                                the value returned by the job
+            Delay               Delay before job is queued in seconds
+
+        OUTPUT:
+            Event               Event loop event that queues the job
+        """
+
+        # Schedule job to be queued after specified delay
+        return Clock.schedule_once(lambda dt: self.submit(Name,Job,Callback),Delay)
+
+    def worker(self):
+
+        """ Runs queued jobs and delivers each result to the event loop thread
+        """
+
+        # Wait for next queued job and run it
+        while True:
+            Name, Job, Callback = self.Queue.get()
+            try:
+                Result = Job()
+            except Exception:
+                traceback.print_exc()
+                Callback = None
+            with self.Lock:
+                self.Active.discard(Name)
+
+            # Deliver result to callback on the event loop thread
+            if Callback is not None:
+                Clock.schedule_once(lambda dt, Callback=Callback, Result=Result: Callback(Result))
+
+# Define task runner shared by all network-bound jobs
+Tasks = TaskRunner()
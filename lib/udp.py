@@ -0,0 +1,252 @@
+""" Handles UDP messages broadcast on the local network by the WeatherFlow hub
+for the Raspberry Pi Python console for WeatherFlow Tempest and Smart Home
+Weather stations.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required library modules
+from lib import requestAPI
+
+# Import required modules
+from twisted.internet.protocol import DatagramProtocol
+from collections               import deque
+from threading                 import Thread
+import socket
+import json
+import time
+
+# Define global variables
+udpPort    = 50222
+strikeSpan = 3*3600
+
+# Define message types broadcast by the hub that are passed to the websocket
+# message pipeline
+udpTypes = ['obs_st','obs_sky','obs_air','rapid_wind','evt_strike']
+
+# Define index of the strike count in each observation message type
+strikeIndex = {'obs_st': 15, 'obs_air': 4}
+
+class HubListener(DatagramProtocol):
+
+    """ Listens for the JSON messages broadcast by the WeatherFlow hub on the
+    local network. Messages from the configured station devices are converted
+    to the format of the equivalent websocket message and passed to
+    WebsocketDecodeMessage
+    """
+
+    def __init__(self,app):
+
+        # Define app, device serial numbers, and lightning strike history
+        self._app    = app
+        self.Devices = {}
+        self.Strikes = {}
+        self.Started = {}
+        self.Last    = {}
+
+    def startProtocol(self):
+
+        # Set flags for required API calls after UDP listener is opened
+        print("UDP listener open")
+        self._app.flagAPI = [1,1,1,1]
+
+        # Get device serial numbers from station meta data
+        Thread(target=self.getDevices, name="UDPDevices", daemon=True).start()
+
+    def getDevices(self):
+
+        """ Maps the serial number of each station device to its device ID
+        using the WeatherFlow station meta data. If the meta data is not
+        available, devices are identified from their serial number prefix
+        """
+
+        # Download station meta data
+        Config = self._app.config
+        Data = requestAPI.weatherflow.stationMetaData(Config['Station']['StationID'],Config)
+
+        # Map device serial number to device ID
+        if requestAPI.weatherflow.verifyResponse(Data,'stations'):
+            Devices = {}
+            for Device in Data.json()['stations'][0]['devices']:
+                if 'serial_number' in Device:
+                    Devices[Device['serial_number']] = str(Device['device_id'])
+            self.Devices = Devices
+
+    def deviceID(self,Serial):
+
+        """ Returns the configured device ID of the device with the specified
+        serial number
+
+        INPUTS:
+            Serial              Device serial number
+
+        OUTPUT:
+            Device              Device ID. Set to None if device is not one of
+                                the configured station devices
+        """
+
+        # Define configured station devices
+        Context = self._app.Context
+        Station = [Context.TempestID,Context.SkyID,Context.OutAirID,Context.InAirID]
+
+        # Return device ID from station meta data
+        if Serial in self.Devices:
+            Device = self.Devices[Serial]
+            return Device if Device in Station else None
+
+        # Return device ID from serial number prefix
+        if Serial.startswith('ST-') and Context.TempestID:
+            return Context.TempestID
+        elif Serial.startswith('SK-') and Context.SkyID:
+            return Context.SkyID
+        elif Serial.startswith('AR-'):
+            if Context.OutAirID and not Context.InAirID:
+                return Context.OutAirID
+            elif Context.InAirID and not Context.OutAirID:
+                return Context.InAirID
+        return None
+
+    def strikeSummary(self,Device,Type,Ob):
+
+        """ Returns the lightning strike summary normally included in the
+        websocket observation message
+
+        INPUTS:
+            Device              Device ID
+            Type                Message type
+            Ob                  Latest observation
+
+        OUTPUT:
+            Summary             Lightning strike summary
+        """
+
+        # Add latest strike count to lightning strike history and remove
+        # counts older than three hours
+        Now = Ob[0]
+        if Device not in self.Strikes:
+            self.Strikes[Device] = deque()
+            self.Started[Device] = Now
+        Strikes = self.Strikes[Device]
+        if Ob[strikeIndex[Type]] is not None:
+            Strikes.append((Now,Ob[strikeIndex[Type]]))
+        while Strikes and Strikes[0][0] <= Now - strikeSpan:
+            Strikes.popleft()
+
+        # Define last strike time and distance, and three hour strike count
+        # once three hours of history are available
+        Summary = {}
+        if Device in self.Last:
+            Summary['strike_last_epoch'] = self.Last[Device][0]
+            Summary['strike_last_dist']  = self.Last[Device][1]
+        if Now - self.Started[Device] >= strikeSpan:
+            Summary['strike_count_3h'] = sum(Count for Time,Count in Strikes)
+
+        # Return lightning strike summary
+        return Summary
+
+    def datagramReceived(self,Datagram,Address):
+
+        # Record raw message if required, then convert message and pass to
+        # Websocket functions for processing
+        if self._app.Recorder is not None:
+            self._app.Recorder.message(Datagram,'UDP')
+        Msg = self.convert(Datagram)
+        if Msg is not None:
+            self._app.WebsocketDecodeMessage(Msg)
+
+    def convert(self,Datagram):
+
+        """ Decodes a message broadcast by the hub and converts it to the
+        equivalent websocket message
+
+        INPUTS:
+            Datagram            Raw message broadcast by the hub
+
+        OUTPUT:
+            Msg                 Equivalent websocket message. Set to None if
+                                the message is not required
+        """
+
+        # Decode message and extract device ID
+        try:
+            Msg = json.loads(Datagram.decode('utf8'))
+            Type = Msg['type']
+        except:
+            return None
+        if Type not in udpTypes:
+            return None
+        Device = self.deviceID(Msg.get('serial_number',''))
+        if Device is None:
+            return None
+
+        # Convert message to equivalent websocket message
+        Msg['device_id'] = int(Device)
+        if Type == 'evt_strike':
+            self.Last[Device] = Msg['evt'][:2]
+        elif Type in strikeIndex:
+            Msg['summary'] = self.strikeSummary(Device,Type,Msg['obs'][0])
+
+        # Return equivalent websocket message
+        return Msg
+
+class HubSender():
+
+    """ Local stand-in for the WeatherFlow hub that broadcasts JSON messages
+    in the hub UDP format. Used to exercise the UDP listener without station
+    hardware:
+
+        Hub = HubSender()
+        Hub.send({'serial_number': 'ST-00000001', 'type': 'rapid_wind',
+                  'hub_sn': 'HB-00000001', 'ob': [time.time(),2.3,128]})
+    """
+
+    def __init__(self,Host='255.255.255.255',Port=udpPort):
+
+        # Define destination address and broadcast socket
+        self.Address = (Host,Port)
+        self.Socket  = socket.socket(socket.AF_INET,socket.SOCK_DGRAM)
+        self.Socket.setsockopt(socket.SOL_SOCKET,socket.SO_BROADCAST,1)
+
+    def send(self,Msg):
+
+        """ Broadcasts a single hub message
+
+        INPUTS:
+            Msg                 Hub message
+        """
+
+        # Broadcast message as JSON
+        self.Socket.sendto(json.dumps(Msg).encode('utf8'),self.Address)
+
+    def replay(self,Messages,Interval=1):
+
+        """ Broadcasts a sequence of hub messages at a fixed interval
+
+        INPUTS:
+            Messages            List of hub messages
+            Interval            Interval between messages in seconds
+        """
+
+        # Broadcast each message in turn
+        for Msg in Messages:
+            self.send(Msg)
+            time.sleep(Interval)
+
+    def close(self):
+
+        """ Closes the broadcast socket
+        """
+
+        # Close socket
+        self.Socket.close()
@@ -16,57 +16,175 @@ this program. If not, see <http://www.gnu.org/licenses/>.
 """
 
 # Import required library modules
-from kivy.clock  import mainthread
+from lib.eventLoop import mainthread
 from lib         import derivedVariables   as derive
 from lib         import observationFormat  as observation
-from lib         import requestAPI
-import time
+from lib         import observationBuffer
+
+# Import required modules
+from twisted.protocols.policies import TimeoutMixin
+from twisted.internet.protocol  import ReconnectingClientFactory
+from autobahn.twisted.websocket import WebSocketClientProtocol, WebSocketClientFactory
+import threading
+import json
 
 # Define global variables
 NaN = float('NaN')
 
-def updateDisplay(derivedObs,wfpiconsole,Type):
+# Define events that are set once the first message from each device has been
+# received
+messageReady = {'TempestMsg': threading.Event(),
+                'SkyMsg':     threading.Event(),
+                'outAirMsg':  threading.Event(),
+                'inAirMsg':   threading.Event()}
 
-    """ Updates wfpiconsole display using mainthread functions with new
-    variables derived from latest websocket message
+# Specifies behaviour of Websocket Client
+class WeatherFlowClientProtocol(WebSocketClientProtocol,TimeoutMixin):
 
-    INPUTS:
-        derivedObs          Derived variables from latest Websocket message
-        wfpiconsole         wfpiconsole object
-        Type                Derived variable module type
-    """
+    def onOpen(self):
 
-    # Update display with new derived observations
-    for Key,Value in derivedObs.items():
-        wfpiconsole.Obs[Key] = Value
+        # Reset websocket reconnection delay and start timeout counter
+        print("Websocket connection open")
+        self.factory._proto = self
+        self.factory.resetDelay()
+        self.setTimeout(300)
 
-    # Set "Feels Like" icon if TemperaturePanel is active
-    if Type in ['Tempest','outdoorAir']  and hasattr(wfpiconsole,'TemperaturePanel'):
-        wfpiconsole.TemperaturePanel.setFeelsLikeIcon()
+        # Set flags for required API calls after Websocket connection
+        self.factory._app.flagAPI = [1,1,1,1]
 
-    # Set wind speed and direction icons if WindSpeedPanel panel is active
-    if Type in ['Tempest','Sky'] and hasattr(wfpiconsole,'WindSpeedPanel'):
-        wfpiconsole.WindSpeedPanel.setWindIcons()
+    def onMessage(self,payload,isBinary):
 
-    # Set current UV index background color if SunriseSunsetPanel is active
-    if Type in ['Tempest','Sky'] and hasattr(wfpiconsole,'SunriseSunsetPanel'):
-        wfpiconsole.SunriseSunsetPanel.setUVBackground()
+        # Record raw message if required, then decode message and pass to
+        # Websocket functions for processing
+        if self.factory._app.Recorder is not None:
+            self.factory._app.Recorder.message(payload,'Websocket')
+        Message = json.loads(payload.decode('utf8'))
+        self.factory._app.WebsocketDecodeMessage(Message)
 
-    # Animate rain rate level if RainfallPanel is active
-    if Type in ['Tempest','Sky'] and hasattr(wfpiconsole,'RainfallPanel'):
-        wfpiconsole.RainfallPanel.animateRainRate()
+        # Reset websocket timeout
+        self.resetTimeout()
 
-    # Set lightning bolt icon if LightningPanel is active
-    if Type in ['Tempest','outdoorAir']  and hasattr(wfpiconsole,'LightningPanel'):
-        wfpiconsole.LightningPanel.setLightningBoltIcon()
+    def timeoutConnection(self):
+        print("Websocket connection timeout")
+        self.transport.abortConnection()
 
-    # Set barometer arrow to current sea level pressure if BarometerPanel is
-    # active
-    if Type in ['Tempest','outdoorAir'] and hasattr(wfpiconsole,'BarometerPanel'):
-        wfpiconsole.BarometerPanel.setBarometerArrow()
+    def onClose(self,wasClean,code,reason):
+        print("Websocket connection closed")
+        self.factory._proto = None
 
-    # Return wfpiconsole object
-    return wfpiconsole
+# Specifies Websocket Factory
+class WeatherFlowClientFactory(WebSocketClientFactory,ReconnectingClientFactory):
+
+    # Define protocol and reconnection properties
+    protocol     = WeatherFlowClientProtocol
+    maxDelay     = 60
+    jitter       = 0
+
+    def clientConnectionFailed(self,connector,reason):
+        print('Websocket connection retrying')
+        self.retry(connector)
+
+    def clientConnectionLost(self,connector,reason):
+        print('Websocket connection retrying')
+        self.retry(connector)
+
+    def __init__(self, url, app):
+        WebSocketClientFactory.__init__(self,url)
+        self.maxdelay = 60
+        self._app     = app
+        self._proto   = None
+
+def decodeMessage(Msg,wfpiconsole):
+
+    """ Decodes a websocket message and passes it to the handler for its
+    message type
+
+    INPUTS:
+        Msg                 Websocket message
+        wfpiconsole         wfpiconsole object
+    """
+
+    # Extract type of received message
+    if "type" in Msg:
+        Type = Msg['type']
+    else:
+        print(json.dumps(Msg))
+        Type = 'unknown-value'
+
+    # Start listening for device observations and events upon connection of
+    # websocket based on device IDs specified in user configuration file
+    Config = wfpiconsole.config
+    if Type == 'connection_opened':
+        if Config['Station']['TempestID']:
+            wfpiconsole.WebsocketSendMessage('{"type":"listen_start",' +
+                                             ' "device_id":' + Config['Station']['TempestID'] + ',' +
+                                             ' "id":"Sky"}')
+            wfpiconsole.WebsocketSendMessage('{"type":"listen_rapid_start",' +
+                                             ' "device_id":' + Config['Station']['TempestID'] + ',' +
+                                             ' "id":"rapidWind"}')
+        elif Config['Station']['SkyID']:
+            wfpiconsole.WebsocketSendMessage('{"type":"listen_start",' +
+                                             ' "device_id":' + Config['Station']['SkyID'] + ',' +
+                                             ' "id":"Sky"}')
+            wfpiconsole.WebsocketSendMessage('{"type":"listen_rapid_start",' +
+                                             ' "device_id":' + Config['Station']['SkyID'] + ',' +
+                                             ' "id":"rapidWind"}')
+        if Config['Station']['OutAirID']:
+            wfpiconsole.WebsocketSendMessage('{"type":"listen_start",' +
+                                             ' "device_id":' + Config['Station']['OutAirID'] + ',' +
+                                             ' "id":"OutdoorAir"}')
+        if Config['Station']['InAirID']:
+            wfpiconsole.WebsocketSendMessage('{"type":"listen_start",' +
+                                             ' "device_id":' + Config['Station']['InAirID'] + ',' +
+                                             ' "id":"IndoorAir"}')
+
+    # Extract observations from obs_st websocket message
+    elif Type == 'obs_st':
+        wfpiconsole.Station.setDeviceStatus('Tempest',Msg)
+        wfpiconsole.obsQueue.put('Tempest',Tempest,Msg)
+
+    # Extract observations from obs_sky websocket message
+    elif Type == 'obs_sky':
+        wfpiconsole.Station.setDeviceStatus('Sky',Msg)
+        wfpiconsole.obsQueue.put('Sky',Sky,Msg)
+
+    # Extract observations from obs_air websocket message based on device
+    # ID
+    elif Type == 'obs_air':
+        if Config['Station']['InAirID'] and Msg['device_id'] == int(Config['Station']['InAirID']):
+            wfpiconsole.Station.setDeviceStatus('inAir',Msg)
+            wfpiconsole.obsQueue.put('indoorAir',indoorAir,Msg)
+        if Config['Station']['OutAirID'] and Msg['device_id'] == int(Config['Station']['OutAirID']):
+            wfpiconsole.Station.setDeviceStatus('outAir',Msg)
+            wfpiconsole.obsQueue.put('outdoorAir',outdoorAir,Msg)
+
+    # Extract observations from rapid_wind websocket message
+    elif Type == 'rapid_wind':
+        wfpiconsole.rapidWind.put(Msg)
+
+    # Extract observations from evt_strike websocket message
+    elif Type == 'evt_strike':
+        evtStrike(Msg,wfpiconsole)
+
+@mainthread
+def updateDisplay(derivedObs,wfpiconsole):
+
+    """ Updates wfpiconsole observations on the main thread with new variables
+    derived from latest websocket message. All derived variables are applied
+    in a single update, so subscribers are only notified of the variables that
+    have changed
+
+    INPUTS:
+        derivedObs          Derived variables from latest Websocket message
+        wfpiconsole         wfpiconsole object
+    """
+
+    # Identify derived observations that have changed
+    Changed = {Key for Key,Value in derivedObs.items() if Key not in wfpiconsole.Obs or wfpiconsole.Obs[Key] != Value}
+
+    # Update observations with all changed derived observations at once
+    if Changed:
+        wfpiconsole.Obs.update({Key: derivedObs[Key] for Key in Changed})
 
 def Tempest(Msg,wfpiconsole):
 
@@ -80,10 +198,12 @@ def Tempest(Msg,wfpiconsole):
     # Replace missing observations from latest SKY Websocket JSON with NaN
     Ob = [x if x != None else NaN for x in Msg['obs'][0]]
 
-    # Extract TEMPEST device ID, API flag, and station configuration object
-    Device  = wfpiconsole.config['Station']['TempestID']
+    # Extract TEMPEST device ID, API flag, and station configuration and
+    # context objects
+    Device  = wfpiconsole.Context.TempestID
     flagAPI = wfpiconsole.flagAPI[0]
     Config  = wfpiconsole.config
+    Context = wfpiconsole.Context
 
     # Extract required observations from latest TEMPEST Websocket JSON
     Time      = [Ob[0],'s']
@@ -106,6 +226,7 @@ def Tempest(Msg,wfpiconsole):
 
     # Store latest TEMPEST Websocket message
     wfpiconsole.Obs['TempestMsg'] = Msg
+    messageReady['TempestMsg'].set()
 
     # Extract required derived observations
     minPres     = wfpiconsole.Obs['MinPres']
@@ -123,88 +244,78 @@ def Tempest(Msg,wfpiconsole):
     avgWind     = wfpiconsole.Obs['AvgWind']
     maxGust     = wfpiconsole.Obs['MaxGust']
 
-    # Request TEMPEST data from the previous three hours
-    Data3h = requestAPI.weatherflow.Last3h(Device,Time[0],Config)
+    # Download TEMPEST data required to initialise the daily, monthly, and
+    # yearly aggregates if code is initialising or websocket has reconnected
+    if flagAPI:
+        apiData = derive.bootstrapData(Device,['Today','Yesterday','Month','Year'],Config)
+    else:
+        apiData = None
+
+    # Add latest observation to the rolling 24 hour observation count. Seed
+    # the count from the WeatherFlow API if code is initialising or websocket
+    # has reconnected
+    observationBuffer.Count(Device,Time[0],apiData)
+
+    # Add latest TEMPEST observation to the rolling three hour buffer. Seed
+    # the buffer from the WeatherFlow API if code is initialising or websocket
+    # has reconnected
+    Data3h = observationBuffer.Update(Device,Ob,flagAPI,Config)
 
     # Calculate derived variables from TEMPEST observations
     DewPoint         = derive.DewPoint(Temp,Humidity)
-    SLP              = derive.SLP(Pres,Config)
-    PresTrend        = derive.SLPTrend(Pres,Time,Data3h,Config)
-    FeelsLike        = derive.FeelsLike(Temp,Humidity,WindSpd,Config)
-    MaxTemp, MinTemp = derive.TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Config,flagAPI)
-    MaxPres, MinPres = derive.SLPMaxMin(Time,Pres,maxPres,minPres,Device,Config,flagAPI)
-    StrikeCount      = derive.StrikeCount(Strikes,StrikeCount,Device,Config,flagAPI)
-    StrikeFreq       = derive.StrikeFrequency(Time,Data3h,Config)
+    SLP              = derive.SLP(Pres,Context)
+    PresTrend        = derive.SLPTrend(Pres,Time,Data3h,Context)
+    FeelsLike        = derive.FeelsLike(Temp,Humidity,WindSpd,Context)
+    MaxTemp, MinTemp = derive.TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Context,apiData)
+    MaxPres, MinPres = derive.SLPMaxMin(Time,Pres,maxPres,minPres,Device,Context,apiData)
+    StrikeCount      = derive.StrikeCount(Strikes,StrikeCount,Device,Context,apiData)
+    StrikeFreq       = derive.StrikeFrequency(Time,Data3h)
     StrikeDeltaT     = derive.StrikeDeltaT(StrikeTime)
-    FeelsLike        = derive.FeelsLike(Temp,Humidity,WindSpd,Config)
+    FeelsLike        = derive.FeelsLike(Temp,Humidity,WindSpd,Context)
     RainRate         = derive.RainRate(Rain)
-    rainAccum        = derive.RainAccumulation(Rain,rainAccum,Device,Config,flagAPI)
-    AvgWind          = derive.MeanWindSpeed(WindSpd,avgWind,Device,Config,flagAPI)
-    MaxGust          = derive.MaxWindGust(WindGust,maxGust,Device,Config,flagAPI)
+    rainAccum        = derive.RainAccumulation(Rain,rainAccum,Device,Context,apiData)
+    AvgWind          = derive.MeanWindSpeed(WindSpd,avgWind,Device,Context,apiData)
+    MaxGust          = derive.MaxWindGust(WindGust,maxGust,Device,Context,apiData)
     WindSpd          = derive.BeaufortScale(WindSpd)
     WindDir          = derive.CardinalWindDirection (WindDir,WindSpd)
-    peakSun          = derive.peakSunHours(Radiation,peakSun,wfpiconsole.Astro,Device,Config,flagAPI)
+    peakSun          = derive.peakSunHours(Radiation,peakSun,wfpiconsole.Astro,Device,Context,apiData)
     UVIndex          = derive.UVIndex(UV)
 
-    # Convert observation units as required
-    Temp          = observation.Units(Temp,Config['Units']['Temp'])
-    MaxTemp       = observation.Units(MaxTemp,Config['Units']['Temp'])
-    MinTemp       = observation.Units(MinTemp,Config['Units']['Temp'])
-    DewPoint      = observation.Units(DewPoint,Config['Units']['Temp'])
-    FeelsLike     = observation.Units(FeelsLike,Config['Units']['Temp'])
-    SLP           = observation.Units(SLP,Config['Units']['Pressure'])
-    MaxPres       = observation.Units(MaxPres,Config['Units']['Pressure'])
-    MinPres       = observation.Units(MinPres,Config['Units']['Pressure'])
-    PresTrend     = observation.Units(PresTrend,Config['Units']['Pressure'])
-    StrikeDist    = observation.Units(StrikeDist,Config['Units']['Distance'])
-    RainRate      = observation.Units(RainRate,Config['Units']['Precip'])
-    TodayRain     = observation.Units(rainAccum['Today'],Config['Units']['Precip'])
-    YesterdayRain = observation.Units(rainAccum['Yesterday'],Config['Units']['Precip'])
-    MonthRain     = observation.Units(rainAccum['Month'],Config['Units']['Precip'])
-    YearRain      = observation.Units(rainAccum['Year'],Config['Units']['Precip'])
-    WindSpd       = observation.Units(WindSpd,Config['Units']['Wind'])
-    WindDir       = observation.Units(WindDir,Config['Units']['Direction'])
-    WindGust      = observation.Units(WindGust,Config['Units']['Wind'])
-    AvgWind       = observation.Units(AvgWind,Config['Units']['Wind'])
-    MaxGust       = observation.Units(MaxGust,Config['Units']['Wind'])
-    FeelsLike     = observation.Units(FeelsLike,Config['Units']['Temp'])
-
     # Store derived TEMPEST observations in dictionary
     derivedObs                  = {}
-    derivedObs['outTemp']       = observation.Format(Temp,'Temp')
-    derivedObs['outTempMax']    = observation.Format(MaxTemp,'Temp')
-    derivedObs['outTempMin']    = observation.Format(MinTemp,'Temp')
-    derivedObs['DewPoint']      = observation.Format(DewPoint,'Temp')
-    derivedObs['FeelsLike']     = observation.Format(FeelsLike,'Temp')
-    derivedObs['Pres']          = observation.Format(SLP,'Pressure')
-    derivedObs['MaxPres']       = observation.Format(MaxPres,'Pressure')
-    derivedObs['MinPres']       = observation.Format(MinPres,'Pressure')
-    derivedObs['PresTrend']     = observation.Format(PresTrend,'Pressure')
-    derivedObs['StrikeDeltaT']  = observation.Format(StrikeDeltaT,'TimeDelta')
-    derivedObs['StrikeDist']    = observation.Format(StrikeDist,'StrikeDistance')
-    derivedObs['StrikeFreq']    = observation.Format(StrikeFreq,'StrikeFrequency')
-    derivedObs['Strikes3hr']    = observation.Format(Strikes3hr,'StrikeCount')
-    derivedObs['StrikesToday']  = observation.Format(StrikeCount['Today'],'StrikeCount')
-    derivedObs['StrikesMonth']  = observation.Format(StrikeCount['Month'],'StrikeCount')
-    derivedObs['StrikesYear']   = observation.Format(StrikeCount['Year'], 'StrikeCount')
-    derivedObs['Humidity']      = observation.Format(Humidity,'Humidity')
-    derivedObs['FeelsLike']     = observation.Format(FeelsLike,'Temp')
-    derivedObs['RainRate']      = observation.Format(RainRate,'Precip')
-    derivedObs['TodayRain']     = observation.Format(TodayRain,'Precip')
-    derivedObs['YesterdayRain'] = observation.Format(YesterdayRain,'Precip')
-    derivedObs['MonthRain']     = observation.Format(MonthRain,'Precip')
-    derivedObs['YearRain']      = observation.Format(YearRain,'Precip')
-    derivedObs['WindSpd']       = observation.Format(WindSpd,'Wind')
-    derivedObs['WindGust']      = observation.Format(WindGust,'Wind')
-    derivedObs['AvgWind']       = observation.Format(AvgWind,'Wind')
-    derivedObs['MaxGust']       = observation.Format(MaxGust,'Wind')
-    derivedObs['WindDir']       = observation.Format(WindDir,'Direction')
-    derivedObs['Radiation']     = observation.Format(Radiation,'Radiation')
-    derivedObs['peakSun']       = observation.Format(peakSun,'peakSun')
-    derivedObs['UVIndex']       = observation.Format(UVIndex,'UV')
+    derivedObs['outTemp']       = observation.Record(Temp,'Temp',Context.Pipeline)
+    derivedObs['outTempMax']    = observation.Record(MaxTemp,'Temp',Context.Pipeline)
+    derivedObs['outTempMin']    = observation.Record(MinTemp,'Temp',Context.Pipeline)
+    derivedObs['DewPoint']      = observation.Record(DewPoint,'Temp',Context.Pipeline)
+    derivedObs['FeelsLike']     = observation.Record(FeelsLike,'Temp',Context.Pipeline)
+    derivedObs['Pres']          = observation.Record(SLP,'Pressure',Context.Pipeline)
+    derivedObs['MaxPres']       = observation.Record(MaxPres,'Pressure',Context.Pipeline)
+    derivedObs['MinPres']       = observation.Record(MinPres,'Pressure',Context.Pipeline)
+    derivedObs['PresTrend']     = observation.Record(PresTrend,'Pressure',Context.Pipeline)
+    derivedObs['StrikeDeltaT']  = observation.Record(StrikeDeltaT,'TimeDelta',Context.Pipeline)
+    derivedObs['StrikeDist']    = observation.Record(StrikeDist,'StrikeDistance',Context.Pipeline)
+    derivedObs['StrikeFreq']    = observation.Record(StrikeFreq,'StrikeFrequency',Context.Pipeline)
+    derivedObs['Strikes3hr']    = observation.Record(Strikes3hr,'StrikeCount',Context.Pipeline)
+    derivedObs['StrikesToday']  = observation.Record(StrikeCount['Today'],'StrikeCount',Context.Pipeline)
+    derivedObs['StrikesMonth']  = observation.Record(StrikeCount['Month'],'StrikeCount',Context.Pipeline)
+    derivedObs['StrikesYear']   = observation.Record(StrikeCount['Year'],'StrikeCount',Context.Pipeline)
+    derivedObs['Humidity']      = observation.Record(Humidity,'Humidity',Context.Pipeline)
+    derivedObs['RainRate']      = observation.Record(RainRate,'Precip',Context.Pipeline)
+    derivedObs['TodayRain']     = observation.Record(rainAccum['Today'],'Precip',Context.Pipeline)
+    derivedObs['YesterdayRain'] = observation.Record(rainAccum['Yesterday'],'Precip',Context.Pipeline)
+    derivedObs['MonthRain']     = observation.Record(rainAccum['Month'],'Precip',Context.Pipeline)
+    derivedObs['YearRain']      = observation.Record(rainAccum['Year'],'Precip',Context.Pipeline)
+    derivedObs['WindSpd']       = observation.Record(WindSpd,'Wind',Context.Pipeline)
+    derivedObs['WindGust']      = observation.Record(WindGust,'Wind',Context.Pipeline)
+    derivedObs['AvgWind']       = observation.Record(AvgWind,'Wind',Context.Pipeline)
+    derivedObs['MaxGust']       = observation.Record(MaxGust,'Wind',Context.Pipeline)
+    derivedObs['WindDir']       = observation.Record(WindDir,'Direction',Context.Pipeline)
+    derivedObs['Radiation']     = observation.Record(Radiation,'Radiation',Context.Pipeline)
+    derivedObs['peakSun']       = observation.Record(peakSun,'peakSun',Context.Pipeline)
+    derivedObs['UVIndex']       = observation.Record(UVIndex,'UV',Context.Pipeline)
 
     # Update wfpiconsole display with derived TEMPEST observations
-    updateDisplay(derivedObs,wfpiconsole,'Tempest')
+    updateDisplay(derivedObs,wfpiconsole)
 
     # Set flags for required API calls
     wfpiconsole.flagAPI[0] = 0
@@ -224,10 +335,12 @@ def Sky(Msg,wfpiconsole):
     # Replace missing observations from latest SKY Websocket JSON with NaN
     Ob = [x if x != None else NaN for x in Msg['obs'][0]]
 
-    # Extract SKY device ID and API flag, and station configuration object
-    Device  = wfpiconsole.config['Station']['SkyID']
+    # Extract SKY device ID and API flag, and station configuration and
+    # context objects
+    Device  = wfpiconsole.Context.SkyID
     flagAPI = wfpiconsole.flagAPI[1]
     Config  = wfpiconsole.config
+    Context = wfpiconsole.Context
 
     # Extract required observations from latest SKY Websocket JSON
     Time      = [Ob[0],'s']
@@ -240,10 +353,10 @@ def Sky(Msg,wfpiconsole):
 
     # Store latest SKY Websocket message
     wfpiconsole.Obs['SkyMsg'] = Msg
+    messageReady['SkyMsg'].set()
 
     # Extract required observations from latest AIR Websocket observations
-    while not 'outAirMsg' in wfpiconsole.Obs:
-        time.sleep(0.01)
+    messageReady['outAirMsg'].wait()
     Ob       = [x if x != None else NaN for x in wfpiconsole.Obs['outAirMsg']['obs'][0]]
     Temp     = [Ob[2],'c']
     Humidity = [Ob[3],'%']
@@ -261,49 +374,48 @@ def Sky(Msg,wfpiconsole):
     avgWind   = wfpiconsole.Obs['AvgWind']
     maxGust   = wfpiconsole.Obs['MaxGust']
 
+    # Download SKY data required to initialise the daily, monthly, and
+    # yearly aggregates if code is initialising or websocket has reconnected
+    if flagAPI:
+        apiData = derive.bootstrapData(Device,['Today','Yesterday','Month','Year'],Config)
+    else:
+        apiData = None
+
+    # Add latest observation to the rolling 24 hour observation count. Seed
+    # the count from the WeatherFlow API if code is initialising or websocket
+    # has reconnected
+    observationBuffer.Count(Device,Time[0],apiData)
+
     # Calculate derived variables from SKY observations
-    FeelsLike = derive.FeelsLike(Temp,Humidity,WindSpd,Config)
+    FeelsLike = derive.FeelsLike(Temp,Humidity,WindSpd,Context)
     RainRate  = derive.RainRate(Rain)
-    rainAccum = derive.RainAccumulation(Rain,rainAccum,Device,Config,flagAPI)
-    AvgWind   = derive.MeanWindSpeed(WindSpd,avgWind,Device,Config,flagAPI)
-    MaxGust   = derive.MaxWindGust(WindGust,maxGust,Device,Config,flagAPI)
+    rainAccum = derive.RainAccumulation(Rain,rainAccum,Device,Context,apiData)
+    AvgWind   = derive.MeanWindSpeed(WindSpd,avgWind,Device,Context,apiData)
+    MaxGust   = derive.MaxWindGust(WindGust,maxGust,Device,Context,apiData)
     WindSpd   = derive.BeaufortScale(WindSpd)
     WindDir   = derive.CardinalWindDirection(WindDir,WindSpd)
-    peakSun   = derive.peakSunHours(Radiation,peakSun,wfpiconsole.Astro,Device,Config,flagAPI)
+    peakSun   = derive.peakSunHours(Radiation,peakSun,wfpiconsole.Astro,Device,Context,apiData)
     UVIndex   = derive.UVIndex(UV)
 
-    # Convert observation units as required
-    RainRate      = observation.Units(RainRate,Config['Units']['Precip'])
-    TodayRain     = observation.Units(rainAccum['Today'],Config['Units']['Precip'])
-    YesterdayRain = observation.Units(rainAccum['Yesterday'],Config['Units']['Precip'])
-    MonthRain     = observation.Units(rainAccum['Month'],Config['Units']['Precip'])
-    YearRain      = observation.Units(rainAccum['Year'],Config['Units']['Precip'])
-    WindSpd       = observation.Units(WindSpd,Config['Units']['Wind'])
-    WindDir       = observation.Units(WindDir,Config['Units']['Direction'])
-    WindGust      = observation.Units(WindGust,Config['Units']['Wind'])
-    AvgWind       = observation.Units(AvgWind,Config['Units']['Wind'])
-    MaxGust       = observation.Units(MaxGust,Config['Units']['Wind'])
-    FeelsLike     = observation.Units(FeelsLike,Config['Units']['Temp'])
-
     # Store derived SKY observations in dictionary
     derivedObs                  = {}
-    derivedObs['FeelsLike']     = observation.Format(FeelsLike,'Temp')
-    derivedObs['RainRate']      = observation.Format(RainRate,'Precip')
-    derivedObs['TodayRain']     = observation.Format(TodayRain,'Precip')
-    derivedObs['YesterdayRain'] = observation.Format(YesterdayRain,'Precip')
-    derivedObs['MonthRain']     = observation.Format(MonthRain,'Precip')
-    derivedObs['YearRain']      = observation.Format(YearRain,'Precip')
-    derivedObs['WindSpd']       = observation.Format(WindSpd,'Wind')
-    derivedObs['WindGust']      = observation.Format(WindGust,'Wind')
-    derivedObs['AvgWind']       = observation.Format(AvgWind,'Wind')
-    derivedObs['MaxGust']       = observation.Format(MaxGust,'Wind')
-    derivedObs['WindDir']       = observation.Format(WindDir,'Direction')
-    derivedObs['Radiation']     = observation.Format(Radiation,'Radiation')
-    derivedObs['peakSun']       = observation.Format(peakSun,'peakSun')
-    derivedObs['UVIndex']       = observation.Format(UVIndex,'UV')
+    derivedObs['FeelsLike']     = observation.Record(FeelsLike,'Temp',Context.Pipeline)
+    derivedObs['RainRate']      = observation.Record(RainRate,'Precip',Context.Pipeline)
+    derivedObs['TodayRain']     = observation.Record(rainAccum['Today'],'Precip',Context.Pipeline)
+    derivedObs['YesterdayRain'] = observation.Record(rainAccum['Yesterday'],'Precip',Context.Pipeline)
+    derivedObs['MonthRain']     = observation.Record(rainAccum['Month'],'Precip',Context.Pipeline)
+    derivedObs['YearRain']      = observation.Record(rainAccum['Year'],'Precip',Context.Pipeline)
+    derivedObs['WindSpd']       = observation.Record(WindSpd,'Wind',Context.Pipeline)
+    derivedObs['WindGust']      = observation.Record(WindGust,'Wind',Context.Pipeline)
+    derivedObs['AvgWind']       = observation.Record(AvgWind,'Wind',Context.Pipeline)
+    derivedObs['MaxGust']       = observation.Record(MaxGust,'Wind',Context.Pipeline)
+    derivedObs['WindDir']       = observation.Record(WindDir,'Direction',Context.Pipeline)
+    derivedObs['Radiation']     = observation.Record(Radiation,'Radiation',Context.Pipeline)
+    derivedObs['peakSun']       = observation.Record(peakSun,'peakSun',Context.Pipeline)
+    derivedObs['UVIndex']       = observation.Record(UVIndex,'UV',Context.Pipeline)
 
     # Update wfpiconsole display with derived SKY observations
-    updateDisplay(derivedObs,wfpiconsole,'Sky')
+    updateDisplay(derivedObs,wfpiconsole)
 
     # Set flags for required API calls
     wfpiconsole.flagAPI[1] = 0
@@ -324,10 +436,11 @@ def outdoorAir(Msg,wfpiconsole):
     Ob = [x if x != None else NaN for x in Msg['obs'][0]]
 
     # Extract outdoor AIR device ID and API flag, and station configuration
-    # object
-    Device  = wfpiconsole.config['Station']['OutAirID']
+    # and context objects
+    Device  = wfpiconsole.Context.OutAirID
     flagAPI = wfpiconsole.flagAPI[2]
     Config  = wfpiconsole.config
+    Context = wfpiconsole.Context
 
     # Extract required observations from latest outdoor AIR Websocket JSON
     Time     = [Ob[0],'s']
@@ -351,63 +464,65 @@ def outdoorAir(Msg,wfpiconsole):
                     'Month': wfpiconsole.Obs['StrikesMonth'],
                     'Year':  wfpiconsole.Obs['StrikesYear']}
 
-    # Request outdoor AIR data from the previous three hours
-    Data3h = requestAPI.weatherflow.Last3h(Device,Time[0],Config)
+    # Add latest outdoor AIR observation to the rolling three hour buffer. Seed
+    # the buffer from the WeatherFlow API if code is initialising or websocket
+    # has reconnected
+    Data3h = observationBuffer.Update(Device,Ob,flagAPI,Config)
 
     # Store latest outdoor AIR Websocket message
     wfpiconsole.Obs['outAirMsg'] = Msg
+    messageReady['outAirMsg'].set()
 
     # Extract required observations from latest SKY Websocket JSON
-    while not 'SkyMsg' in wfpiconsole.Obs:
-        time.sleep(0.01)
+    messageReady['SkyMsg'].wait()
     Ob = [x if x != None else NaN for x in wfpiconsole.Obs['SkyMsg']['obs'][0]]
     WindSpd = [Ob[5],'mps']
 
+    # Download outdoor AIR data required to initialise the daily, monthly, and
+    # yearly aggregates if code is initialising or websocket has reconnected
+    if flagAPI:
+        apiData = derive.bootstrapData(Device,['Today','Month','Year'],Config)
+    else:
+        apiData = None
+
+    # Add latest observation to the rolling 24 hour observation count. Seed
+    # the count from the WeatherFlow API if code is initialising or websocket
+    # has reconnected
+    observationBuffer.Count(Device,Time[0],apiData)
+
     # Calculate derived variables from AIR observations
     DewPoint         = derive.DewPoint(Temp,Humidity)
-    SLP              = derive.SLP(Pres,Config)
-    PresTrend        = derive.SLPTrend(Pres,Time,Data3h,Config)
-    FeelsLike        = derive.FeelsLike(Temp,Humidity,WindSpd,Config)
-    MaxTemp, MinTemp = derive.TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Config,flagAPI)
-    MaxPres, MinPres = derive.SLPMaxMin(Time,Pres,maxPres,minPres,Device,Config,flagAPI)
-    StrikeCount      = derive.StrikeCount(Strikes,StrikeCount,Device,Config,flagAPI)
-    StrikeFreq       = derive.StrikeFrequency(Time,Data3h,Config)
+    SLP              = derive.SLP(Pres,Context)
+    PresTrend        = derive.SLPTrend(Pres,Time,Data3h,Context)
+    FeelsLike        = derive.FeelsLike(Temp,Humidity,WindSpd,Context)
+    MaxTemp, MinTemp = derive.TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Context,apiData)
+    MaxPres, MinPres = derive.SLPMaxMin(Time,Pres,maxPres,minPres,Device,Context,apiData)
+    StrikeCount      = derive.StrikeCount(Strikes,StrikeCount,Device,Context,apiData)
+    StrikeFreq       = derive.StrikeFrequency(Time,Data3h)
     StrikeDeltaT     = derive.StrikeDeltaT(StrikeTime)
 
-    # Convert observation units as required
-    Temp        = observation.Units(Temp,Config['Units']['Temp'])
-    MaxTemp     = observation.Units(MaxTemp,Config['Units']['Temp'])
-    MinTemp     = observation.Units(MinTemp,Config['Units']['Temp'])
-    DewPoint    = observation.Units(DewPoint,Config['Units']['Temp'])
-    FeelsLike   = observation.Units(FeelsLike,Config['Units']['Temp'])
-    SLP         = observation.Units(SLP,Config['Units']['Pressure'])
-    MaxPres     = observation.Units(MaxPres,Config['Units']['Pressure'])
-    MinPres     = observation.Units(MinPres,Config['Units']['Pressure'])
-    PresTrend   = observation.Units(PresTrend,Config['Units']['Pressure'])
-    StrikeDist  = observation.Units(StrikeDist,Config['Units']['Distance'])
-
     # Store derived outdoor AIR observations in dictionary
     derivedObs                 = {}
-    derivedObs['outTemp']      = observation.Format(Temp,'Temp')
-    derivedObs['outTempMax']   = observation.Format(MaxTemp,'Temp')
-    derivedObs['outTempMin']   = observation.Format(MinTemp,'Temp')
-    derivedObs['DewPoint']     = observation.Format(DewPoint,'Temp')
-    derivedObs['FeelsLike']    = observation.Format(FeelsLike,'Temp')
-    derivedObs['Pres']         = observation.Format(SLP,'Pressure')
-    derivedObs['MaxPres']      = observation.Format(MaxPres,'Pressure')
-    derivedObs['MinPres']      = observation.Format(MinPres,'Pressure')
-    derivedObs['PresTrend']    = observation.Format(PresTrend,'Pressure')
-    derivedObs['StrikeDeltaT'] = observation.Format(StrikeDeltaT,'TimeDelta')
-    derivedObs['StrikeDist']   = observation.Format(StrikeDist,'StrikeDistance')
-    derivedObs['StrikeFreq']   = observation.Format(StrikeFreq,'StrikeFrequency')
-    derivedObs['Strikes3hr']   = observation.Format(Strikes3hr,'StrikeCount')
-    derivedObs['StrikesToday'] = observation.Format(StrikeCount['Today'],'StrikeCount')
-    derivedObs['StrikesMonth'] = observation.Format(StrikeCount['Month'],'StrikeCount')
-    derivedObs['StrikesYear']  = observation.Format(StrikeCount['Year'],'StrikeCount')
-    derivedObs['Humidity']     = observation.Format(Humidity,'Humidity')
+    derivedObs['outTemp']      = observation.Record(Temp,'Temp',Context.Pipeline)
+    derivedObs['outTempMax']   = observation.Record(MaxTemp,'Temp',Context.Pipeline)
+    derivedObs['outTempMin']   = observation.Record(MinTemp,'Temp',Context.Pipeline)
+    derivedObs['DewPoint']     = observation.Record(DewPoint,'Temp',Context.Pipeline)
+    derivedObs['FeelsLike']    = observation.Record(FeelsLike,'Temp',Context.Pipeline)
+    derivedObs['Pres']         = observation.Record(SLP,'Pressure',Context.Pipeline)
+    derivedObs['MaxPres']      = observation.Record(MaxPres,'Pressure',Context.Pipeline)
+    derivedObs['MinPres']      = observation.Record(MinPres,'Pressure',Context.Pipeline)
+    derivedObs['PresTrend']    = observation.Record(PresTrend,'Pressure',Context.Pipeline)
+    derivedObs['StrikeDeltaT'] = observation.Record(StrikeDeltaT,'TimeDelta',Context.Pipeline)
+    derivedObs['StrikeDist']   = observation.Record(StrikeDist,'StrikeDistance',Context.Pipeline)
+    derivedObs['StrikeFreq']   = observation.Record(StrikeFreq,'StrikeFrequency',Context.Pipeline)
+    derivedObs['Strikes3hr']   = observation.Record(Strikes3hr,'StrikeCount',Context.Pipeline)
+    derivedObs['StrikesToday'] = observation.Record(StrikeCount['Today'],'StrikeCount',Context.Pipeline)
+    derivedObs['StrikesMonth'] = observation.Record(StrikeCount['Month'],'StrikeCount',Context.Pipeline)
+    derivedObs['StrikesYear']  = observation.Record(StrikeCount['Year'],'StrikeCount',Context.Pipeline)
+    derivedObs['Humidity']     = observation.Record(Humidity,'Humidity',Context.Pipeline)
 
     # Update wfpiconsole display with derived outdoor AIR observations
-    updateDisplay(derivedObs,wfpiconsole,'outdoorAir')
+    updateDisplay(derivedObs,wfpiconsole)
 
     # Set flags for required API calls
     wfpiconsole.flagAPI[2] = 0
@@ -428,10 +543,11 @@ def indoorAir(Msg,wfpiconsole):
     Ob = [x if x != None else NaN for x in Msg['obs'][0]]
 
     # Extract indoor AIR device ID and API flag, and station configuration
-    # object
-    Device  = wfpiconsole.config['Station']['InAirID']
+    # and context objects
+    Device  = wfpiconsole.Context.InAirID
     flagAPI = wfpiconsole.flagAPI[3]
     Config  = wfpiconsole.config
+    Context = wfpiconsole.Context
 
     # Extract required observations from latest indoor AIR Websocket JSON
     Time     = [Ob[0],'s']
@@ -439,27 +555,35 @@ def indoorAir(Msg,wfpiconsole):
 
     # Store latest indoor AIR Websocket message
     wfpiconsole.Obs['inAirMsg'] = Msg
+    messageReady['inAirMsg'].set()
 
     # Extract required derived observations
     minTemp = wfpiconsole.Obs['inTempMin']
     maxTemp = wfpiconsole.Obs['inTempMax']
 
-    # Calculate derived variables from indoor AIR observations
-    MaxTemp, MinTemp = derive.TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Config,flagAPI)
+    # Download indoor AIR data required to initialise the daily, monthly, and
+    # yearly aggregates if code is initialising or websocket has reconnected
+    if flagAPI:
+        apiData = derive.bootstrapData(Device,['Today'],Config)
+    else:
+        apiData = None
 
-    # Convert observation units as required
-    Temp    = observation.Units(Temp,   Config['Units']['Temp'])
-    MaxTemp = observation.Units(MaxTemp,Config['Units']['Temp'])
-    MinTemp = observation.Units(MinTemp,Config['Units']['Temp'])
+    # Add latest observation to the rolling 24 hour observation count. Seed
+    # the count from the WeatherFlow API if code is initialising or websocket
+    # has reconnected
+    observationBuffer.Count(Device,Time[0],apiData)
+
+    # Calculate derived variables from indoor AIR observations
+    MaxTemp, MinTemp = derive.TempMaxMin(Time,Temp,maxTemp,minTemp,Device,Context,apiData)
 
     # Store derived indoor AIR observations in Data dictionary
     derivedObs              = {}
-    derivedObs['inTemp']    = observation.Format(Temp,   'Temp')
-    derivedObs['inTempMax'] = observation.Format(MaxTemp,'Temp')
-    derivedObs['inTempMin'] = observation.Format(MinTemp,'Temp')
+    derivedObs['inTemp']    = observation.Record(Temp,'Temp',Context.Pipeline)
+    derivedObs['inTempMax'] = observation.Record(MaxTemp,'Temp',Context.Pipeline)
+    derivedObs['inTempMin'] = observation.Record(MinTemp,'Temp',Context.Pipeline)
 
     # Update wfpiconsole display with derived indoor AIR observations
-    updateDisplay(derivedObs,wfpiconsole,'indoorAir')
+    updateDisplay(derivedObs,wfpiconsole)
 
     # Set flags for required API calls
     wfpiconsole.flagAPI[3] = 0
@@ -467,56 +591,45 @@ def indoorAir(Msg,wfpiconsole):
     # Return wfpiconsole object
     return wfpiconsole
 
-def rapidWind(Msg,wfpiconsole):
+def rapidWind(Ob,Channel,wfpiconsole):
 
-    """ Handles RapidWind Websocket messages received from either SKY or TEMPEST
-        module
+    """ Handles the latest RapidWind observation received from either SKY or
+        TEMPEST module
 
     INPUTS:
-        Msg                 Websocket messages received from SKY or TEMPEST
+        Ob                  Latest Rapid Wind observation received from SKY or
+                            TEMPEST
+        Channel             Rapid wind channel holding the last wind direction
+                            and speed
         wfpiconsole         wfpiconsole object
     """
 
-    # Replace missing observations from Rapid Wind Websocket JSON
-    # with NaN
-    Ob = [x if x != None else NaN for x in Msg['ob']]
+    # Replace missing observations from Rapid Wind observation with NaN
+    Ob = [x if x != None else NaN for x in Ob]
 
-    # Extract observations from latest Rapid Wind Websocket JSON
+    # Extract observations from latest Rapid Wind observation
     Time    = [Ob[0],'s']
     WindSpd = [Ob[1],'mps']
     WindDir = [Ob[2],'degrees']
 
-    # Extract wind direction from previous SKY Rapid-Wind Websocket JSON
-    if 'RapidMsg' in wfpiconsole.Obs:
-        Ob = [x if x != None else NaN for x in wfpiconsole.Obs['RapidMsg']['ob']]
-        WindDirOld = [Ob[2],'degrees']
-    else:
-        WindDirOld = [0,'degrees']
-
     # If windspeed is zero, freeze direction at last direction of non-zero wind
-    # speed and edit latest Rapid Wind Websocket JSON. Calculate wind shift
+    # speed
     if WindSpd[0] == 0:
-        WindDir = WindDirOld
-        Msg['ob'][2] = WindDirOld[0]
+        WindDir = [Channel.Direction,'degrees']
 
-    # Store latest Rapid Wind wfpiconsole.Observation JSON message
-    wfpiconsole.Obs['RapidMsg'] = Msg
+    # Store latest Rapid Wind direction and speed
+    Channel.Direction = WindDir[0]
+    Channel.Speed     = WindSpd[0]
 
     # Calculate derived variables from Rapid Wind observations
     WindDir = derive.CardinalWindDirection(WindDir,WindSpd)
 
     # Convert observation units as required
-    WindSpd = observation.Units(WindSpd,wfpiconsole.config['Units']['Wind'])
     WindDir = observation.Units(WindDir,'degrees')
 
     # Update wfpiconsole display with derived Rapid Wind observations
-    wfpiconsole.Obs['rapidShift'] = WindDir[0] - WindDirOld[0]
-    wfpiconsole.Obs['rapidSpd']   = observation.Format(WindSpd,'Wind')
-    wfpiconsole.Obs['rapidDir']   = observation.Format(WindDir,'Direction')
-
-    # Animate wind rose arrow if WindSpeedPanel panel is active
-    if hasattr(wfpiconsole,'WindSpeedPanel'):
-        wfpiconsole.WindSpeedPanel.animateWindRose()
+    wfpiconsole.Obs['rapidSpd'] = observation.Record(WindSpd,'Wind',wfpiconsole.Context.Pipeline)
+    wfpiconsole.Obs['rapidDir'] = observation.Format(WindDir,'Direction')
 
     # Return wfpiconsole object
     return wfpiconsole
@@ -541,24 +654,9 @@ def evtStrike(Msg,wfpiconsole):
     # Calculate derived variables from evt_strike observations
     StrikeDeltaT = derive.StrikeDeltaT(StrikeTime)
 
-    # Convert observation units as required
-    StrikeDist = observation.Units(StrikeDist,wfpiconsole.config['Units']['Distance'])
-
     # Update wfpiconsole display with derived Rapid Wind observations
-    wfpiconsole.Obs['StrikeDeltaT'] = observation.Format(StrikeDeltaT,'TimeDelta')
-    wfpiconsole.Obs['StrikeDist']   = observation.Format(StrikeDist,'StrikeDistance')
-
-    # If required, open secondary lightning panel to show strike has been
-    # detected
-    if wfpiconsole.config['Display']['LightningPanel'] == '1':
-        for ii,Button in enumerate(wfpiconsole.CurrentConditions.buttonList):
-            if "Lightning" in Button[2]:
-                wfpiconsole.CurrentConditions.SwitchPanel([],Button)
-
-    # Set and animate lightning bolt icon if LightningPanel panel is active
-    if hasattr(wfpiconsole,'LightningPanel'):
-        wfpiconsole.LightningPanel.setLightningBoltIcon()
-        wfpiconsole.LightningPanel.animateLightningBoltIcon()
+    wfpiconsole.Obs['StrikeDeltaT'] = observation.Record(StrikeDeltaT,'TimeDelta',wfpiconsole.Context.Pipeline)
+    wfpiconsole.Obs['StrikeDist']   = observation.Record(StrikeDist,'StrikeDistance',wfpiconsole.Context.Pipeline)
 
     # Return wfpiconsole object
     return wfpiconsole
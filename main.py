@@ -20,6 +20,15 @@
 # =============================================================================
 SHUTDOWN = 0
 REBOOT = 0
+RECORD = None
+
+# Define panel methods that are notified when their bound observations change
+panelBindings = [['TemperaturePanel',   'setFeelsLikeIcon',     ['FeelsLike']],
+                 ['WindSpeedPanel',     'setWindIcons',         ['WindSpd','WindDir']],
+                 ['SunriseSunsetPanel', 'setUVBackground',      ['UVIndex']],
+                 ['RainfallPanel',      'animateRainRate',      ['RainRate']],
+                 ['LightningPanel',     'setLightningBoltIcon', ['StrikeDeltaT']],
+                 ['BarometerPanel',     'setBarometerArrow',    ['Pres']]]
 
 # ==============================================================================
 # CREATE OR UPDATE wfpiconsole.ini FILE
@@ -74,62 +83,6 @@ from kivy.support import install_twisted_reactor
 install_twisted_reactor()
 
 from twisted.python             import log
-from twisted.internet.protocol  import ReconnectingClientFactory
-from twisted.protocols.policies import TimeoutMixin
-from autobahn.twisted.websocket import WebSocketClientProtocol, WebSocketClientFactory, connectWS
-
-# Specifies behaviour of Websocket Client
-class WeatherFlowClientProtocol(WebSocketClientProtocol,TimeoutMixin):
-
-    def onOpen(self):
-
-        # Reset websocket reconnection delay and start timeout counter
-        print("Websocket connection open")
-        self.factory._proto = self
-        self.factory.resetDelay()
-        self.setTimeout(300)
-
-        # Set flags for required API calls after Websocket connection
-        self.factory._app.flagAPI = [1,1,1,1]
-
-    def onMessage(self,payload,isBinary):
-
-        # Decode message and pass to Websocket functions for processing
-        Message = json.loads(payload.decode('utf8'))
-        self.factory._app.WebsocketDecodeMessage(Message)
-
-        # Reset websocket timeout
-        self.resetTimeout()
-
-    def timeoutConnection(self):
-        print("Websocket connection timeout")
-        self.transport.abortConnection()
-
-    def onClose(self,wasClean,code,reason):
-        print("Websocket connection closed")
-        self.factory._proto = None
-
-# Specifies Websocket Factory
-class WeatherFlowClientFactory(WebSocketClientFactory,ReconnectingClientFactory):
-
-    # Define protocol and reconnection properties
-    protocol     = WeatherFlowClientProtocol
-    maxDelay     = 60
-    jitter       = 0
-
-    def clientConnectionFailed(self,connector,reason):
-        print('Websocket connection retrying')
-        self.retry(connector)
-
-    def clientConnectionLost(self,connector,reason):
-        print('Websocket connection retrying')
-        self.retry(connector)
-
-    def __init__(self, url, app):
-        WebSocketClientFactory.__init__(self,url)
-        self.maxdelay = 60
-        self._app     = app
-        self._proto   = None
 
 # ==============================================================================
 # IMPORT REQUIRED CORE KIVY MODULES
@@ -147,30 +100,20 @@ from kivy.app         import App
 # ==============================================================================
 # IMPORT REQUIRED LIBRARY MODULES
 # ==============================================================================
-from lib import astronomical       as astro
-from lib import derivedVariables   as derive
-from lib import observationFormat  as observation
 from lib import sager              as sagerForecast
-from lib import requestAPI
-from lib import websocket
+from lib import eventLoop
 from lib import settings
 from lib import forecast
-from lib import station
 from lib import system
+from lib import replay
+from lib import core
 
 # ==============================================================================
 # IMPORT REQUIRED SYSTEM MODULES
 # ==============================================================================
-from twisted.internet import reactor, ssl
-from functools        import partial
-from threading        import Thread
-from datetime         import datetime, date, time, timedelta
 from optparse         import OptionParser
 import subprocess
-import requests
-import pytz
 import math
-import json
 import sys
 
 # ==============================================================================
@@ -197,30 +140,12 @@ from kivy.uix.label          import Label
 class wfpiconsole(App):
 
     # Define App class observation dictionary properties
-    Obs = DictProperty      ([('rapidSpd','--'),       ('rapidDir','----'),    ('rapidShift','-'),
-                              ('WindSpd','-----'),     ('WindGust','--'),      ('WindDir','---'),
-                              ('AvgWind','--'),        ('MaxGust','--'),       ('RainRate','---'),
-                              ('TodayRain','--'),      ('YesterdayRain','--'), ('MonthRain','--'),
-                              ('YearRain','--'),       ('Radiation','----'),   ('UVIndex','----'),
-                              ('peakSun','-----'),     ('outTemp','--'),       ('outTempMin','---'),
-                              ('outTempMax','---'),    ('inTemp','--'),        ('inTempMin','---'),
-                              ('inTempMax','---'),     ('Humidity','--'),      ('DewPoint','--'),
-                              ('Pres','---'),          ('MaxPres','---'),      ('MinPres','---'),
-                              ('PresTrend','----'),    ('FeelsLike','----'),   ('StrikeDeltaT','-----'),
-                              ('StrikeDist','--'),     ('StrikeFreq','----'),  ('Strikes3hr','-'),
-                              ('StrikesToday','-'),    ('StrikesMonth','-'),   ('StrikesYear','-')
-                             ])
-    Astro = DictProperty    ([('Sunrise',['-','-',0]), ('Sunset',['-','-',0]), ('Dawn',['-','-',0]),
-                              ('Dusk',['-','-',0]),    ('sunEvent','----'),    ('sunIcon',['-',0,0]),
-                              ('Moonrise',['-','-']), ('Moonset',['-','-']),   ('NewMoon','--'),
-                              ('FullMoon','--'),      ('Phase','---'),         ('Reformat','-'),
-                             ])
-    MetData = DictProperty  ([('Weather','Building'),  ('Temp','--'),          ('Precip','--'),
-                              ('WindSpd','--'),        ('WindDir','--'),       ('Valid','--')
-                             ])
-    Sager = DictProperty    ([('Forecast','--'),       ('Issued','--')])
-    System = DictProperty   ([('Time','-'),            ('Date','-')])
-    Version = DictProperty  ([('Latest','-')])
+    Obs = DictProperty      (core.obsDefaults)
+    Astro = DictProperty    (core.astroDefaults)
+    MetData = DictProperty  (core.metDataDefaults)
+    Sager = DictProperty    (core.sagerDefaults)
+    System = DictProperty   (core.systemDefaults)
+    Version = DictProperty  (core.versionDefaults)
 
     # Define App class configParser properties
     BarometerMax = ConfigParserProperty('-','System', 'BarometerMax','wfpiconsole')
@@ -238,6 +163,10 @@ class wfpiconsole(App):
         self.config.read('wfpiconsole.ini')
         self.settings_cls = SettingsWithSidebar
 
+        # Build core service from user configuration. Record websocket
+        # messages and API responses if required
+        self.Core = core.CoreService(self.config,replay.Recorder(RECORD) if RECORD else None)
+
         # Force window size if required based on hardware type
         if self.config['System']['Hardware'] == 'Pi4':
             Window.size = (800,480)
@@ -246,33 +175,14 @@ class wfpiconsole(App):
         elif self.config['System']['Hardware'] == 'Other':
             Window.size = (800,480)
 
-        # Initialise real time clock
-        Clock.schedule_interval(partial(system.realtimeClock,self.System,self.config),1.0)
-
-        # Initialise Sunrise and Sunset time, Moonrise and Moonset time, and
-        # WeatherFlow weather forecast
-        astro.SunriseSunset(self.Astro,self.config)
-        astro.MoonriseMoonset(self.Astro,self.config)
-        forecast.Download(self.MetData,self.config)
-
-        # Generate Sager Weathercaster forecast
-        Thread(target=sagerForecast.Generate, args=(self.Sager,self.config), name="Sager", daemon=True).start()
-
-        # Initialise websocket connection
-        self.WebsocketConnect()
-
-        # Check for latest version
-        Clock.schedule_once(partial(system.checkVersion,self.Version,self.config,updateNotif))
-
-        # Initialise Station class, and set device status to be checked every
-        # second
+        # Initialise Station class and subscribe display to changes in the
+        # core state
         self.Station = Station()
-        Clock.schedule_interval(self.Station.getDeviceStatus,1.0)
+        self.Core.subscribe(self.UpdateDisplay)
 
-        # Schedule function calls
-        Clock.schedule_interval(self.UpdateMethods,1.0)
-        Clock.schedule_interval(partial(astro.sunTransit,self.Astro,self.config),1.0)
-        Clock.schedule_interval(partial(astro.moonPhase ,self.Astro,self.config),1.0)
+        # Run core event loop on every frame and start core service
+        Clock.schedule_interval(lambda dt: eventLoop.Clock.tick(),0)
+        self.Core.start()
 
     # BUILD 'WeatherFlowPiConsole' APP CLASS SETTINGS
     # --------------------------------------------------------------------------
@@ -301,10 +211,10 @@ class wfpiconsole(App):
         # Update current weather forecast and Sager Weathercaster forecast when
         # temperature or wind speed units are changed
         if section == 'Units' and key in ['Temp','Wind']:
-            forecast.Extract(self.MetData,self.config)
-            if key == 'Wind' and 'Dial' in self.Sager:
-                self.Sager['Dial']['Units'] = value
-                self.Sager['Forecast'] = sagerForecast.getForecast(self.Sager['Dial'])
+            forecast.Extract(self.Core.MetData,self.config)
+            if key == 'Wind' and 'Dial' in self.Core.Sager:
+                self.Core.Sager['Dial']['Units'] = value
+                self.Core.Sager['Forecast'] = sagerForecast.getForecast(self.Core.Sager['Dial'])
 
         # Update "Feels Like" temperature cutoffs in wfpiconsole.ini and the
         # settings screen when temperature units are changed
@@ -370,115 +280,47 @@ class wfpiconsole(App):
                                     item.value = ''
                                     break
 
-    # CONNECT TO THE SECURE WEATHERFLOW WEBSOCKET SERVER
-    # --------------------------------------------------------------------------
-    def WebsocketConnect(self):
-        Server = 'wss://ws.weatherflow.com/swd/data?api_key=' + self.config['Keys']['WeatherFlow']
-        self._factory = WeatherFlowClientFactory(Server,self)
-        reactor.connectSSL('ws.weatherflow.com',443,self._factory,ssl.ClientContextFactory(),20)
+        # Rebuild station context from updated user configuration
+        self.Core.updateContext()
 
-    # SEND MESSAGE TO THE WEATHERFLOW WEBSOCKET SERVER
+    # UPDATE DISPLAY WITH CHANGES TO THE CORE STATE
     # --------------------------------------------------------------------------
-    def WebsocketSendMessage(self,Message):
-        Message = Message.encode('utf8')
-        proto = self._factory._proto
-        if Message and proto:
-            proto.sendMessage(Message)
+    def UpdateDisplay(self,Name,Changes):
 
-    # DECODE THE WEATHERFLOW WEBSOCKET MESSAGE
-    # --------------------------------------------------------------------------
-    def WebsocketDecodeMessage(self,Msg):
-
-        # Extract type of received message
-        Type = Msg['type']
-        if "type" in Msg:
-            Type = Msg['type']
+        # Update display with changes to core state
+        if Name == 'Device':
+            self.Station.Device.update(Changes)
         else:
-            print(json.dumps(Msg))
-            Type = 'unknown-value'
-
-        # Start listening for device observations and events upon connection of
-        # websocket based on device IDs specified in user configuration file
-        if Type == 'connection_opened':
-            if self.config['Station']['TempestID']:
-                self.WebsocketSendMessage('{"type":"listen_start",' +
-                                          ' "device_id":' + self.config['Station']['TempestID'] + ',' +
-                                          ' "id":"Sky"}')
-                self.WebsocketSendMessage('{"type":"listen_rapid_start",' +
-                                          ' "device_id":' + self.config['Station']['TempestID'] + ',' +
-                                          ' "id":"rapidWind"}')
-            elif self.config['Station']['SkyID']:
-                self.WebsocketSendMessage('{"type":"listen_start",' +
-                                          ' "device_id":' + self.config['Station']['SkyID'] + ',' +
-                                          ' "id":"Sky"}')
-                self.WebsocketSendMessage('{"type":"listen_rapid_start",' +
-                                          ' "device_id":' + self.config['Station']['SkyID'] + ',' +
-                                          ' "id":"rapidWind"}')
-            if self.config['Station']['OutAirID']:
-                self.WebsocketSendMessage('{"type":"listen_start",' +
-                                          ' "device_id":' + self.config['Station']['OutAirID'] + ',' +
-                                          ' "id":"OutdoorAir"}')
-            if self.config['Station']['InAirID']:
-                self.WebsocketSendMessage('{"type":"listen_start",' +
-                                          ' "device_id":' + self.config['Station']['InAirID'] + ',' +
-                                          ' "id":"IndoorAir"}')
-
-        # Extract observations from obs_st websocket message
-        elif Type == 'obs_st':
-            Thread(target=websocket.Tempest, args=(Msg,self), name="Tempest", daemon=True).start()
-
-        # Extract observations from obs_sky websocket message
-        elif Type == 'obs_sky':
-            Thread(target=websocket.Sky, args=(Msg,self), name="Sky", daemon=True).start()
-
-        # Extract observations from obs_air websocket message based on device
-        # ID
-        elif Type == 'obs_air':
-            if self.config['Station']['InAirID'] and Msg['device_id'] == int(self.config['Station']['InAirID']):
-                Thread(target=websocket.indoorAir, args=(Msg,self),  name="indoorAir",  daemon=True).start()
-            if self.config['Station']['OutAirID'] and Msg['device_id'] == int(self.config['Station']['OutAirID']):
-                Thread(target=websocket.outdoorAir, args=(Msg,self), name="outdoorAir", daemon=True).start()
-
-        # Extract observations from rapid_wind websocket message
-        elif Type == 'rapid_wind':
-            websocket.rapidWind(Msg,self)
-
-        # Extract observations from evt_strike websocket message
-        elif Type == 'evt_strike':
-            websocket.evtStrike(Msg,self)
-
-    # UPDATE 'WeatherFlowPiConsole' APP CLASS METHODS AT REQUIRED INTERVALS
-    # --------------------------------------------------------------------------
-    def UpdateMethods(self,dt):
-
-        # Get current time in station timezone
-        Tz = pytz.timezone(self.config['Station']['Timezone'])
-        Now = datetime.now(pytz.utc).astimezone(Tz)
-        Now = Now.replace(microsecond=0)
-
-        # At 5 minutes past each hour, download a new forecast for the Station
-        # location
-        if (Now.minute,Now.second) == (5,0):
-            forecast.Download(self.MetData,self.config)
-
-        # At the top of each hour update the on-screen forecast for the Station
-        # location
-        if Now.hour > self.MetData['Time'].hour or Now.date() > self.MetData['Time'].date():
-            forecast.Extract(self.MetData,self.config)
-            self.MetData['Time'] = Now
-
-        # Once dusk has passed, calculate new sunrise/sunset times
-        if Now >= self.Astro['Dusk'][0]:
-            self.Astro = astro.SunriseSunset(self.Astro,self.config)
-
-        # Once moonset has passed, calculate new moonrise/moonset times
-        if Now > self.Astro['Moonset'][0]:
-            self.Astro = astro.MoonriseMoonset(self.Astro,self.config)
-
-        # At midnight, update Sunset, Sunrise, Moonrise and Moonset Kivy Labels
-        if self.Astro['Reformat'] and Now.replace(second=0).time() == time(0,0,0):
-            self.Astro = astro.Format(self.Astro,self.config,"Sun")
-            self.Astro = astro.Format(self.Astro,self.config,"Moon")
+            getattr(self,Name).update(Changes)
+
+        # Notify active panels whose bound observations have changed
+        if Name == 'Obs':
+            for Panel, Method, Keys in panelBindings:
+                if hasattr(self,Panel) and not Changes.keys().isdisjoint(Keys):
+                    getattr(getattr(self,Panel),Method)()
+
+            # Animate wind rose arrow if WindSpeedPanel panel is active
+            if 'rapidDir' in Changes and hasattr(self,'WindSpeedPanel'):
+                self.WindSpeedPanel.animateWindRose()
+
+            # If required, open secondary lightning panel to show strike has
+            # been detected, and animate lightning bolt icon if LightningPanel
+            # panel is active
+            if 'evtStrikeMsg' in Changes:
+                if self.config['Display']['LightningPanel'] == '1':
+                    for ii,Button in enumerate(self.CurrentConditions.buttonList):
+                        if "Lightning" in Button[2]:
+                            self.CurrentConditions.SwitchPanel([],Button)
+                if hasattr(self,'LightningPanel'):
+                    self.LightningPanel.setLightningBoltIcon()
+                    self.LightningPanel.animateLightningBoltIcon()
+
+        # Open update notification if a new version is available
+        if Name == 'Version' and 'Latest' in Changes and system.updateAvailable(self.Version,self.config):
+            if hasattr(self,'updateNotif'):
+                self.updateNotif.dismiss()
+            self.updateNotif = updateNotif()
+            self.updateNotif.open()
 
 # ==============================================================================
 # CurrentConditions SCREEN CLASS
@@ -614,11 +456,23 @@ class WindSpeedPanel(RelativeLayout):
     # Animate rapid wind rose
     def animateWindRose(self):
 
-        # Get current wind direction, old wind direction and change in wind
-        # direction over last Rapid-Wind period
-        windShift = App.get_running_app().Obs['rapidShift']
-        newDirec = App.get_running_app().Obs['RapidMsg']['ob'][2]
-        oldDirec = newDirec - windShift
+        # Get latest Rapid-Wind wind direction, current wind rose direction and
+        # change in wind direction
+        newDirec  = App.get_running_app().Core.rapidWind.Direction
+        oldDirec  = self.rapidWindDir
+        windShift = newDirec - oldDirec
+
+        # Cancel any in-flight animation so the new animation continues from
+        # the current wind rose direction
+        Animation.cancel_all(self,'rapidWindDir')
+
+        # Leave wind rose unchanged if wind direction is missing, and set wind
+        # rose direction without animation if panel is not visible
+        if math.isnan(newDirec):
+            return
+        elif self.get_root_window() is None:
+            self.rapidWindDir = newDirec
+            return
 
         # Animate Wind Rose at constant speed between old and new Rapid-Wind
         # wind direction
@@ -809,25 +663,15 @@ class updateNotif(ModalView):
 class Station(Widget):
 
     # Define Station class Device properties
-    Device = DictProperty([('tempestSampleTime','-'), ('tempestVoltage','-'), ('tempestStatus','-'),
-                           ('tempestObCount','-'),    ('skySampleTime','-'),  ('skyVoltage','-'),
-                           ('skyStatus','-'),         ('skyObCount','-'),     ('outAirSampleTime','-'),
-                           ('outAirVoltage','-'),     ('outAirStatus','-'),   ('outAirObCount','-'),
-                           ('inAirSampleTime','-'),   ('inAirVoltage','-'),   ('inAirStatus','-'),
-                           ('inAirObCount','-'),      ('stationStatus','-'),  ('hubFirmware','-')
-                          ])
+    Device = DictProperty(core.deviceDefaults)
 
     # Get hub status from device status
     def getStationStatus(self):
-        Thread(target=station.getHubStatus, args=(self.Device,App.get_running_app()), name="getHubStatus", daemon=True).start()
-
-    # Get device status from last observation time
-    def getDeviceStatus(self,dt):
-        station.getDeviceStatus(self.Device,App.get_running_app())
+        App.get_running_app().Core.Station.getStationStatus()
 
-    # Get device observation count from WeatherFlow API
+    # Get device observation count from rolling 24 hour observation counts
     def getObservationCount(self):
-        Thread(target=station.getObservationCount, args=(self.Device,App.get_running_app()), name="getObservationCount", daemon=True).start()
+        App.get_running_app().Core.Station.getObservationCount()
 
 # ==============================================================================
 # mainMenu AND [module]Status CLASSES
@@ -1038,6 +882,10 @@ class BoldText():
 # RUN APP
 # ==============================================================================
 if __name__ == '__main__':
+    Parser = OptionParser(usage='python main.py [-- --record FILE]')
+    Parser.add_option('--record', dest='record', metavar='FILE',
+                      help='record websocket messages and API responses to FILE')
+    RECORD = Parser.parse_args()[0].record
     log.startLogging(sys.stdout)
     try:
         wfpiconsole().run()
@@ -0,0 +1,642 @@
+""" Tests the table driven Sager Weathercaster dial setting against the
+original nested if/elif implementation for every combination of wind sector,
+latitude zone, pressure band, pressure trend band and METAR cloud code.
+Copyright (C) 2018-2020 Peter Davis
+
+This program is free software: you can redistribute it and/or modify it under
+the terms of the GNU General Public License as published by the Free Software
+Foundation, either version 3 of the License, or (at your option) any later
+version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT
+ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with
+this program. If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# Import required library modules
+from lib import sager
+
+# Import required Python modules
+import itertools
+import math
+import pytest
+
+# Define global variables
+NaN = float('NaN')
+
+# Define latitudes on and either side of each latitude zone boundary
+Latitudes  = [0, 10, 23.4, 23.5, 45, 66.5, 66.6, 80, 90,
+              -0.1, -10, -23.4, -23.5, -45, -66.5, -66.6, -80, -90, NaN]
+
+# Define wind directions on and either side of each sector boundary, together
+# with invalid wind directions
+Directions = [0, 10, 22.4, 22.5, 45, 67.4, 67.5, 90, 112.4, 112.5, 135, 157.4, 157.5,
+              180, 202.4, 202.5, 225, 247.4, 247.5, 270, 292.4, 292.5, 315, 337.4,
+              337.5, 350, 359.9, 360, -1, NaN]
+
+# Define wind speeds either side of the calm threshold
+Speeds     = [0, 1, 1.1, 10, NaN]
+
+# Define pressures on and either side of each Barometer Dial band boundary
+Pressures  = [960, 975.2, 975.3, 980, 988.7, 988.8, 995, 998.9, 999.0, 1002,
+              1005.7, 1005.8, 1010, 1012.4, 1012.5, 1015, 1019.2, 1019.3, 1025,
+              1029.4, 1029.5, 1040, NaN]
+
+# Define 6 hour pressure changes on and either side of each Barometer Change
+# Dial band boundary
+Trends     = [-3, -1.5, -1.4, -1.0, -0.7, -0.6, 0, 0.6, 0.7, 1.0, 1.4, 1.5, 3, NaN]
+
+# Define minutes since last rain either side of the precipitation threshold
+LastRain   = [0, 30, 31, 1440, NaN]
+
+# Define METAR reports containing no code, each cloud code, multiple cloud
+# codes, precipitation codes, and invalid METAR reports
+METARs     = ['', 'KXYZ 181200Z 27010KT 10SM RA 12/08 A2992', None, 12345] + \
+             ['KXYZ 181200Z 27010KT 10SM ' + Code + ('020' if Code in ['FEW','SCT','BKN','OVC','VV'] else '') + ' 12/08 A2992'
+              for Code in sager.sagerCloudCodes] + \
+             ['KXYZ 181200Z 27010KT 10SM SCT020 OVC050 12/08 A2992',
+              'KXYZ 181200Z 27010KT 10SM OVC008 FEW020 12/08 A2992',
+              'KXYZ 181200Z 27010KT 1SM +TSRA BKN010CB 12/08 A2992']
+
+def metInput(Lat=45, WindDir=270, WindDir6=270, WindSpd=10, WindSpd6=10,
+             Pres=1015, Pres6=1015, LastRain=1440, METAR='KXYZ 181200Z 27010KT 10SM FEW020 12/08 A2992'):
+
+    """ Returns the dial setting input dictionary with the specified values
+    """
+
+    return {'Lat': Lat, 'Units': 'mph', 'WindDir6': WindDir6, 'WindDir': WindDir,
+            'WindSpd6': WindSpd6, 'WindSpd': WindSpd, 'Pres': Pres, 'Pres6': Pres6,
+            'LastRain': LastRain, 'Temp': 12.0, 'METAR': METAR}
+
+def isIntendedDivergence(Met):
+
+    """ Returns True for inputs where the original implementation raised
+    UnboundLocalError: a valid, non-calm current wind direction together with
+    an invalid, non-calm wind direction 6 hours ago at a valid latitude. Wind
+    speeds that are not 1 mph or less, including NaN, are not calm. The table driven implementation
+    returns None, like the other inputs that cannot be resolved
+    """
+
+    return (not math.isnan(Met['Lat'])
+            and not Met['WindSpd']  <= 1 and Met['WindDir'] >= 0
+            and not Met['WindSpd6'] <= 1 and not Met['WindDir6'] >= 0)
+
+def assertMatches(Met):
+
+    """ Asserts that the table driven dial setting matches the original dial
+    setting for the specified input
+    """
+
+    try:
+        Expected = referenceDialSetting(Met)
+    except UnboundLocalError:
+        assert isIntendedDivergence(Met), Met
+        assert sager.dialSetting(Met) is None, Met
+        return
+    assert not isIntendedDivergence(Met), Met
+    assert sager.dialSetting(Met) == Expected, Met
+
+@pytest.mark.parametrize('Lat', Latitudes)
+def test_wind_dial(Lat):
+
+    # Every combination of current and 6 hour wind sector and speed in each
+    # latitude zone
+    for WindDir,WindDir6,WindSpd,WindSpd6 in itertools.product(Directions,Directions,Speeds,Speeds):
+        assertMatches(metInput(Lat=Lat,WindDir=WindDir,WindDir6=WindDir6,WindSpd=WindSpd,WindSpd6=WindSpd6))
+
+@pytest.mark.parametrize('METAR', METARs)
+def test_barometer_and_weather_dials(METAR):
+
+    # Every combination of pressure band, pressure trend band and minutes since
+    # last rain for each METAR report
+    for Pres,Trend,Rain in itertools.product(Pressures,Trends,LastRain):
+        assertMatches(metInput(Pres=Pres,Pres6=Pres-Trend,LastRain=Rain,METAR=METAR))
+
+def test_nan_inputs():
+
+    # Every input set to NaN individually and all inputs set to NaN together
+    Fields = ['Lat','WindDir','WindDir6','WindSpd','WindSpd6','Pres','Pres6','LastRain']
+    for Field in Fields:
+        assertMatches(metInput(**{Field: NaN}))
+    assertMatches(metInput(**{Field: NaN for Field in Fields}))
+
+def test_intended_divergence():
+
+    # The original implementation raised UnboundLocalError when the current
+    # wind direction was valid but the wind direction 6 hours ago was invalid.
+    # The table driven implementation returns None instead
+    for WindDir6 in [-1, NaN]:
+        Met = metInput(WindDir=270, WindDir6=WindDir6)
+        with pytest.raises(UnboundLocalError):
+            referenceDialSetting(Met)
+        assert sager.dialSetting(Met) is None
+
+def referenceDialSetting(Met):
+
+    ''' Calculates the position of the Sager Weathercaster Dial based on the
+    current weather conditions and the trend in conditions over the previous 6
+    hours. Frozen copy of the nested if/elif implementation that was replaced
+    by the lookup tables in lib/sager.py, with the unused pressure trend labels
+    removed. Do not edit.
+
+    INPUTS:
+        Met                     Dictionary containing the following fields:
+            Lat                 Weather observations latitude
+            METARKey            Metar Key
+            WindDir6            Average wind direction 6 hours ago in degrees
+            WindDir             Current average wind direction in degrees
+            WindSpd6            Average wind speed 6 hours ago in mph
+            WindSpd             Current average wind speed in mph
+            Pres                Current atmospheric pressure in hPa
+            Pres6               Atmospheric pressure 6 hours ago in hPa
+            LastRain            Minutes since last rain
+            Temp                Current temperature
+            METAR               Closet METAR information to station location
+
+    OUTPUT:
+        Sager                   Dictionary containing the position of the Sager
+                                Weathercaster Dial
+    '''
+
+    # Extract input location/meteorological variables
+    Lat = Met['Lat']                            # Weather station latitude
+    Units = Met['Units']                        # Weather station wind speed units
+    wd6 = Met['WindDir6']                       # Average wind direction 6 hours ago in degrees
+    wd = Met['WindDir']                         # Current average wind direction in degrees
+    ws6 = Met['WindSpd6']                       # Average wind speed 6 hours ago in mph
+    ws = Met['WindSpd']                         # Current average wind speed in mph
+    p = Met['Pres']                             # Current atmospheric pressure in hPa
+    p6 = Met['Pres6']                           # Atmospheric pressure 6 hours ago in hPa
+    lr = Met['LastRain']                        # Minutes since last rain
+    t = Met['Temp']                             # Current temperature
+    METAR = Met['METAR']                        # Closet METAR information to station location
+
+    # Define required variables
+    ccode  = {}
+    pcode  = {}
+    pcodes = ['FZDZ','FZRA','SHGR','SHGS','SHPL','SHRA','SHSN','TSGR','TSGS','TSPL','TSRA',
+              'TSSN','VCSH','VCTS','DZ','GR','GS','IC','PL','RA','SG','SN','UP']
+    ccodes = ['CAVOK','CLR','NCD','NSC','SKC','FEW','SCT','BKN','OVC','VV']               
+
+    # Searches METAR information for Cloud Codes
+    Ind = {}
+    try:
+        for count,code in enumerate(ccodes):
+            if METAR.find(code) != -1:
+                Ind[count] = METAR.find(code)
+    except:
+        return None
+    if len(Ind) != 0:
+        ccode = ccodes[min(Ind,key=Ind.get)]
+
+    # Searches METAR information for Precipitation Codes
+    Ind = {}
+    try:
+        for count,code in enumerate(pcodes):
+            if METAR.find(code) != -1:
+                Ind[count] = METAR.find(code)
+    except:
+        return None
+    if len(Ind) != 0:
+        pcode = pcodes[min(Ind,key=Ind.get)]
+
+    # Determines the Present Weather result used with The Sager Weathercaster:
+    if len(pcode) > 0:
+        pw = 'Precipitation'
+    if ccode == 'CAVOK' or ccode == 'CLR' or ccode == 'NCD' or ccode == 'NSC' or ccode == 'SKC':
+        pw = 'Clear'
+    elif ccode == 'FEW' or ccode == 'SCT':
+        pw = 'Partly Cloudy'
+    elif ccode == 'BKN':
+        pw = 'Mostly Cloudy'
+    elif ccode == 'OVC':
+        pw = 'Overcast'
+    elif ccode == 'VV':
+        pw = 'Precipitation'
+    else:
+        pw = None
+
+    # Convert the average wind direction in degrees from 6 hours
+    # ago into a direction. An average direction of exactly zero
+    # is assumed to indicate calm conditions
+    if ws6 <= 1:
+        wd6 = 'Calm'
+    elif wd6 >= 0 and wd6 < 22.5 or wd6 >= 337.5:
+        wd6 = 'N'
+    elif wd6 >= 22.5 and wd6 < 67.5:
+        wd6 = 'NE'
+    elif wd6 >= 67.5 and wd6 < 112.5:
+        wd6 = 'E'
+    elif wd6 >= 112.5 and wd6 < 157.5:
+        wd6 = 'SE'
+    elif wd6 >= 157.5 and wd6 < 202.5:
+        wd6 = 'S'
+    elif wd6 >= 202.5 and wd6 < 247.5:
+        wd6 = 'SW'
+    elif wd6 >= 247.5 and wd6 < 292.5:
+        wd6 = 'W'
+    elif wd6 >= 292.5 and wd6 < 337.5:
+        wd6 = 'NW'
+
+    # Convert the current average wind direction in degrees into
+    # a direction. An average direction of exactly zero is
+    # assumed to indicate calm conditions
+    if ws <= 1:
+        wd = 'Calm'
+    elif wd >= 0 and wd < 22.5 or wd >= 337.5:
+        wd = 'N'
+    elif wd >= 22.5 and wd < 67.5:
+        wd = 'NE'
+    elif wd >= 67.5 and wd < 112.5:
+        wd = 'E'
+    elif wd >= 112.5 and wd < 157.5:
+        wd = 'SE'
+    elif wd >= 157.5 and wd < 202.5:
+        wd = 'S'
+    elif wd >= 202.5 and wd < 247.5:
+        wd = 'SW'
+    elif wd >= 247.5 and wd < 292.5:
+        wd = 'W'
+    elif wd >= 292.5 and wd < 337.5:
+        wd = 'NW'
+
+    # Compare the change in wind direction over the last 6 hours
+    # to determine if the wind is:
+    #   - Backing changing counter-clockwise
+    #   - Steady same direction or opposite direction
+    #   - Veering changing clockwise
+    #   - Calm
+    if wd == 'N':
+        if wd6 == 'NE' or wd6 == 'E' or wd6 == 'SE':
+            wdc = 'Backing'
+        elif wd6 == 'N' or wd6 == 'S' or wd6 == 'Calm':
+            wdc = 'Steady'
+        elif wd6 == 'NW' or wd6 == 'W' or wd6 == 'SW':
+            wdc = 'Veering'
+    elif wd == 'NE':
+        if wd6 == 'E' or wd6 == 'SE' or wd6 == 'S':
+            wdc = 'Backing'
+        elif wd6 == 'NE' or wd6 == 'SW' or wd6 == 'Calm':
+            wdc = 'Steady'
+        elif wd6 == 'N' or wd6 == 'NW' or wd6 == 'W':
+            wdc = 'Veering'
+    elif wd == 'E':
+        if wd6 == 'SE' or wd6 == 'S' or wd6 == 'SW':
+            wdc = 'Backing'
+        elif wd6 == 'E' or wd6 == 'W' or wd6 == 'Calm':
+            wdc = 'Steady'
+        elif wd6 == 'NE' or wd6 == 'N' or wd6 == 'NW':
+            wdc = 'Veering'
+    elif wd == 'SE':
+        if wd6 == 'S' or wd6 == 'SW' or wd6 == 'W':
+            wdc = 'Backing'
+        elif wd6 == 'SE' or wd6 == 'NW' or wd6 == 'Calm':
+            wdc = 'Steady'
+        elif wd6 == 'E' or wd6 == 'NE' or wd6 == 'N':
+            wdc = 'Veering'
+    elif wd == 'S':
+        if wd6 == 'SW' or wd6 == 'W' or wd6 == 'NW':
+            wdc = 'Backing'
+        elif wd6 == 'S' or wd6 == 'N' or wd6 == 'Calm':
+            wdc = 'Steady'
+        elif wd6 == 'SE' or wd6 == 'E' or wd6 == 'NE':
+            wdc = 'Veering'
+    elif wd == 'SW':
+        if wd6 == 'W' or wd6 == 'NW' or wd6 == 'N':
+            wdc = 'Backing'
+        elif wd6 == 'SW' or wd6 == 'NE' or wd6 == 'Calm':
+            wdc = 'Steady'
+        elif wd6 == 'S' or wd6 == 'SE' or wd6 == 'E':
+            wdc = 'Veering'
+    elif wd == 'W':
+        if wd6 == 'NW' or wd6 == 'N' or wd6 == 'NE':
+            wdc = 'Backing'
+        elif wd6 == 'W' or wd6 == 'E' or wd6 == 'Calm':
+            wdc = 'Steady'
+        elif wd6 == 'SW' or wd6 == 'S' or wd6 == 'SE':
+            wdc = 'Veering'
+    elif wd == 'NW':
+        if wd6 == 'N' or wd6 == 'NE' or wd6 == 'E':
+            wdc = 'Backing'
+        elif wd6 == 'NW' or wd6 == 'SE' or wd6 == 'Calm':
+            wdc = 'Steady'
+        elif wd6 == 'W' or wd6 == 'SW' or wd6 == 'S':
+            wdc = 'Veering'
+    elif wd == 'Calm':
+        wdc = 'Calm'
+
+    # Determine the Wind Dial position from the current wind direction and whether
+    # the change from 6 hours ago is Backing/Steady/Veering/Calm modified by the
+    # weather station latitude. The Sager Weathercaster is designed for use in the
+    # Northern Temperate Zone. The relationship between the wind direction and the
+    # setting on the Wind Dial changes with latitude due to the Coriolis effect.
+
+    # Northern Hemisphere: Polar Zone & Tropical Zone
+    if Lat >= 0:
+        if Lat < 23.5 or Lat >= 66.6:
+            if wd == 'S':
+                if wdc == 'Backing':
+                    d1 = 'A'
+                elif wdc == 'Steady':
+                    d1 = 'B'
+                elif wdc == 'Veering':
+                    d1 = 'C'
+            elif wd == 'SW':
+                if wdc == 'Backing':
+                    d1 = 'D'
+                elif wdc == 'Steady':
+                    d1 = 'E'
+                elif wdc == 'Veering':
+                    d1 = 'F'
+            elif wd == 'W':
+                if wdc == 'Backing':
+                    d1 = 'G'
+                elif wdc == 'Steady':
+                    d1 = 'H'
+                elif wdc == 'Veering':
+                    d1 = 'J'
+            elif wd == 'NW':
+                if wdc == 'Backing':
+                    d1 = 'K'
+                elif wdc == 'Steady':
+                    d1 = 'L'
+                elif wdc == 'Veering':
+                    d1 = 'M'
+            elif wd == 'N':
+                if wdc == 'Backing':
+                    d1 = 'N'
+                elif wdc == 'Steady':
+                    d1 = 'O'
+                elif wdc == 'Veering':
+                    d1 = 'P'
+            elif wd == 'NE':
+                if wdc == 'Backing':
+                    d1 = 'Q'
+                elif wdc == 'Steady':
+                    d1 = 'R'
+                elif wdc == 'Veering':
+                    d1 = 'S'
+            elif wd == 'E':
+                if wdc == 'Backing':
+                    d1 = 'T'
+                elif wdc == 'Steady':
+                    d1 = 'U'
+                elif wdc == 'Veering':
+                    d1 = 'V'
+            elif wd == 'SE':
+                if wdc == 'Backing':
+                    d1 = 'W'
+                elif wdc == 'Steady':
+                    d1 = 'X'
+                elif wdc == 'Veering':
+                    d1 = 'Y'
+            elif wd == 'Calm':
+                d1 = 'Z'
+
+        # Northern Hemisphere: Temperate Zone
+        elif Lat >= 23.5 and Lat < 66.6:
+            if wd == 'N':
+                if wdc == 'Backing':
+                    d1 = 'A'
+                elif wdc == 'Steady':
+                    d1 = 'B'
+                elif wdc == 'Veering':
+                    d1 = 'C'
+            elif wd == 'NE':
+                if wdc == 'Backing':
+                    d1 = 'D'
+                elif wdc == 'Steady':
+                    d1 = 'E'
+                elif wdc == 'Veering':
+                    d1 = 'F'
+            elif wd == 'E':
+                if wdc == 'Backing':
+                    d1 = 'G'
+                elif wdc == 'Steady':
+                    d1 = 'H'
+                elif wdc == 'Veering':
+                    d1 = 'J'
+            elif wd == 'SE':
+                if wdc == 'Backing':
+                    d1 = 'K'
+                elif wdc == 'Steady':
+                    d1 = 'L'
+                elif wdc == 'Veering':
+                    d1 = 'M'
+            elif wd == 'S':
+                if wdc == 'Backing':
+                    d1 = 'N'
+                elif wdc == 'Steady':
+                    d1 = 'O'
+                elif wdc == 'Veering':
+                    d1 = 'P'
+            elif wd == 'SW':
+                if wdc == 'Backing':
+                    d1 = 'Q'
+                elif wdc == 'Steady':
+                    d1 = 'R'
+                elif wdc == 'Veering':
+                    d1 = 'S'
+            elif wd == 'W':
+                if wdc == 'Backing':
+                    d1 = 'T'
+                elif wdc == 'Steady':
+                    d1 = 'U'
+                elif wdc == 'Veering':
+                    d1 = 'V'
+            elif wd == 'NW':
+                if wdc == 'Backing':
+                    d1 = 'W'
+                elif wdc == 'Steady':
+                    d1 = 'X'
+                elif wdc == 'Veering':
+                    d1 = 'Y'
+            elif wd == 'Calm':
+                d1 = 'Z'
+
+    # Southern Hemisphere: Polar Zone & Tropical Zone
+    elif Lat < 0:
+        if Lat > -23.5 or Lat <= -66.6:
+            if wd == 'N':
+                if wdc == 'Backing':
+                    d1 = 'A'
+                elif wdc == 'Steady':
+                    d1 = 'B'
+                elif wdc == 'Veering':
+                    d1 = 'C'
+            elif wd == 'NW':
+                if wdc == 'Backing':
+                    d1 = 'D'
+                elif wdc == 'Steady':
+                    d1 = 'E'
+                elif wdc == 'Veering':
+                    d1 = 'F'
+            elif wd == 'W':
+                if wdc == 'Backing':
+                    d1 = 'G'
+                elif wdc == 'Steady':
+                    d1 = 'H'
+                elif wdc == 'Veering':
+                    d1 = 'J'
+            elif wd == 'SW':
+                if wdc == 'Backing':
+                    d1 = 'K'
+                elif wdc == 'Steady':
+                    d1 = 'L'
+                elif wdc == 'Veering':
+                    d1 = 'M'
+            elif wd == 'S':
+                if wdc == 'Backing':
+                    d1 = 'N'
+                elif wdc == 'Steady':
+                    d1 = 'O'
+                elif wdc == 'Veering':
+                    d1 = 'P'
+            elif wd == 'SE':
+                if wdc == 'Backing':
+                    d1 = 'Q'
+                elif wdc == 'Steady':
+                    d1 = 'R'
+                elif wdc == 'Veering':
+                    d1 = 'S'
+            elif wd == 'E':
+                if wdc == 'Backing':
+                    d1 = 'T'
+                elif wdc == 'Steady':
+                    d1 = 'U'
+                elif wdc == 'Veering':
+                    d1 = 'V'
+            elif wd == 'NE':
+                if wdc == 'Backing':
+                    d1 = 'W'
+                elif wdc == 'Steady':
+                    d1 = 'X'
+                elif wdc == 'Veering':
+                    d1 = 'Y'
+            elif wd == 'Calm':
+                d1 = 'Z'
+
+        # Southern Hemisphere: Temperate Zone
+        elif Lat <= -23.5 and Lat > -66.6:
+            if wd == 'S':
+                if wdc == 'Backing':
+                    d1 = 'A'
+                elif wdc == 'Steady':
+                    d1 = 'B'
+                elif wdc == 'Veering':
+                    d1 = 'C'
+            elif wd == 'SE':
+                if wdc == 'Backing':
+                    d1 = 'D'
+                elif wdc == 'Steady':
+                    d1 = 'E'
+                elif wdc == 'Veering':
+                    d1 = 'F'
+            elif wd == 'E':
+                if wdc == 'Backing':
+                    d1 = 'G'
+                elif wdc == 'Steady':
+                    d1 = 'H'
+                elif wdc == 'Veering':
+                    d1 = 'J'
+            elif wd == 'NE':
+                if wdc == 'Backing':
+                    d1 = 'K'
+                elif wdc == 'Steady':
+                    d1 = 'L'
+                elif wdc == 'Veering':
+                    d1 = 'M'
+            elif wd == 'N':
+                if wdc == 'Backing':
+                    d1 = 'N'
+                elif wdc == 'Steady':
+                    d1 = 'O'
+                elif wdc == 'Veering':
+                    d1 = 'P'
+            elif wd == 'NW':
+                if wdc == 'Backing':
+                    d1 = 'Q'
+                elif wdc == 'Steady':
+                    d1 = 'R'
+                elif wdc == 'Veering':
+                    d1 = 'S'
+            elif wd == 'W':
+                if wdc == 'Backing':
+                    d1 = 'T'
+                elif wdc == 'Steady':
+                    d1 = 'U'
+                elif wdc == 'Veering':
+                    d1 = 'V'
+            elif wd == 'SW':
+                if wdc == 'Backing':
+                    d1 = 'W'
+                elif wdc == 'Steady':
+                    d1 = 'X'
+                elif wdc == 'Veering':
+                    d1 = 'Y'
+            elif wd == 'Calm':
+                d1 = 'Z'
+
+    # Determine the Barometer Dial position from the current atmospheric pressure
+    if p >= 1029.5:
+        d2 = '1'
+    elif p >= 1019.3 and p < 1029.5:
+        d2 = '2'
+    elif p >= 1012.5 and p < 1019.3:
+        d2 = '3'
+    elif p >= 1005.8 and p < 1012.5:
+        d2 = '4'
+    elif p >= 999.0 and p < 1005.8:
+        d2 = '5'
+    elif p >= 988.8 and p < 999.0:
+        d2 = '6'
+    elif p >= 975.3 and p < 988.8:
+        d2 = '7'
+    elif p < 975.3:
+        d2 = '8'
+
+    # Determine the Barometer Change Dial position using the current atmospheric
+    # pressure trend in hPa/6 hours.
+    pt = p - p6
+    if pt >= 1.4:                           # Rising Rapidly
+        d3 = '1'
+    elif pt >= 0.7 and pt < 1.4:            # Rising Slowly
+        d3 = '2'
+    elif pt < 0.7 and pt > -0.7:            # Normal
+        d3 = '3'
+    elif pt <= -0.7 and pt > -1.4:          # Falling Slowly
+        d3 = '4'
+    elif pt <= -1.4:                        # Falling Rapidly
+        d3 = '5'
+
+    # Determine the Present Weather Dial position using the current weather
+    # conditions
+    if lr <= 30:
+        pw = 'Precipitation'
+        d4 = '5'
+    elif pw == 'Clear':
+        d4 = '1'
+    elif pw == 'Partly Cloudy':
+        d4 = '2'
+    elif pw == 'Mostly Cloudy':
+        d4 = '3'
+    elif pw == 'Overcast':
+        d4 = '4'
+    elif pw == 'Precipitation':
+        d4 = '5'
+    elif pw == None:
+        d4 = 'x'
+
+    # Return SagerWeathercaster dial setting as function output
+    try:
+        Sager = dict()
+        Sager['DialSet'] = d1 + d2 + d3 + d4
+        Sager['Temp'] = t
+        Sager['Lat'] = Lat
+        Sager['Units'] = Units
+        return Sager
+    except:
+        return None